@@ -0,0 +1,257 @@
+"""
+Asyncio runtime for Viola
+Runs capture, recognition, command handling and speech as separate stages
+joined by queues, so Viola keeps listening while she talks or waits on the network.
+
+  capture task   - pulls phrases from the CaptureSession (blocking, in an executor)
+  recognize task - wake word check and speech-to-text (blocking, in an executor)
+  dispatch task  - barge-in / control words, and runs commands concurrently
+  speech         - the tts_engine worker thread and its queue
+"""
+
+import asyncio
+import contextvars
+import functools
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import speech_recognition as sr
+
+import tracing
+import wake_word
+
+# Said on their own (or right after "Viola") these interrupt the current answer
+STOP_WORDS = re.compile(r"^(?:stop|cancel|enough|quiet|be quiet|shut up|stop talking)$")
+_WAKE_PREFIX = re.compile(rf"^.*?\b{wake_word.WAKE_WORD}\b[\s,.!?]*")
+
+
+def strip_wake_word(text):
+    """Drop everything up to and including the wake word ("viola, what is..." -> "what is...")."""
+    return _WAKE_PREFIX.sub("", text, count=1).strip()
+
+
+class VoiceRuntime:
+    """
+    The listen -> recognize -> act -> speak loop as cooperating asyncio tasks.
+
+    Args:
+        session (audio_capture.CaptureSession): Started capture session (created with keep_echo=True
+            so phrases spoken over Viola still reach the barge-in check)
+        wake (wake_word.WakeWordStage): Wake word stage
+        stt: Recognizer with a transcribe(audio) method
+        handle_command (callable): Runs one command, e.g. main.process_command
+        speak (callable): Blocking speak(text)
+        stop_speaking (callable): Interrupts and flushes speech
+        command_window (float): Seconds after "Viola" during which the next phrase is the command
+        max_concurrent_commands (int): Commands allowed to run at the same time
+    """
+
+    def __init__(self, session, wake, stt, handle_command, speak, stop_speaking,
+                 command_window=8.0, max_concurrent_commands=2):
+        self.session = session
+        self.wake = wake
+        self.stt = stt
+        self.handle_command = handle_command
+        self.speak = speak
+        self.stop_speaking = stop_speaking
+        self.command_window = command_window
+        self.max_concurrent_commands = max_concurrent_commands
+        self._awaiting_until = 0.0
+        self._running_commands = set()
+        self._loop = None
+        self._executor = None
+        self._stopping = None
+        self.barge_ins = 0
+        self.commands_run = 0
+
+    async def _blocking(self, func, *args):
+        # Run in a copy of this task's context so the thread sees the current trace
+        context = contextvars.copy_context()
+        return await self._loop.run_in_executor(self._executor, functools.partial(context.run, func, *args))
+
+    def _say(self, text):
+        """Queue a reply without waiting for it to finish."""
+        self._loop.run_in_executor(self._executor, self.speak, text)
+
+    def stop(self):
+        """Ask the runtime to shut down."""
+        if self._stopping is not None:
+            self._loop.call_soon_threadsafe(self._stopping.set)
+
+    async def run(self):
+        """Run until "stop listening" is heard or capture stops."""
+        self._loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.max_concurrent_commands + 4,
+                                            thread_name_prefix="viola-runtime")
+        self._stopping = asyncio.Event()
+        self._semaphore = asyncio.Semaphore(self.max_concurrent_commands)
+        phrases = asyncio.Queue(maxsize=16)
+        commands = asyncio.Queue()
+
+        tasks = [
+            asyncio.create_task(self._capture(phrases), name="capture"),
+            asyncio.create_task(self._recognize(phrases, commands), name="recognize"),
+            asyncio.create_task(self._dispatch(commands), name="dispatch"),
+        ]
+        try:
+            await self._stopping.wait()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._running_commands:
+                # Let commands already underway finish their reply
+                await asyncio.wait(self._running_commands, timeout=10)
+            self._executor.shutdown(wait=False)
+
+    # ------------------------------------------------------------------
+    # Stages
+    # ------------------------------------------------------------------
+    async def _capture(self, phrases):
+        print("Listening...")
+        while True:
+            try:
+                phrase = await self._blocking(self.session.get_phrase, 0.5)
+            except sr.WaitTimeoutError:
+                if not self.session.running:
+                    print("Microphone capture stopped, exiting...")
+                    # Finish what was already heard before stopping
+                    await phrases.put(None)
+                    return
+                continue
+            await phrases.put(phrase)
+
+    async def _recognize(self, phrases, commands):
+        while True:
+            phrase = await phrases.get()
+            if phrase is None:
+                await commands.put((None, None))
+                return
+            audio, during_speech = phrase
+            # Every phrase is traced; only those that woke Viola or carried a command are kept
+            interaction = tracing.tracer.interaction("phrase", during_speech=during_speech)
+            with tracing.activate(interaction):
+                if interaction is not None and isinstance(audio, sr.AudioData):
+                    tracing.record("capture", wake_word.audio_seconds(audio))
+                try:
+                    await self._recognize_phrase(audio, during_speech, commands)
+                except asyncio.CancelledError:
+                    raise
+                except Exception as e:
+                    print("Error!!! {0}".format(e))
+            if interaction is not None and interaction.kind == "wake":
+                interaction.finish()
+
+    async def _recognize_phrase(self, audio, during_speech, commands):
+        if not during_speech and time.monotonic() < self._awaiting_until:
+            # The phrase right after "Viola" is the command
+            self._awaiting_until = 0.0
+            print("Recognizing...")
+            try:
+                with tracing.span("stt"):
+                    command = await self._blocking(self.stt.transcribe, audio)
+            except sr.UnknownValueError:
+                self._say("I didn't understand that command")
+                return
+            print(f"Command received: {command}")
+            await self._queue_command(commands, command)
+            return
+
+        with tracing.span("wake") as span:
+            result = await self._blocking(self.wake.check, audio)
+            span.set(detected=result.detected, stage=result.stage)
+        if result.transcript is not None and not during_speech:
+            print(f"Heard: {result.transcript}")
+            if "stop listening" in result.transcript.lower():
+                await self._queue_command(commands, "stop listening")
+                return
+        if not result:
+            return
+
+        # Anything said after the wake word in the same phrase ("Viola, stop")
+        rest = strip_wake_word(result.transcript.lower()) if result.transcript else ""
+        if during_speech:
+            if result.transcript is None:
+                # A keyword spotter only heard "Viola", which may be her own voice ("I am Viola...");
+                # transcribe the phrase so only an actual stop word cuts her off
+                try:
+                    with tracing.span("stt"):
+                        heard = await self._blocking(self.stt.transcribe, audio)
+                except sr.UnknownValueError:
+                    return
+                rest = strip_wake_word(heard.lower())
+            if not STOP_WORDS.match(rest):
+                # A phrase mentioning Viola while she talks is most likely her own voice
+                return
+            # Barge-in: the user talked over Viola
+            print("Barge-in detected!")
+            self.barge_ins += 1
+            self.stop_speaking()
+            return
+        if rest:
+            # Wake word and command in one breath
+            print(f"Command received: {rest}")
+            await self._queue_command(commands, rest)
+            return
+
+        print("Wake word detected!")
+        interaction = tracing.current()
+        if interaction is not None:
+            interaction.kind = "wake"
+        self._say("Yes, how can I help you?")
+        self._awaiting_until = time.monotonic() + self.command_window
+        print("Viola is listening for a command...")
+
+    async def _queue_command(self, commands, command):
+        """Hand a command to the dispatcher, along with the trace of the phrase it came from."""
+        interaction = tracing.current()
+        if interaction is not None:
+            interaction.kind = "command"
+            interaction.annotate(command=command)
+        await commands.put((command, interaction))
+
+    async def _dispatch(self, commands):
+        while True:
+            command, interaction = await commands.get()
+            if command is None:
+                self._stopping.set()
+                return
+            command = command.strip()
+            lw = command.lower()
+            if "stop listening" in lw:
+                print("Stop listening command detected, exiting...")
+                self.stop_speaking()
+                with tracing.activate(interaction):
+                    await self._blocking(self.speak, "Stopping Viola. Goodbye!")
+                if interaction is not None:
+                    interaction.finish(intent="stop_listening")
+                self._stopping.set()
+                return
+            if STOP_WORDS.match(lw):
+                self.barge_ins += 1
+                self.stop_speaking()
+                if interaction is not None:
+                    interaction.finish(intent="stop_speaking")
+                continue
+            task = asyncio.create_task(self._run_command(command, interaction))
+            self._running_commands.add(task)
+            task.add_done_callback(self._running_commands.discard)
+
+    async def _run_command(self, command, interaction=None):
+        with tracing.activate(interaction):
+            async with self._semaphore:
+                try:
+                    await self._blocking(self.handle_command, command)
+                    self.commands_run += 1
+                except Exception as e:
+                    print("Error!!! {0}".format(e))
+        if interaction is not None:
+            interaction.finish()
+
+    def stats(self):
+        return {
+            "commands": self.commands_run,
+            "barge_ins": self.barge_ins,
+            "running": len(self._running_commands),
+        }
@@ -0,0 +1,209 @@
+"""
+Audio Capture for Viola
+Keeps the microphone open for the whole session, calibrates ambient noise once
+and buffers captured phrases so nothing said during command processing is lost.
+"""
+
+import threading
+import time
+from collections import deque
+
+import speech_recognition as sr
+
+
+class CaptureSession:
+    """
+    Persistent microphone capture running on a background thread.
+
+    The device is opened and calibrated once. After that the recognizer's
+    dynamic energy threshold keeps adapting to the room while it listens,
+    and every captured phrase goes into a ring buffer until someone reads it.
+
+    Args:
+        recognizer (sr.Recognizer): Recognizer used for listening (default: new one)
+        source_factory (callable): Returns an sr.AudioSource (default: sr.Microphone)
+        calibration_duration (float): Seconds of ambient noise sampled at startup
+        phrase_time_limit (float): Maximum length of a single captured phrase
+        buffer_size (int): Phrases kept before the oldest is dropped
+        echo_guard (callable): Given a phrase start time (time.perf_counter), returns True
+            if the assistant was speaking since then; such phrases are discarded
+        keep_echo (bool): Buffer phrases flagged by echo_guard instead of discarding them,
+            so the caller can still look for barge-in ("Viola, stop") while Viola talks
+        vad (vad.VADListener): Cut phrases on voice activity instead of the recognizer's
+            energy threshold and pause_threshold (needs 16-bit audio)
+    """
+
+    def __init__(self, recognizer=None, source_factory=None, calibration_duration=0.5,
+                 phrase_time_limit=8, buffer_size=8, echo_guard=None, keep_echo=False, vad=None):
+        if recognizer is None:
+            recognizer = sr.Recognizer()
+            recognizer.dynamic_energy_threshold = True
+            recognizer.pause_threshold = 0.5
+        self.recognizer = recognizer
+        self.source_factory = source_factory or sr.Microphone
+        self.calibration_duration = calibration_duration
+        self.phrase_time_limit = phrase_time_limit
+        self.echo_guard = echo_guard
+        self.keep_echo = keep_echo
+        self.vad = vad
+        self._buffer = deque(maxlen=buffer_size)
+        self._available = threading.Condition()
+        self._running = threading.Event()
+        self._thread = None
+        self._source = None
+        self.error = None
+
+        # Counters
+        self.calibration_seconds = 0.0
+        self.listening_seconds = 0.0
+        self.phrases_captured = 0
+        self.phrases_dropped = 0
+        self.echo_discarded = 0
+
+    def start(self):
+        """Open the device, calibrate once and start capturing in the background."""
+        if self._running.is_set():
+            return self
+        self._source = self.source_factory()
+        self._source.__enter__()
+
+        began = time.perf_counter()
+        self.recognizer.adjust_for_ambient_noise(self._source, duration=self.calibration_duration)
+        self.calibration_seconds += time.perf_counter() - began
+        if self.vad is not None:
+            self.vad.calibrate(self.recognizer.energy_threshold)
+
+        self._running.set()
+        self._thread = threading.Thread(target=self._run, name="viola-capture", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        """Stop capturing and close the device."""
+        self._running.clear()
+        if self._thread is not None:
+            self._thread.join(self.phrase_time_limit + 2)
+            self._thread = None
+        if self._source is not None:
+            self._source.__exit__(None, None, None)
+            self._source = None
+        with self._available:
+            self._available.notify_all()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def _run(self):
+        sample_rate = self._source.SAMPLE_RATE
+        sample_width = self._source.SAMPLE_WIDTH
+        listen = self.recognizer.listen
+        if self.vad is not None and sample_width == 2:
+            listen = self.vad.listen
+        while self._running.is_set():
+            began = time.perf_counter()
+            try:
+                # Short timeout so stop() is noticed between phrases
+                audio = listen(self._source, timeout=1, phrase_time_limit=self.phrase_time_limit)
+            except sr.WaitTimeoutError:
+                self.listening_seconds += time.perf_counter() - began
+                continue
+            except Exception as e:
+                self.error = e
+                print(f"Error capturing audio: {e}")
+                self._running.clear()
+                with self._available:
+                    self._available.notify_all()
+                return
+            ended = time.perf_counter()
+            self.listening_seconds += ended - began
+
+            if not audio.frame_data:
+                # Audio source ran dry (e.g. a file); nothing more will come
+                self._running.clear()
+                with self._available:
+                    self._available.notify_all()
+                return
+
+            phrase_start = ended - len(audio.frame_data) / float(sample_rate * sample_width)
+            during_speech = self.echo_guard is not None and self.echo_guard(phrase_start)
+            if during_speech and not self.keep_echo:
+                # Viola heard herself talking
+                self.echo_discarded += 1
+                continue
+
+            with self._available:
+                if len(self._buffer) == self._buffer.maxlen:
+                    self.phrases_dropped += 1
+                self._buffer.append((audio, during_speech))
+                self.phrases_captured += 1
+                self._available.notify()
+
+    def get(self, timeout=None):
+        """
+        Return the oldest buffered phrase, waiting for one if necessary.
+
+        Args:
+            timeout (float): Seconds to wait (None waits forever)
+
+        Returns:
+            sr.AudioData: The captured phrase
+
+        Raises:
+            sr.WaitTimeoutError: If nothing was captured in time
+        """
+        return self.get_phrase(timeout)[0]
+
+    def get_phrase(self, timeout=None):
+        """
+        Like get(), but also says whether the phrase overlapped Viola's own speech.
+
+        Returns:
+            tuple: (sr.AudioData, during_speech)
+        """
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        with self._available:
+            while not self._buffer:
+                if not self._running.is_set():
+                    if self.error is not None:
+                        raise self.error
+                    raise sr.WaitTimeoutError("Capture session is not running")
+                remaining = None if deadline is None else deadline - time.perf_counter()
+                if remaining is not None and remaining <= 0:
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                self._available.wait(remaining)
+            return self._buffer.popleft()
+
+    def flush(self):
+        """Discard everything still buffered. Returns the number of phrases dropped."""
+        with self._available:
+            count = len(self._buffer)
+            self._buffer.clear()
+        return count
+
+    def stats(self):
+        """
+        Capture counters.
+
+        Returns:
+            dict: Seconds spent calibrating vs listening, phrase counts and current energy threshold
+                (plus the VAD's counters under "vad" when it is used)
+        """
+        stats = {
+            "calibration_s": self.calibration_seconds,
+            "listening_s": self.listening_seconds,
+            "captured": self.phrases_captured,
+            "dropped": self.phrases_dropped,
+            "echo_discarded": self.echo_discarded,
+            "buffered": len(self._buffer),
+            "energy_threshold": self.recognizer.energy_threshold,
+        }
+        if self.vad is not None:
+            stats["vad"] = self.vad.stats()
+        return stats
@@ -0,0 +1,204 @@
+"""
+Batch mode for Viola
+Runs text commands from a file or stdin through the command layer with no
+microphone or speakers: `python main.py --batch commands.txt`.
+
+Replies go to a sink instead of text-to-speech. Commands run on a thread
+pool, so network skills (DuckDuckGo, NewsAPI) overlap, but results are
+written in input order. A summary with per-intent counts and latency
+percentiles is returned at the end.
+
+Sinks:
+    stdout - each command followed by its replies, for reading
+    json   - one JSON object per command, for diffing and regression tests
+    null   - nothing, for benchmarking the command layer itself
+
+Command files hold one command per line; blank lines and lines starting
+with "#" are skipped.
+"""
+
+import json
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+
+import sessions
+
+PERCENTILES = (50, 95, 99)
+
+
+class BatchResult:
+    """The outcome of one command line."""
+
+    def __init__(self, line, text, command=None, intent=None, replies=(), opened=(), seconds=0.0, error=None):
+        self.line = line
+        self.text = text
+        self.command = command
+        self.intent = intent
+        self.replies = list(replies)
+        self.opened = list(opened)
+        self.seconds = seconds
+        self.error = error
+
+    def as_dict(self):
+        return {
+            "line": self.line,
+            "command": self.command if self.command is not None else self.text,
+            "intent": self.intent,
+            "replies": self.replies,
+            "open": self.opened,
+            "ms": round(self.seconds * 1000, 3),
+            "error": self.error,
+        }
+
+
+class StdoutSink:
+    """Writes each command and what Viola would have said, for reading."""
+
+    name = "stdout"
+
+    def __init__(self, stream=None):
+        self.stream = stream or sys.stdout
+
+    def write(self, result):
+        lines = [f"> {result.text}"]
+        if result.error is not None:
+            lines.append(f"  ! {result.error}")
+        lines.extend(f"  {reply}" for reply in result.replies)
+        lines.extend(f"  [open] {url}" for url in result.opened)
+        self.stream.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self.stream.flush()
+
+
+class JSONSink(StdoutSink):
+    """Writes one JSON object per command (JSON lines)."""
+
+    name = "json"
+
+    def write(self, result):
+        self.stream.write(json.dumps(result.as_dict()) + "\n")
+
+
+class NullSink:
+    """Discards results; only the summary is kept."""
+
+    name = "null"
+
+    def __init__(self, stream=None):
+        pass
+
+    def write(self, result):
+        pass
+
+    def close(self):
+        pass
+
+
+SINKS = {sink.name: sink for sink in (StdoutSink, JSONSink, NullSink)}
+
+
+def read_commands(lines):
+    """
+    The commands in a command file.
+
+    Args:
+        lines (iterable): Lines of text (a file object works)
+
+    Yields:
+        tuple: (line number, command text)
+    """
+    for number, line in enumerate(lines, 1):
+        line = line.strip()
+        if line and not line.startswith("#"):
+            yield number, line
+
+
+def _percentile(values, p):
+    return values[max(0, -(-len(values) * p // 100) - 1)] if values else None
+
+
+def run_batch(commands, process, sink=None, jobs=16):
+    """
+    Run commands concurrently and write their results to the sink in input order.
+
+    Args:
+        commands (iterable): (line number, text) pairs, e.g. from read_commands()
+        process (callable): Runs one command for a session, e.g. main.process_for; returns
+            (command, intent_router.IntentMatch, replies, URLs)
+        sink: StdoutSink, JSONSink or NullSink (default: NullSink)
+        jobs (int): Commands run at once
+
+    Returns:
+        dict: Commands, errors, seconds, commands per second, and per intent the count
+            and p50/p95/p99 latency in ms
+    """
+    sink = sink or NullSink()
+    local = threading.local()
+
+    def run(number, text):
+        # One session per worker thread: replies are collected on it and taken after each command
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = sessions.ClientSession(f"batch-{threading.get_ident()}")
+        began = time.perf_counter()
+        try:
+            command, match, replies, opened = process(session, text)
+        except Exception as e:
+            return BatchResult(number, text, seconds=time.perf_counter() - began, error=str(e))
+        return BatchResult(number, text, command, match.intent, [reply.text for reply in replies], opened,
+                           time.perf_counter() - began)
+
+    latencies = {}
+    errors = 0
+    began = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=jobs, thread_name_prefix="viola-batch") as pool:
+        # A bounded window of commands in flight: order is kept without reading all of stdin first
+        window = deque()
+
+        def emit():
+            nonlocal errors
+            result = window.popleft().result()
+            sink.write(result)
+            if result.error is not None:
+                errors += 1
+            latencies.setdefault(result.intent or "error", []).append(result.seconds * 1000)
+
+        for number, text in commands:
+            window.append(pool.submit(run, number, text))
+            if len(window) >= jobs * 4:
+                emit()
+        while window:
+            emit()
+    elapsed = time.perf_counter() - began
+    sink.close()
+
+    total = sum(len(values) for values in latencies.values())
+    intents = {}
+    for intent, values in sorted(latencies.items()):
+        values.sort()
+        intents[intent] = {"count": len(values)}
+        for p in PERCENTILES:
+            intents[intent][f"p{p}"] = _percentile(values, p)
+    return {
+        "commands": total,
+        "errors": errors,
+        "seconds": elapsed,
+        "commands_per_sec": total / elapsed if elapsed else 0.0,
+        "intents": intents,
+    }
+
+
+def format_summary(summary):
+    """The summary as a printable table."""
+    lines = [
+        f"Batch: {summary['commands']} commands in {summary['seconds']:.2f}s "
+        f"({summary['commands_per_sec']:.0f}/s), {summary['errors']} errors",
+        f"{'intent':<16} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+    ]
+    for intent, stats in summary["intents"].items():
+        lines.append(f"{intent:<16} {stats['count']:>7} {stats['p50']:>9.2f} {stats['p95']:>9.2f} {stats['p99']:>9.2f}")
+    return "\n".join(lines)
@@ -0,0 +1,138 @@
+"""
+Knowledge index benchmark for Viola
+
+Builds an index from a synthetic corpus of made-up articles (titles of one
+to three words, bodies of 25-40 words drawn from a skewed vocabulary, so
+some words are as common as "city" or "river" are in Wikipedia), then
+measures how long opening it takes and the latency of questions answered
+by title, questions answered by full text, and questions the index does
+not know.
+
+Usage:
+    python benchmarks/knowledge_index_benchmark.py [--docs 1000000] [--queries 2000] [--keep index.sqlite3]
+"""
+
+import argparse
+import itertools
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import knowledge_index
+
+CONSONANTS = "bcdfghjklmnprstvwz"
+VOWELS = "aeiou"
+
+
+def make_words(count, rng):
+    """Pronounceable made-up words, none of them a stopword."""
+    words = set()
+    while len(words) < count:
+        syllables = rng.randint(2, 3)
+        words.add("".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) + rng.choice(["", "", "n", "r", "s"])
+                          for _ in range(syllables)))
+    return sorted(words)
+
+
+class Corpus:
+    """
+    Deterministic synthetic articles.
+
+    Args:
+        docs (int): Articles generated
+        sample (int): Articles kept aside (in `sampled`) while generating, to ask about
+    """
+
+    def __init__(self, docs, sample, seed=5):
+        self.docs = docs
+        self.rng = random.Random(seed)
+        self.vocabulary = make_words(60000, self.rng)
+        # Zipf-like weights: the first words are very common, the tail is rare
+        self.cumulative = list(itertools.accumulate(1 / (rank + 10) for rank in range(len(self.vocabulary))))
+        self.wanted = set(self.rng.sample(range(docs), min(sample, docs)))
+        self.sampled = []
+
+    def __iter__(self):
+        rng, vocabulary, cumulative = self.rng, self.vocabulary, self.cumulative
+        for i in range(self.docs):
+            title = " ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 3))).title()
+            body = " ".join(rng.choices(vocabulary, cum_weights=cumulative, k=rng.randint(25, 40)))
+            document = (title, f"{title} is a {body}.")
+            if i in self.wanted:
+                self.sampled.append(document)
+            yield document
+
+
+def time_queries(index, queries):
+    latencies, correct = [], 0
+    for question, expected in queries:
+        began = time.perf_counter()
+        found = index.answer(question)
+        latencies.append((time.perf_counter() - began) * 1000)
+        if (found.title if found is not None else None) == expected:
+            correct += 1
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[max(0, -(-len(latencies) * 95 // 100) - 1)],
+        "p99": latencies[max(0, -(-len(latencies) * 99 // 100) - 1)],
+        "correct": correct / len(queries),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the offline knowledge index on a synthetic corpus")
+    parser.add_argument("--docs", type=int, default=1000000)
+    parser.add_argument("--queries", type=int, default=2000)
+    parser.add_argument("--keep", metavar="FILE", help="Write the index here and keep it (default: a temp file)")
+    args = parser.parse_args(argv)
+
+    corpus = Corpus(args.docs, args.queries)
+    rng = random.Random(17)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.keep or os.path.join(directory, "knowledge.sqlite3")
+
+        def progress(written):
+            print(f"\rBuilding: {written} documents", end="", file=sys.stderr, flush=True)
+
+        built = knowledge_index.build(corpus, path, progress=progress)
+        print(file=sys.stderr)
+        sample = corpus.sampled
+
+        began = time.perf_counter()
+        index = knowledge_index.KnowledgeIndex(path)
+        opened = (time.perf_counter() - began) * 1000
+
+        print(f"Knowledge index benchmark: {built['documents']} documents, {built['size_mb']:.0f} MB")
+        print("=" * 60)
+        print(f"Build        : {built['seconds']:.1f}s ({built['documents'] / built['seconds']:.0f} documents/s)")
+        print(f"Open (mmap)  : {opened:.2f} ms")
+
+        kinds = {
+            # "what is xyz" where xyz is an article title
+            "title": [(f"what is {title}", title) for title, _ in sample],
+            # "what is the <word from the article> of <title>"
+            "full text": [(f"what is the {rng.choice(text.split()[-10:]).strip('.')} of {title}", title)
+                          for title, text in sample],
+            # Common words that occur together in many bodies. Synthetic titles come from the same
+            # vocabulary, so some of these do name an article containing the rest (counted as wrong)
+            "miss": [(f"why is the {' '.join(rng.choice(corpus.vocabulary[:200]) for _ in range(2))} "
+                      f"{rng.choice(corpus.vocabulary[:50])}", None) for _ in sample],
+        }
+        print(f"{'question':<12} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'correct':>8}")
+        for kind, queries in kinds.items():
+            result = time_queries(index, queries)
+            print(f"{kind:<12} {result['p50']:8.3f} {result['p95']:8.3f} {result['p99']:8.3f} "
+                  f"{result['correct']:>8.0%}")
+        index.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+"""
+Music index benchmark for Viola
+
+Writes a synthetic catalog of made-up song titles, loads and indexes it,
+then measures lookup latency for exact, re-spaced, misspelled and
+sound-alike queries, plus the memory the index takes.
+
+Usage:
+    python benchmarks/music_index_benchmark.py [--songs 100000] [--format json|csv|sqlite] [--queries 2000]
+"""
+
+import argparse
+import csv
+import json
+import os
+import random
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import music_index
+
+CONSONANTS = "bcdfghjklmnprstvwz"
+VOWELS = "aeiou"
+
+
+def make_words(count, rng):
+    """Pronounceable made-up words, like names and lyrics in real titles."""
+    words = set()
+    while len(words) < count:
+        syllables = rng.randint(1, 3)
+        words.add("".join(rng.choice(CONSONANTS) + rng.choice(VOWELS) + rng.choice(["", "", "n", "r", "s"])
+                          for _ in range(syllables)))
+    return sorted(words)
+
+
+def make_titles(count, seed=3):
+    """Unique made-up titles of one to four words from a 20k word vocabulary."""
+    rng = random.Random(seed)
+    vocabulary = make_words(20000, rng)
+    titles = set()
+    while len(titles) < count:
+        titles.add(" ".join(rng.choice(vocabulary) for _ in range(rng.randint(1, 4))).title())
+    return sorted(titles)
+
+
+def write_catalog(titles, directory, fmt):
+    songs = [(title, "https://example.com/watch?v=" + title.replace(" ", "+")) for title in titles]
+    if fmt == "json":
+        path = os.path.join(directory, "catalog.json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump([{"title": title, "link": link} for title, link in songs], f)
+    elif fmt == "csv":
+        path = os.path.join(directory, "catalog.csv")
+        with open(path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["title", "link"])
+            writer.writerows(songs)
+    else:
+        path = os.path.join(directory, "catalog.sqlite3")
+        connection = sqlite3.connect(path)
+        connection.execute("DROP TABLE IF EXISTS songs")
+        connection.execute("CREATE TABLE songs (title TEXT, link TEXT)")
+        connection.executemany("INSERT INTO songs VALUES (?, ?)", songs)
+        connection.commit()
+        connection.close()
+    return path
+
+
+def misspell(title, rng):
+    """Replace one vowel, the typical speech recognition slip."""
+    positions = [i for i, c in enumerate(title) if c.lower() in VOWELS]
+    if not positions:
+        return title
+    i = rng.choice(positions)
+    return title[:i] + rng.choice([v for v in VOWELS if v != title[i].lower()]) + title[i + 1:]
+
+
+def respace(title, rng):
+    compact = title.replace(" ", "")
+    i = rng.randint(1, max(1, len(compact) - 1))
+    return compact[:i] + " " + compact[i:]
+
+
+def time_queries(index, queries):
+    latencies, hits = [], 0
+    for query, expected in queries:
+        began = time.perf_counter()
+        match = index.find(query)
+        latencies.append((time.perf_counter() - began) * 1000)
+        if match is not None and match.title == expected:
+            hits += 1
+    latencies.sort()
+    return {
+        "p50": statistics.median(latencies),
+        "p95": latencies[int(len(latencies) * 0.95) - 1],
+        "max": latencies[-1],
+        "accuracy": hits / len(queries),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the fuzzy music index on a synthetic catalog")
+    parser.add_argument("--songs", type=int, default=100000)
+    parser.add_argument("--format", choices=["json", "csv", "sqlite"], default="json")
+    parser.add_argument("--queries", type=int, default=2000)
+    args = parser.parse_args(argv)
+
+    titles = make_titles(args.songs)
+    rng = random.Random(11)
+    sample = rng.sample(titles, min(args.queries, len(titles)))
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_catalog(titles, directory, args.format)
+        print(f"Music index benchmark: {len(titles)} titles from {os.path.basename(path)} "
+              f"({os.path.getsize(path) / 1e6:.1f} MB)")
+        print("=" * 60)
+
+        began = time.perf_counter()
+        songs = music_index.load_catalog(path)
+        loaded = time.perf_counter() - began
+
+        # Hot reload: replace 1% of the catalog and apply only the difference
+        watcher = music_index.CatalogWatcher(music_index.MusicIndex(), path)
+        watcher.reload()
+        replaced = max(1, len(titles) // 100)
+        write_catalog(titles[replaced:] + [f"New Song {i}" for i in range(replaced)], directory, args.format)
+        reloaded = watcher.reload()
+
+        began = time.perf_counter()
+        index = music_index.MusicIndex()
+        index.update(songs)
+        built = time.perf_counter() - began
+
+        # Build again under tracemalloc (which slows it down) to measure memory
+        tracemalloc.start()
+        measured = music_index.MusicIndex()
+        measured.update(songs)
+        memory, _ = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        del measured
+
+    print(f"Load catalog : {loaded * 1000:.0f} ms")
+    print(f"Hot reload   : {watcher.last_reload_ms:.0f} ms for +{reloaded['added']} "
+          f"-{reloaded['removed']} (re-read and diff, no rebuild)")
+    print(f"Build index  : {built * 1000:.0f} ms, {memory / 1e6:.1f} MB, {index.stats()['words']} distinct words")
+    print(f"{'query kind':<12} {'p50 ms':>8} {'p95 ms':>8} {'max ms':>8} {'found':>7}")
+    kinds = {
+        "exact": [(title, title) for title in sample],
+        "respaced": [(respace(title, rng), title) for title in sample],
+        "misspelled": [(misspell(title, rng), title) for title in sample],
+        "missing": [(f"qx{i} zzyzx", None) for i in range(len(sample))],
+    }
+    for kind, queries in kinds.items():
+        result = time_queries(index, queries)
+        found = f"{result['accuracy']:.0%}" if kind != "missing" else "-"
+        print(f"{kind:<12} {result['p50']:8.3f} {result['p95']:8.3f} {result['max']:8.3f} {found:>7}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
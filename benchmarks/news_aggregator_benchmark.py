@@ -0,0 +1,113 @@
+"""
+News aggregation benchmark for Viola
+
+Serves several NewsAPI feeds from a local stub server, each with its own
+latency, and compares fetching them one after another with the parallel
+aggregator. The aggregated latency should stay close to the slowest single
+feed rather than the sum of all of them.
+
+Usage:
+    python benchmarks/news_aggregator_benchmark.py [--feeds 6] [--articles 20] [--rounds 5]
+"""
+
+import argparse
+import os
+import random
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client
+import newsLibrary
+import news_aggregator
+from stub_server import StubServer, newsapi_route
+
+WORDS = ("india monsoon cricket election budget market startup court rail metro space mission "
+         "rupee policy farmers exports summit festival rainfall tech").split()
+OUTLETS = ["NDTV", "The Hindu", "Mint", "Times of India", "Indian Express"]
+
+
+def make_corpus(feeds, articles, overlap, seed=7):
+    """
+    Random headlines per feed; `overlap` of each feed's articles are reworded copies of shared stories.
+
+    Returns:
+        dict: feed name -> list of (title, source) pairs
+    """
+    rng = random.Random(seed)
+    shared = [" ".join(rng.choice(WORDS) for _ in range(8)).capitalize() for _ in range(articles)]
+    corpus = {}
+    for f in range(feeds):
+        items = []
+        for i in range(articles):
+            if rng.random() < overlap:
+                title = rng.choice(shared)
+                # Reword slightly, the way different outlets title the same story
+                title = title.replace(" ", "  ", 1) + rng.choice(["", "!", " - report", " today"])
+            else:
+                title = " ".join(rng.choice(WORDS) for _ in range(8)).capitalize() + f" {f}-{i}"
+            items.append((title, rng.choice(OUTLETS)))
+        corpus[f"feed{f}"] = items
+    return corpus
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark parallel news aggregation against a stub NewsAPI")
+    parser.add_argument("--feeds", type=int, default=6, help="Number of feeds (categories)")
+    parser.add_argument("--articles", type=int, default=20, help="Articles per feed")
+    parser.add_argument("--overlap", type=float, default=0.4, help="Share of articles duplicated across feeds")
+    parser.add_argument("--min-delay", type=float, default=0.05, help="Fastest feed latency in seconds")
+    parser.add_argument("--max-delay", type=float, default=0.4, help="Slowest feed latency in seconds")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args(argv)
+
+    corpus = make_corpus(args.feeds, args.articles, args.overlap)
+    step = (args.max_delay - args.min_delay) / max(1, args.feeds - 1)
+    delays = {f"feed{f}": args.min_delay + f * step for f in range(args.feeds)}
+    feeds = [news_aggregator.NewsFeed(name, "top-headlines", {"category": name, "pageSize": args.articles})
+             for name in corpus]
+    route = newsapi_route(lambda params: corpus[params["category"]],
+                          delay=lambda params: delays[params["category"]])
+
+    newsLibrary.NEWS_API_KEY = "stub-key-1234567890"
+    print(f"News aggregation benchmark: {args.feeds} feeds x {args.articles} articles, "
+          f"latency {args.min_delay * 1000:.0f}-{args.max_delay * 1000:.0f} ms")
+    print("=" * 60)
+
+    with StubServer({"/top-headlines": route}) as server, http_client.override_endpoint("newsapi", server.url):
+        aggregator = news_aggregator.NewsAggregator(feeds)
+        http_client.prewarm(["newsapi"], wait=True)
+
+        sequential, slowest, parallel, merge_ms = [], [], [], []
+        for _ in range(args.rounds):
+            began = time.perf_counter()
+            results = [(feed, aggregator.fetch_feed(feed)) for feed in feeds]
+            sequential.append(time.perf_counter() - began)
+            slowest.append(aggregator.stats()["slowest_s"])
+
+            began = time.perf_counter()
+            stories = aggregator.stories()
+            parallel.append(time.perf_counter() - began)
+
+            began = time.perf_counter()
+            aggregator.merge(results)
+            merge_ms.append((time.perf_counter() - began) * 1000)
+        errors = aggregator.stats()["failures"]
+
+    slowest = statistics.median(slowest)
+    total = sum(len(items) for items in corpus.values())
+    print(f"Slowest single feed   : {slowest * 1000:.0f} ms (median, measured alone)")
+    print(f"Sequential fetch      : {statistics.median(sequential) * 1000:.0f} ms (median)")
+    print(f"Parallel aggregate    : {statistics.median(parallel) * 1000:.0f} ms (median, incl. merge)")
+    print(f"Dedup + rank (all)    : {statistics.median(merge_ms):.1f} ms (overlaps the downloads when parallel)")
+    print(f"Stories               : {len(stories)} unique of {total} articles, {errors} feed errors")
+    print(f"Top story             : {stories[0].title!r} ({len(stories[0].feeds)} feeds)")
+    overhead = statistics.median(parallel) - slowest
+    print(f"Overhead over slowest : {overhead * 1000:.0f} ms")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,131 @@
+"""
+Load generator for the Viola server
+
+Opens many concurrent sessions, each on its own keep-alive connection, and
+has every session send a mix of commands (time, name, questions, distances,
+news, music, sites). Reports throughput, client-side latency percentiles and
+errors, plus the server's own counters.
+
+By default the server runs in this process against the replay stubs (no
+network, no audio device); --url points it at a server started separately
+with `python server.py`.
+
+Usage:
+    python benchmarks/server_load.py [--sessions 300] [--commands 10] [--http-delay 0.05]
+    python benchmarks/server_load.py --url http://127.0.0.1:8765/
+"""
+
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import sys
+import time
+from urllib.parse import urlsplit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay
+import server
+
+COMMANDS = [
+    "what is the time",
+    "who are you",
+    "what is the capital of france",
+    "how far is delhi from mumbai",
+    "what is the taj mahal",
+    "tell me the news",
+    "play virtual",
+    "open youtube",
+]
+
+
+async def request(reader, writer, host, method, path, payload=None):
+    body = b"" if payload is None else json.dumps(payload).encode("utf-8")
+    writer.write((f"{method} {path} HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n"
+                  f"Content-Length: {len(body)}\r\n\r\n").encode("latin-1") + body)
+    await writer.drain()
+    status = int((await reader.readline()).split()[1])
+    length = 0
+    while True:
+        line = await reader.readline()
+        if line in (b"\r\n", b""):
+            break
+        name, _, value = line.decode("latin-1").partition(":")
+        if name.strip().lower() == "content-length":
+            length = int(value)
+    return status, json.loads(await reader.readexactly(length))
+
+
+async def run_session(number, url, commands, think, rng, latencies, errors):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    try:
+        for _ in range(commands):
+            if think:
+                await asyncio.sleep(rng.uniform(0, 2 * think))
+            began = time.perf_counter()
+            status, reply = await request(reader, writer, parts.netloc, "POST", f"/sessions/room-{number}/command",
+                                          {"text": rng.choice(COMMANDS)})
+            latencies.append((time.perf_counter() - began) * 1000)
+            if status != 200 or not reply.get("replies"):
+                errors.append(reply)
+    finally:
+        writer.close()
+
+
+async def load(url, sessions, commands, think, seed):
+    rng = random.Random(seed)
+    latencies, errors = [], []
+    began = time.perf_counter()
+    await asyncio.gather(*(run_session(n, url, commands, think, random.Random(rng.random()), latencies, errors)
+                           for n in range(sessions)))
+    elapsed = time.perf_counter() - began
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port)
+    _, stats = await request(reader, writer, parts.netloc, "GET", "/stats")
+    writer.close()
+    return latencies, errors, elapsed, stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Concurrent sessions against the Viola server")
+    parser.add_argument("--url", help="Server to load (default: start one in-process against the stubs)")
+    parser.add_argument("--sessions", type=int, default=300)
+    parser.add_argument("--commands", type=int, default=10, help="Commands per session")
+    parser.add_argument("--think", type=float, default=0.0, help="Average seconds between a session's commands")
+    parser.add_argument("--http-delay", type=float, default=0.05, help="Stub DuckDuckGo/NewsAPI latency")
+    parser.add_argument("--workers", type=int, default=64)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args(argv)
+
+    with contextlib.ExitStack() as stack:
+        url = args.url
+        if url is None:
+            stack.enter_context(replay.ReplayEnvironment(http_delay=args.http_delay))
+            url = stack.enter_context(server.ViolaServer(port=0, workers=args.workers)).url
+            stack.enter_context(contextlib.redirect_stdout(io.StringIO()))
+        latencies, errors, elapsed, stats = asyncio.run(load(url, args.sessions, args.commands, args.think, args.seed))
+
+    latencies.sort()
+
+    def percentile(p):
+        return latencies[max(0, -(-len(latencies) * p // 100) - 1)]
+
+    print(f"Viola server load: {args.sessions} sessions x {args.commands} commands against {url}")
+    print("=" * 60)
+    print(f"Commands     : {len(latencies)} in {elapsed:.2f}s ({len(latencies) / elapsed:.0f}/s)")
+    print(f"Latency      : p50 {percentile(50):.1f} ms, p95 {percentile(95):.1f} ms, p99 {percentile(99):.1f} ms")
+    print(f"Errors       : {len(errors)}")
+    print(f"Server       : {stats['commands']} commands, {stats['sessions']['active']} sessions, "
+          f"p95 {stats['latency_ms']['p95']:.1f} ms inside the server")
+    cache = stats["search_cache"]
+    print(f"Search cache : {cache['hits']} hits, {cache['coalesced']} joined in flight, {cache['misses']} misses")
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
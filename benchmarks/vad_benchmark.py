@@ -0,0 +1,117 @@
+"""
+Voice activity detection benchmark for Viola
+
+Writes a synthetic session (voiced bursts over background noise, with short
+clicks in between), or takes a recorded WAV file, and captures it twice:
+with the recognizer's energy threshold and pause_threshold, and with the VAD.
+Reports how much audio each would upload to speech-to-text and how long
+after the speech ends the VAD closes each phrase (the recognizer always
+waits pause_threshold).
+
+Usage:
+    python benchmarks/vad_benchmark.py [--utterances 30] [--wav session.wav] [--end-silence 0.3]
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import struct
+import sys
+import tempfile
+import wave
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+import audio_capture
+import vad
+import wake_word
+
+SAMPLE_RATE = 16000
+
+
+def write_session(path, utterances, seed=5):
+    """Voiced bursts of 0.4-2 s separated by 1-2 s of noise, with a click in every other gap."""
+    rng = random.Random(seed)
+    frames = bytearray()
+
+    def noise(seconds):
+        for _ in range(int(SAMPLE_RATE * seconds)):
+            frames.extend(struct.pack("<h", int(rng.gauss(0, 60))))
+
+    noise(1.0)
+    for n in range(utterances):
+        for i in range(int(SAMPLE_RATE * rng.uniform(0.4, 2.0))):
+            # Amplitude wobbles like syllables
+            envelope = 0.6 + 0.4 * math.sin(2 * math.pi * 4 * i / SAMPLE_RATE)
+            value = envelope * 6000 * math.sin(2 * math.pi * 180 * i / SAMPLE_RATE) + rng.gauss(0, 60)
+            frames.extend(struct.pack("<h", int(value)))
+        noise(rng.uniform(0.5, 1.0))
+        if n % 2:
+            for i in range(int(SAMPLE_RATE * 0.05)):
+                frames.extend(struct.pack("<h", int(8000 * math.sin(2 * math.pi * 1000 * i / SAMPLE_RATE))))
+        noise(rng.uniform(0.5, 1.0))
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(bytes(frames))
+
+
+def capture(path, listener=None):
+    session = audio_capture.CaptureSession(source_factory=lambda: sr.AudioFile(path), vad=listener,
+                                           buffer_size=1000)
+    session.start()
+    phrases = []
+    try:
+        while True:
+            phrases.append(session.get(timeout=10))
+    except sr.WaitTimeoutError:
+        pass
+    session.stop()
+    return phrases
+
+
+def summarize(name, phrases):
+    uploaded = sum(len(audio.frame_data) for audio in phrases)
+    seconds = [wake_word.audio_seconds(audio) for audio in phrases] or [0.0]
+    print(f"{name:<22} {len(phrases):>7} {uploaded / 1024:>10.0f} {statistics.median(seconds):>12.2f}")
+    return uploaded
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare energy/pause_threshold capture with VAD capture")
+    parser.add_argument("--utterances", type=int, default=30)
+    parser.add_argument("--wav", help="Recorded 16-bit mono session to use instead of synthetic audio")
+    parser.add_argument("--end-silence", type=float, default=0.3)
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = args.wav
+        if path is None:
+            path = os.path.join(directory, "session.wav")
+            write_session(path, args.utterances)
+        with wave.open(path, "rb") as f:
+            seconds = f.getnframes() / f.getframerate()
+        print(f"VAD benchmark: {seconds:.0f}s of audio from {os.path.basename(path)}")
+        print("=" * 60)
+
+        baseline = capture(path)
+        listener = vad.VADListener(end_silence=args.end_silence)
+        trimmed = capture(path, listener)
+
+    print(f"{'capture':<22} {'phrases':>7} {'upload KB':>10} {'phrase s p50':>12}")
+    before = summarize("energy + pause 0.5s", baseline)
+    after = summarize(f"vad ({listener.classifier.name})", trimmed)
+    stats = listener.stats()
+    print(f"Upload saved          : {(before - after) / before:.0%} against the energy threshold" if before else "")
+    print(f"Noise segments dropped: {stats['segments_dropped']}")
+    print(f"End of speech         : p50 {stats['end_of_speech_p50_ms']:.0f} ms, "
+          f"p95 {stats['end_of_speech_p95_ms']:.0f} ms (pause_threshold {stats['pause_threshold_ms']:.0f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Wake word benchmark for Viola
+
+Runs recorded WAV fixtures through the wake word stage and reports the
+false-accept rate, false-reject rate and CPU time per second of audio.
+
+Fixture layout:
+    fixtures/positive/*.wav   - recordings that contain "Viola"
+    fixtures/negative/*.wav   - background chatter, TV, other words
+
+Usage:
+    python benchmarks/wake_word_benchmark.py fixtures/ [--detector sphinx|cloud] [--no-gate]
+"""
+
+import argparse
+import glob
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+import wake_word
+
+
+def load_fixtures(directory):
+    """Load every WAV file in a directory as AudioData."""
+    clips = []
+    for path in sorted(glob.glob(os.path.join(directory, "*.wav"))):
+        with sr.AudioFile(path) as source:
+            clips.append((os.path.basename(path), sr.Recognizer().record(source)))
+    return clips
+
+
+def build_stage(detector_name, use_gate):
+    recognizer = sr.Recognizer()
+    if detector_name == "sphinx":
+        detector = wake_word.SphinxKeywordDetector(recognizer=recognizer)
+    else:
+        detector = wake_word.CloudWakeWord(recognizer.recognize_google)
+    gate = wake_word.EnergyGate() if use_gate else None
+    return wake_word.WakeWordStage(detector, gate=gate)
+
+
+def run(stage, positives, negatives, verbose=False):
+    """
+    Score a stage on labelled fixtures.
+
+    Returns:
+        dict: false_accept_rate, false_reject_rate, cpu_per_audio_second and wall time
+    """
+    false_rejects = 0
+    false_accepts = 0
+    began = time.perf_counter()
+    for label, clips in (("positive", positives), ("negative", negatives)):
+        for name, audio in clips:
+            result = stage.check(audio)
+            wrong = (label == "positive" and not result) or (label == "negative" and result)
+            if label == "positive" and not result:
+                false_rejects += 1
+            if label == "negative" and result:
+                false_accepts += 1
+            if verbose:
+                print(f"  {'✗' if wrong else '✓'} {label:8} {name} ({result.stage})")
+    stats = stage.stats()
+    return {
+        "false_accept_rate": false_accepts / len(negatives) if negatives else 0.0,
+        "false_reject_rate": false_rejects / len(positives) if positives else 0.0,
+        "cpu_per_audio_second": stats["cpu_per_audio_second"],
+        "gated_out": stats["gated_out"],
+        "wall_seconds": time.perf_counter() - began,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the Viola wake word stage on WAV fixtures")
+    parser.add_argument("fixtures", help="Directory with positive/ and negative/ subdirectories")
+    parser.add_argument("--detector", choices=["sphinx", "cloud"], default="sphinx")
+    parser.add_argument("--no-gate", action="store_true", help="Disable the energy gate")
+    parser.add_argument("-v", "--verbose", action="store_true")
+    args = parser.parse_args(argv)
+
+    positives = load_fixtures(os.path.join(args.fixtures, "positive"))
+    negatives = load_fixtures(os.path.join(args.fixtures, "negative"))
+    if not positives and not negatives:
+        print(f"No WAV fixtures found under {args.fixtures}")
+        return 1
+
+    stage = build_stage(args.detector, not args.no_gate)
+    print(f"Wake word benchmark: {len(positives)} positive, {len(negatives)} negative clips, "
+          f"detector={stage.detector.name}, gate={'off' if args.no_gate else 'on'}")
+    print("=" * 60)
+    results = run(stage, positives, negatives, verbose=args.verbose)
+    print(f"False accept rate : {results['false_accept_rate']:.1%}")
+    print(f"False reject rate : {results['false_reject_rate']:.1%}")
+    print(f"CPU per audio sec : {results['cpu_per_audio_second'] * 1000:.1f} ms")
+    print(f"Gated out         : {results['gated_out']}")
+    print(f"Wall time         : {results['wall_seconds']:.2f} s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
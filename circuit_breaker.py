@@ -0,0 +1,198 @@
+"""
+Circuit breakers and adaptive timeouts for Viola's network calls
+
+Every endpoint in http_client has a CircuitBreaker and an AdaptiveTimeout.
+
+The breaker opens after several failures in a row (timeouts, connection
+errors, 5xx answers). While it is open, requests fail at once with
+CircuitOpenError instead of waiting for a timeout, and callers answer from
+their caches or with a short "not responding" message. After a cooldown one
+request is let through as a probe (half-open): if it succeeds the breaker
+closes, and if it fails the breaker opens again with a longer cooldown.
+
+The read timeout follows the latency the endpoint has actually shown: a
+multiple of the recent p95, kept between a floor and the endpoint's
+configured timeout. Timed-out requests count as samples at the timeout, so
+a service that got uniformly slower pulls the timeout back up.
+
+Settings:
+  VIOLA_BREAKER_FAILURES - failures in a row that open a breaker (default: 5)
+  VIOLA_BREAKER_COOLDOWN - seconds before the first probe (default: 30, doubling up to 5 minutes)
+  VIOLA_ADAPTIVE_TIMEOUT - 0 keeps the fixed timeouts (default: 1)
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+import requests
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(requests.exceptions.ConnectionError):
+    """A request was refused without being sent because the endpoint's breaker is open."""
+
+
+class CircuitBreaker:
+    """
+    Fails fast for an endpoint that keeps failing.
+
+    Args:
+        name (str): Endpoint name (for messages)
+        failure_threshold (int): Failures in a row that open the breaker
+        cooldown (float): Seconds open before a probe is allowed
+        max_cooldown (float): Cooldown limit when probes keep failing (it doubles each time)
+        clock (callable): Time source, replaceable in tests
+    """
+
+    def __init__(self, name, failure_threshold=None, cooldown=None, max_cooldown=300.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold or int(os.getenv("VIOLA_BREAKER_FAILURES", 5))
+        self.cooldown = cooldown or float(os.getenv("VIOLA_BREAKER_COOLDOWN", 30))
+        self.max_cooldown = max(max_cooldown, self.cooldown)
+        self.clock = clock
+        self.state = CLOSED
+        self.failures = 0        # in a row
+        self.opened = 0          # times the breaker opened
+        self.rejected = 0        # requests refused while open
+        self.probes = 0
+        self._opened_at = 0.0
+        self._current_cooldown = self.cooldown
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self):
+        """
+        Ask to send a request. Must be followed by success() or failure() when it returns.
+
+        Raises:
+            CircuitOpenError: If the breaker is open, or half-open with a probe already out
+        """
+        with self._lock:
+            if self.state == OPEN and self.clock() - self._opened_at >= self._current_cooldown:
+                self.state = HALF_OPEN
+            if self.state == CLOSED:
+                return
+            if self.state == HALF_OPEN and not self._probing:
+                self._probing = True
+                self.probes += 1
+                return
+            self.rejected += 1
+            retry_in = max(0.0, self._opened_at + self._current_cooldown - self.clock())
+        raise CircuitOpenError(f"{self.name} is not responding (circuit open, next try in {retry_in:.0f}s)")
+
+    def success(self):
+        with self._lock:
+            self.failures = 0
+            self._probing = False
+            if self.state != CLOSED:
+                self.state = CLOSED
+                self._current_cooldown = self.cooldown
+
+    def failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.state == HALF_OPEN:
+                # The probe failed: back off further before the next one
+                self._probing = False
+                self._current_cooldown = min(self._current_cooldown * 2, self.max_cooldown)
+                self._open()
+            elif self.state == CLOSED and self.failures >= self.failure_threshold:
+                self._open()
+
+    def _open(self):
+        self.state = OPEN
+        self.opened += 1
+        self._opened_at = self.clock()
+
+    def is_open(self):
+        """Whether requests would be refused right now (without claiming the probe)."""
+        with self._lock:
+            if self.state == OPEN:
+                return self.clock() - self._opened_at < self._current_cooldown
+            return self.state == HALF_OPEN and self._probing
+
+    def reset(self):
+        with self._lock:
+            self.state = CLOSED
+            self.failures = 0
+            self._probing = False
+            self._current_cooldown = self.cooldown
+
+    def stats(self):
+        with self._lock:
+            return {
+                "state": self.state,
+                "failures": self.failures,
+                "opened": self.opened,
+                "rejected": self.rejected,
+                "probes": self.probes,
+                "cooldown_s": self._current_cooldown,
+            }
+
+
+class AdaptiveTimeout:
+    """
+    A read timeout derived from recent latency.
+
+    Args:
+        maximum (float): The configured read timeout, never exceeded
+        minimum (float): Floor, so a run of fast answers cannot make it twitchy
+        factor (float): Multiple of the p95 latency allowed
+        min_samples (int): Samples needed before the timeout adapts
+        window (int): Recent samples kept
+    """
+
+    def __init__(self, maximum, minimum=1.5, factor=4.0, min_samples=20, window=200):
+        self.maximum = maximum
+        self.minimum = min(minimum, maximum)
+        self.factor = factor
+        self.min_samples = min_samples
+        self.enabled = os.getenv("VIOLA_ADAPTIVE_TIMEOUT", "1") != "0"
+        self.requests = 0
+        self.timeouts = 0
+        self._samples = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, seconds):
+        """Record how long a completed request took."""
+        with self._lock:
+            self.requests += 1
+            self._samples.append(seconds)
+
+    def record_timeout(self, timeout):
+        """Record a request that timed out after `timeout` seconds."""
+        with self._lock:
+            self.requests += 1
+            self.timeouts += 1
+            self._samples.append(timeout)
+
+    def percentile(self, p):
+        with self._lock:
+            values = sorted(self._samples)
+        return values[max(0, -(-len(values) * p // 100) - 1)] if values else None
+
+    @property
+    def value(self):
+        """The read timeout to use for the next request, in seconds."""
+        if not self.enabled or len(self._samples) < self.min_samples:
+            return self.maximum
+        return min(self.maximum, max(self.minimum, self.percentile(95) * self.factor))
+
+    def reset(self):
+        with self._lock:
+            self._samples.clear()
+
+    def stats(self):
+        p50, p95 = self.percentile(50), self.percentile(95)
+        return {
+            "requests": self.requests,
+            "timeouts": self.timeouts,
+            "timeout_s": self.value,
+            "p50_ms": None if p50 is None else p50 * 1000,
+            "p95_ms": None if p95 is None else p95 * 1000,
+        }
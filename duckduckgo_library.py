@@ -2,51 +2,81 @@
 DuckDuckGo search helper - no API key required.
 
 Provides `web_search_summary(query)` which returns the instant answer or top result snippet.
+Answers are cached by normalized query (see `ttl_cache.TTLCache`):
+  VIOLA_SEARCH_CACHE_TTL - seconds an answer stays fresh (default: 6 hours)
+  VIOLA_SEARCH_CACHE_DB  - SQLite file to keep answers across restarts (default: memory only)
 """
+import os
+
 import requests
+from dotenv import load_dotenv
 
+import circuit_breaker
+import http_client
+import ttl_cache
 
-def web_search_summary(query: str) -> str:
-    """Return a web search result for `query` using DuckDuckGo's instant answer API.
-    
-    Returns the instant answer if available, otherwise returns top result info.
-    """
-    if not query:
-        return "No query provided."
+load_dotenv()
 
+cache = ttl_cache.TTLCache(
+    ttl=float(os.getenv("VIOLA_SEARCH_CACHE_TTL", 6 * 3600)),
+    db_path=os.getenv("VIOLA_SEARCH_CACHE_DB") or None,
+)
+
+
+def fetch_summary(query: str) -> str:
+    """Ask DuckDuckGo for `query` without the cache.
+
+    Raises requests.exceptions.RequestException if DuckDuckGo cannot be reached.
+    """
     # DuckDuckGo Instant Answer API (no authentication needed)
-    url = "https://api.duckduckgo.com/"
     params = {
         "q": query,
         "format": "json",
         "no_html": 1,
     }
 
+    r = http_client.get("duckduckgo", params=params)
+    r.raise_for_status()
+    data = r.json()
+
+    # Try to get instant answer first
+    instant_answer = data.get("Answer")
+    if instant_answer:
+        return instant_answer
+
+    # Try abstract (summary)
+    abstract = data.get("AbstractText")
+    if abstract:
+        return abstract
+
+    # Try to get first related topic
+    related = data.get("RelatedTopics")
+    if related and isinstance(related, list) and len(related) > 0:
+        first = related[0]
+        if isinstance(first, dict):
+            text = first.get("Text")
+            if text:
+                return text
+
+    return "No results found for that query."
+
+
+def web_search_summary(query: str) -> str:
+    """Return a web search result for `query` using DuckDuckGo's instant answer API.
+
+    Returns the instant answer if available, otherwise returns top result info.
+    Repeated queries are answered from the cache; if DuckDuckGo is unreachable
+    an expired cached answer is used when there is one. While DuckDuckGo keeps
+    failing (its circuit breaker is open) uncached queries get a short apology
+    at once instead of waiting for a timeout.
+    """
+    if not query:
+        return "No query provided."
+
     try:
-        r = requests.get(url, params=params, timeout=8)
-        r.raise_for_status()
-        data = r.json()
-
-        # Try to get instant answer first
-        instant_answer = data.get("Answer")
-        if instant_answer:
-            return instant_answer
-
-        # Try abstract (summary)
-        abstract = data.get("AbstractText")
-        if abstract:
-            return abstract
-
-        # Try to get first related topic
-        related = data.get("RelatedTopics")
-        if related and isinstance(related, list) and len(related) > 0:
-            first = related[0]
-            if isinstance(first, dict):
-                text = first.get("Text")
-                if text:
-                    return text
-
-        return "No results found for that query."
+        return cache.get_or_fetch(query, lambda: fetch_summary(query))
+    except circuit_breaker.CircuitOpenError:
+        return "DuckDuckGo isn't responding at the moment, so I can't look that up. Please try again in a minute."
     except requests.exceptions.RequestException as e:
         return f"Error contacting DuckDuckGo: {e}"
     except Exception as e:
@@ -0,0 +1,228 @@
+"""
+HTTP client for Viola
+One pooled requests.Session shared by every network library, with keep-alive,
+bounded retries with backoff and per-endpoint base URLs and timeouts.
+
+Each endpoint has a circuit breaker and an adaptive read timeout (see
+circuit_breaker): while a service is down, requests to it fail at once with
+circuit_breaker.CircuitOpenError instead of waiting out the timeout.
+
+Endpoint URLs can be pointed elsewhere (e.g. a local stub server in tests)
+with `override_endpoint()` or environment variables:
+  VIOLA_DUCKDUCKGO_URL - default https://api.duckduckgo.com/
+  VIOLA_NEWSAPI_URL    - default https://newsapi.org/v2/
+"""
+
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import MaxRetryError, ReadTimeoutError
+from urllib3.util.retry import Retry
+
+import circuit_breaker
+import tracing
+
+USER_AGENT = "Viola-Voice-Assistant"
+
+
+class Endpoint:
+    """
+    A remote service Viola talks to.
+
+    Args:
+        name (str): Short name used by callers ("duckduckgo", "newsapi")
+        base_url (str): URL that request paths are appended to
+        timeout (tuple): (connect, read) timeout in seconds; the read timeout is the
+            adaptive timeout's upper limit
+    """
+
+    def __init__(self, name, base_url, timeout):
+        self.name = name
+        self.base_url = base_url
+        self.timeout = timeout
+        self.breaker = circuit_breaker.CircuitBreaker(name)
+        self.latency = circuit_breaker.AdaptiveTimeout(timeout[1])
+
+    def current_timeout(self):
+        """The (connect, read) timeout for the next request."""
+        return self.timeout[0], self.latency.value
+
+    def stats(self):
+        return {**self.breaker.stats(), **self.latency.stats()}
+
+    def url(self, path=""):
+        if not path:
+            return self.base_url
+        return self.base_url.rstrip("/") + "/" + path.lstrip("/")
+
+
+ENDPOINTS = {
+    "duckduckgo": Endpoint("duckduckgo", os.getenv("VIOLA_DUCKDUCKGO_URL", "https://api.duckduckgo.com/"), (3.05, 8)),
+    "newsapi": Endpoint("newsapi", os.getenv("VIOLA_NEWSAPI_URL", "https://newsapi.org/v2/"), (3.05, 10)),
+}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def _build_session():
+    retry = Retry(
+        total=2,
+        connect=2,
+        read=0,  # a read timeout already cost the whole budget; retrying it would double the wait
+        backoff_factor=0.3,
+        status_forcelist=(500, 502, 503, 504),
+        allowed_methods=frozenset(["GET", "HEAD"]),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=8, pool_maxsize=32, max_retries=retry)
+    session = requests.Session()
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    session.headers["User-Agent"] = USER_AGENT
+    return session
+
+
+def get_session():
+    """Return the shared pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def get(endpoint, path="", params=None, timeout=None, **kwargs):
+    """
+    GET a path on a named endpoint through the shared session.
+
+    Args:
+        endpoint (str): Endpoint name from ENDPOINTS
+        path (str): Path relative to the endpoint's base URL
+        params (dict): Query string parameters
+        timeout: Overrides the endpoint's default (connect, read) timeout
+
+    Returns:
+        requests.Response: The response (status is not checked)
+
+    Raises:
+        circuit_breaker.CircuitOpenError: If the endpoint has been failing and is not
+            being retried yet (a requests ConnectionError, so callers handle it as one)
+    """
+    target = ENDPOINTS[endpoint]
+    with tracing.span("http:" + endpoint) as span:
+        try:
+            target.breaker.allow()
+        except circuit_breaker.CircuitOpenError:
+            span.set(circuit=circuit_breaker.OPEN)
+            raise
+        timeout = timeout or target.current_timeout()
+        began = time.perf_counter()
+        try:
+            response = get_session().get(target.url(path), params=params, timeout=timeout, **kwargs)
+        except Exception as e:
+            if _read_timed_out(e):
+                target.latency.record_timeout(timeout[1] if isinstance(timeout, tuple) else timeout)
+            target.breaker.failure()
+            raise
+        target.latency.record(time.perf_counter() - began)
+        # Server errors (after the retries) count against the service; 4xx are the caller's problem
+        if response.status_code >= 500:
+            target.breaker.failure()
+        else:
+            target.breaker.success()
+        span.set(status=response.status_code)
+    return response
+
+
+def _read_timed_out(error):
+    """Whether a request failed by waiting too long for the answer (also once the retries ran out)."""
+    if isinstance(error, requests.exceptions.ReadTimeout):
+        return True
+    reason = error.args[0] if isinstance(error, requests.exceptions.ConnectionError) and error.args else None
+    return isinstance(reason, MaxRetryError) and isinstance(reason.reason, ReadTimeoutError)
+
+
+def set_endpoint(name, base_url, timeout=None):
+    """Point an endpoint at a different base URL (and optionally timeout)."""
+    target = ENDPOINTS[name]
+    target.base_url = base_url
+    if timeout is not None:
+        target.timeout = timeout
+        target.latency.maximum = timeout[1]
+    # Failures and latency seen at the old address say nothing about the new one
+    target.breaker.reset()
+    target.latency.reset()
+
+
+@contextmanager
+def override_endpoint(name, base_url, timeout=None, breaker=None):
+    """
+    Temporarily point an endpoint elsewhere, e.g. at a stub server in a test.
+
+    The endpoint gets a fresh breaker (or `breaker`) and latency history for the
+    duration, and the originals are put back afterwards.
+    """
+    target = ENDPOINTS[name]
+    previous = (target.base_url, target.timeout, target.breaker, target.latency)
+    target.base_url = base_url
+    if timeout is not None:
+        target.timeout = timeout
+    target.breaker = breaker or circuit_breaker.CircuitBreaker(name)
+    target.latency = circuit_breaker.AdaptiveTimeout(target.timeout[1])
+    try:
+        yield target
+    finally:
+        target.base_url, target.timeout, target.breaker, target.latency = previous
+
+
+def is_open(name):
+    """Whether requests to an endpoint are currently refused by its circuit breaker."""
+    return ENDPOINTS[name].breaker.is_open()
+
+
+def stats():
+    """
+    Breaker state and latency per endpoint.
+
+    Returns:
+        dict: endpoint name -> state, failures in a row, times opened, requests refused,
+            probes, requests, timeouts, current read timeout and p50/p95 latency in ms
+    """
+    return {name: target.stats() for name, target in ENDPOINTS.items()}
+
+
+def prewarm(names=None, wait=False):
+    """
+    Open pooled connections (DNS, TCP and TLS) to endpoints ahead of the first real request.
+
+    Args:
+        names (list): Endpoint names to warm (default: all)
+        wait (bool): Block until every connection attempt finished
+
+    Returns:
+        list: The warming threads
+    """
+    session = get_session()
+
+    def warm(target):
+        try:
+            session.head(target.base_url, timeout=target.timeout, allow_redirects=False)
+        except requests.exceptions.RequestException:
+            # Warming is best effort; the real request will report the error
+            pass
+
+    threads = []
+    for name in names or list(ENDPOINTS):
+        thread = threading.Thread(target=warm, args=(ENDPOINTS[name],), name=f"viola-prewarm-{name}", daemon=True)
+        thread.start()
+        threads.append(thread)
+    if wait:
+        for thread in threads:
+            thread.join()
+    return threads
@@ -0,0 +1,202 @@
+"""
+Intent Router for Viola
+Commands register their patterns up front; all patterns are compiled into a
+single regular expression so one match call picks the handler.
+"""
+
+import bisect
+import re
+import threading
+import time
+
+import tracing
+
+# Upper bounds (microseconds) of the match-time histogram buckets
+HISTOGRAM_BUCKETS_US = [10, 25, 50, 100, 250, 500, 1000, 5000]
+
+_NAMED_GROUP = re.compile(r"\(\?P<(\w+)>")
+_NAMED_BACKREF = re.compile(r"\(\?P=(\w+)\)")
+
+
+class IntentMatch:
+    """
+    The result of routing a command.
+
+    Args:
+        intent (str): Name of the matched intent
+        command (str): The command text that was routed
+        groups (dict): Named groups captured by the intent's pattern
+        text (str): The part of the command the pattern matched
+    """
+
+    def __init__(self, intent, command, groups=None, text=""):
+        self.intent = intent
+        self.command = command
+        self.groups = groups or {}
+        self.text = text
+
+    def group(self, name, default=None):
+        value = self.groups.get(name)
+        return default if value is None else value
+
+    def __repr__(self):
+        return f"IntentMatch({self.intent!r}, {self.groups!r})"
+
+
+class Intent:
+    """A registered command: its patterns, handler and counters."""
+
+    def __init__(self, name, patterns, handler):
+        self.name = name
+        self.patterns = patterns
+        self.handler = handler
+        self.hits = 0
+        self.histogram = [0] * (len(HISTOGRAM_BUCKETS_US) + 1)
+
+
+class IntentRouter:
+    """
+    Registry of intents compiled into one alternation regex.
+
+    Intents are tried in registration order: the first registered intent whose
+    pattern occurs anywhere in the command wins, exactly like an if/elif chain,
+    but in a single regex call.
+
+    Args:
+        fallback (callable): Handler for commands no intent matched; called as fallback(match)
+    """
+
+    FALLBACK = "fallback"
+
+    def __init__(self, fallback=None):
+        self.intents = {}
+        self.fallback = fallback
+        self._fallback_intent = Intent(self.FALLBACK, [], fallback)
+        self._compiled = None
+        self._groups = {}
+        self._lock = threading.Lock()
+
+    def register(self, name, patterns, handler=None):
+        """
+        Register an intent. Usable directly or as a decorator.
+
+        Args:
+            name (str): Unique intent name
+            patterns (str or list): Regular expressions; named groups are passed to the handler
+            handler (callable): Called as handler(match) with an IntentMatch
+
+        Returns:
+            callable: The handler (so the method works as a decorator)
+        """
+        if isinstance(patterns, str):
+            patterns = [patterns]
+
+        def add(func):
+            with self._lock:
+                if name in self.intents or name == self.FALLBACK:
+                    raise ValueError(f"Intent '{name}' is already registered")
+                for pattern in patterns:
+                    re.compile(pattern)  # fail at registration, not on the first command
+                self.intents[name] = Intent(name, list(patterns), func)
+                self._compiled = None
+            return func
+
+        if handler is not None:
+            return add(handler)
+        return add
+
+    def unregister(self, name):
+        with self._lock:
+            del self.intents[name]
+            self._compiled = None
+
+    def set_fallback(self, handler):
+        self.fallback = handler
+        self._fallback_intent.handler = handler
+
+    def _compile(self):
+        """Build ^(?:.*?(?P<_0_0>p0)|.*?(?P<_0_1>p1)|...) over every pattern."""
+        alternatives = []
+        groups = {}
+        for i, intent in enumerate(self.intents.values()):
+            for j, pattern in enumerate(intent.patterns):
+                wrapper = f"_{i}_{j}"
+                prefix = wrapper + "__"
+                names = _NAMED_GROUP.findall(pattern)
+                body = _NAMED_GROUP.sub(lambda m: f"(?P<{prefix}{m.group(1)}>", pattern)
+                body = _NAMED_BACKREF.sub(lambda m: f"(?P={prefix}{m.group(1)})", body)
+                alternatives.append(f".*?(?P<{wrapper}>{body})")
+                groups[wrapper] = (intent, [(prefix + n, n) for n in names])
+        if not alternatives:
+            return re.compile(r"(?!)"), groups
+        return re.compile("^(?:" + "|".join(alternatives) + ")", re.DOTALL), groups
+
+    def match(self, command, record=True):
+        """
+        Find the intent for a command without running it.
+
+        Args:
+            command (str): The command text
+            record (bool): Count the match in stats() (off for guesses at partial transcripts)
+
+        Returns:
+            IntentMatch: The match (intent 'fallback' if nothing matched)
+        """
+        compiled = self._compiled
+        if compiled is None:
+            with self._lock:
+                if self._compiled is None:
+                    self._compiled, self._groups = self._compile()
+                compiled = self._compiled
+        groups_map = self._groups
+
+        began = time.perf_counter()
+        m = compiled.match(command)
+        elapsed_us = (time.perf_counter() - began) * 1e6
+
+        if m is None:
+            intent = self._fallback_intent
+            result = IntentMatch(self.FALLBACK, command, text=command)
+        else:
+            # The wrapper group closes last, so it is the one lastgroup reports
+            intent, names = groups_map[m.lastgroup]
+            result = IntentMatch(intent.name, command,
+                                 {short: m.group(full) for full, short in names},
+                                 m.group(m.lastgroup))
+
+        if record:
+            intent.hits += 1
+            intent.histogram[bisect.bisect_left(HISTOGRAM_BUCKETS_US, elapsed_us)] += 1
+        return result
+
+    def dispatch(self, command):
+        """
+        Route a command to its handler and run it.
+
+        Returns:
+            IntentMatch: The match that was handled
+        """
+        with tracing.span("intent") as span:
+            result = self.match(command)
+            span.set(intent=result.intent)
+        intent = self.intents.get(result.intent, self._fallback_intent)
+        if intent.handler is not None:
+            with tracing.span("skill:" + result.intent):
+                intent.handler(result)
+        return result
+
+    def stats(self):
+        """
+        Hit counters and match-time histograms.
+
+        Returns:
+            dict: intent name -> {"hits": int, "match_us_histogram": {bucket label: count}}
+        """
+        labels = [f"<={b}us" for b in HISTOGRAM_BUCKETS_US] + [f">{HISTOGRAM_BUCKETS_US[-1]}us"]
+        result = {}
+        for intent in list(self.intents.values()) + [self._fallback_intent]:
+            result[intent.name] = {
+                "hits": intent.hits,
+                "match_us_histogram": dict(zip(labels, intent.histogram)),
+            }
+        return result
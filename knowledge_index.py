@@ -0,0 +1,449 @@
+"""
+Knowledge Index for Viola
+An offline answer source searched before DuckDuckGo: a SQLite FTS5 index
+built from a corpus you supply, such as a Wikipedia abstracts dump or FAQ
+files.
+
+A question is answered locally when its subject is the title of a document
+("what is the taj mahal" -> "Taj Mahal"), or when the question names a
+document's title and the rest of its content words occur together in one
+sentence of that document ("what is the capital of france" -> "Its capital
+and largest city is Paris."), which is then the answer. Anything else is a
+miss and goes to DuckDuckGo; a wrong local answer is worse than a slower
+right one.
+
+The index is opened read-only and memory-mapped, so startup costs about a
+millisecond whatever its size and only the pages queries touch are read.
+
+Corpus formats (any of them may be gzipped):
+  .xml         - Wikipedia abstracts dump (enwiki-latest-abstract.xml)
+  .jsonl/.json - objects with title and text (or question and answer) fields
+  .csv         - header row with title and text (or question and answer) columns
+  .txt/.md     - FAQ blocks separated by blank lines: a question line, then its answer
+
+Build an index:
+    python knowledge_index.py build enwiki-latest-abstract.xml.gz faq.txt --output knowledge.sqlite3
+    python knowledge_index.py query knowledge.sqlite3 "who is ada lovelace"
+
+Configure with environment variables:
+  VIOLA_KNOWLEDGE_INDEX - index file (default: ~/.viola/knowledge.sqlite3 when it exists)
+"""
+
+import argparse
+import csv
+import gzip
+import io
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+import unicodedata
+import xml.etree.ElementTree as ElementTree
+
+DEFAULT_INDEX_FILE = os.path.join(os.path.expanduser("~"), ".viola", "knowledge.sqlite3")
+SCHEMA_VERSION = 1
+MAX_TITLE_WORDS = 6  # longest run of question words looked up as a title
+
+_WORD = re.compile(r"[a-z0-9]+")
+_QUESTION = re.compile(r"^(?:where|what|who|when|why|how)\b(?: (?:s|is|are|was|were|does|do|did)\b)?(?: (?:the|a|an)\b)? ?")
+STOPWORDS = frozenset("""
+    a an and are as at be by did do does for from how i in is it me of on or s tell the to was
+    were what when where which who why with you your about many much far
+""".split())
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_MARK, _UNMARK = "\x02", "\x03"  # highlight() delimiters around matched words
+
+_UNSET = object()
+_index = _UNSET
+_index_lock = threading.Lock()
+
+
+def words(text):
+    """Lowercase words of a text, accents and punctuation removed."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return _WORD.findall(text)
+
+
+def title_key(text):
+    """The form titles are looked up by: normalized words joined by spaces."""
+    return " ".join(words(text))
+
+
+def content_words(text):
+    """Words of a question that carry meaning (question words and the like dropped)."""
+    return [word for word in words(text) if word not in STOPWORDS]
+
+
+def subject(question):
+    """
+    What a question is about, as a title key.
+
+    "What is the Taj Mahal?" -> "taj mahal"
+    """
+    text = title_key(question)
+    return _QUESTION.sub("", text).strip()
+
+
+class Answer:
+    """A document found for a question."""
+
+    def __init__(self, title, text, exact):
+        self.title = title
+        self.text = text
+        self.exact = exact  # True when the question's subject is the document title (text is then all of it)
+
+    def __repr__(self):
+        return f"Answer({self.title!r}, exact={self.exact})"
+
+
+class KnowledgeIndex:
+    """
+    Read-only access to a built index.
+
+    Every thread gets its own memory-mapped connection, so lookups from the
+    server's workers do not queue behind each other.
+
+    Args:
+        path (str): Index file written by build()
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.size = os.path.getsize(path)
+        self.lookups = 0
+        self.hits = 0
+        self._local = threading.local()
+        began = time.perf_counter()
+        connection = self._connection()
+        version, self.documents = connection.execute(
+            "SELECT value, (SELECT value FROM meta WHERE key = 'documents') FROM meta WHERE key = 'version'").fetchone()
+        if int(version) != SCHEMA_VERSION:
+            raise ValueError(f"{path} was built by a different version of knowledge_index; rebuild it")
+        self.documents = int(self.documents)
+        self.open_ms = (time.perf_counter() - began) * 1000
+
+    def _connection(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            connection = sqlite3.connect(f"file:{self.path}?mode=ro", uri=True, check_same_thread=False)
+            connection.execute(f"PRAGMA mmap_size = {self.size}")
+            self._local.connection = connection
+        return connection
+
+    def answer(self, question):
+        """
+        The local answer to a question.
+
+        Args:
+            question (str): The question as spoken ("what is the capital of france")
+
+        Returns:
+            Answer: The matching document, or None if the index does not know
+        """
+        self.lookups += 1
+        # FAQ titles are whole questions, article titles are subjects
+        found = (self._by_title(subject(question)) or self._by_title(title_key(question))
+                 or self._by_named_title(words(question)))
+        if found is not None:
+            self.hits += 1
+        return found
+
+    def _by_title(self, key):
+        if not key:
+            return None
+        row = self._connection().execute(
+            "SELECT docs.title, docs.text FROM titles JOIN docs ON docs.rowid = titles.doc "
+            "WHERE titles.key = ? ORDER BY titles.doc LIMIT 1", (key,)).fetchone()
+        return Answer(row[0], row[1], exact=True) if row else None
+
+    def _by_named_title(self, question_words):
+        # Runs of the question's words that are some document's title, longest first. Only
+        # these few documents are checked against the full-text index, so a question costs
+        # a handful of lookups however large the corpus is.
+        count = len(question_words)
+        keys = {" ".join(question_words[i:j]) for i in range(count)
+                for j in range(i + 1, min(count, i + MAX_TITLE_WORDS) + 1)}
+        keys = [key for key in keys if any(word not in STOPWORDS for word in key.split())]
+        if not keys:
+            return None
+        connection = self._connection()
+        rows = connection.execute(f"SELECT key, doc FROM titles WHERE key IN ({', '.join('?' * len(keys))})",
+                                  keys).fetchall()
+        terms = [word for word in question_words if word not in STOPWORDS]
+        for key, doc in sorted(rows, key=lambda row: (-row[0].count(" "), row[1])):
+            named = set(key.split())
+            rest = [term for term in terms if term not in named]
+            if not rest:
+                continue  # the question is about the title alone but was phrased oddly; leave it to DuckDuckGo
+            # The rest of the question has to occur in one sentence of the document, which is
+            # then the whole answer: a word elsewhere in the article does not answer anything
+            sentence = self._sentence_with(connection, doc, rest)
+            if sentence is not None:
+                title = connection.execute("SELECT title FROM docs WHERE rowid = ?", (doc,)).fetchone()[0]
+                return Answer(title, sentence, exact=False)
+        return None
+
+    def _sentence_with(self, connection, doc, terms):
+        # The first sentence of a document's text containing every term, matched the way the
+        # index stems them ("cities" finds "city"), or None
+        common = sentences = None
+        for term in terms:
+            row = connection.execute(
+                "SELECT highlight(docs, 1, ?, ?) FROM docs WHERE docs MATCH ? AND rowid = ?",
+                (_MARK, _UNMARK, f'text : "{term}"', doc)).fetchone()
+            if row is None:
+                return None
+            sentences = _SENTENCE_END.split(row[0])
+            found = {i for i, sentence in enumerate(sentences) if _MARK in sentence}
+            common = found if common is None else common & found
+            if not common:
+                return None
+        return sentences[min(common)].replace(_MARK, "").replace(_UNMARK, "")
+
+    def stats(self):
+        return {
+            "documents": self.documents,
+            "size_mb": self.size / 1e6,
+            "open_ms": self.open_ms,
+            "lookups": self.lookups,
+            "hits": self.hits,
+        }
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+
+# ----------------------------------------------------------------------
+# Corpus readers
+# ----------------------------------------------------------------------
+def _open_text(path):
+    if path.endswith(".gz"):
+        return io.TextIOWrapper(gzip.open(path, "rb"), encoding="utf-8")
+    return open(path, encoding="utf-8", newline="")
+
+
+def _pick(record, *names):
+    for name in names:
+        value = record.get(name)
+        if value:
+            return str(value).strip()
+    return ""
+
+
+def _read_wikipedia_abstracts(path):
+    with (gzip.open(path, "rb") if path.endswith(".gz") else open(path, "rb")) as f:
+        title = ""
+        for _, element in ElementTree.iterparse(f):
+            if element.tag == "title":
+                title = (element.text or "").removeprefix("Wikipedia: ").strip()
+            elif element.tag == "abstract":
+                yield title, (element.text or "").strip()
+            elif element.tag == "doc":
+                element.clear()
+
+
+def _read_json(path):
+    with _open_text(path) as f:
+        first = f.read(1)
+        f.seek(0)
+        records = json.load(f) if first == "[" else (json.loads(line) for line in f if line.strip())
+        for record in records:
+            yield _pick(record, "title", "question"), _pick(record, "text", "abstract", "answer")
+
+
+def _read_csv(path):
+    with _open_text(path) as f:
+        for record in csv.DictReader(f):
+            yield _pick(record, "title", "question"), _pick(record, "text", "abstract", "answer")
+
+
+def _read_faq(path):
+    with _open_text(path) as f:
+        for block in re.split(r"\n\s*\n", f.read()):
+            lines = [line.strip() for line in block.strip().splitlines() if line.strip()]
+            if len(lines) >= 2:
+                question = re.sub(r"^(?:Q:|#+)\s*", "", lines[0])
+                answer = re.sub(r"^A:\s*", "", " ".join(lines[1:]))
+                yield question, answer
+
+
+def read_corpus(path):
+    """
+    Documents in a corpus file.
+
+    Args:
+        path (str): .xml, .jsonl/.json, .csv or .txt/.md file, optionally gzipped
+
+    Yields:
+        tuple: (title, text)
+    """
+    name = path[:-3] if path.endswith(".gz") else path
+    extension = os.path.splitext(name)[1].lower()
+    if extension == ".xml":
+        return _read_wikipedia_abstracts(path)
+    if extension in (".json", ".jsonl"):
+        return _read_json(path)
+    if extension == ".csv":
+        return _read_csv(path)
+    if extension in (".txt", ".md"):
+        return _read_faq(path)
+    raise ValueError(f"Unsupported corpus file: {path}")
+
+
+def _useful(title, text):
+    # Wikipedia has many stub and disambiguation abstracts that answer nothing
+    return title and len(text) >= 20 and not text.rstrip(":").endswith("may refer to")
+
+
+# ----------------------------------------------------------------------
+# Builder
+# ----------------------------------------------------------------------
+def build(documents, path, batch_size=10000, progress=None):
+    """
+    Write an index from (title, text) pairs.
+
+    The index is written to a temporary file next to `path` and renamed into
+    place at the end, so a running Viola never sees half an index.
+
+    Args:
+        documents (iterable): (title, text) pairs, e.g. from read_corpus()
+        path (str): Index file to write
+        batch_size (int): Documents inserted per statement batch
+        progress (callable): Called with the number of documents written so far
+
+    Returns:
+        dict: documents, skipped, seconds and size_mb
+    """
+    began = time.perf_counter()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    partial = path + ".building"
+    if os.path.exists(partial):
+        os.remove(partial)
+
+    connection = sqlite3.connect(partial)
+    # Nothing to protect until the rename: skip the journal and fsyncs
+    connection.execute("PRAGMA journal_mode = OFF")
+    connection.execute("PRAGMA synchronous = OFF")
+    connection.execute("PRAGMA page_size = 8192")
+    connection.execute("PRAGMA cache_size = -262144")  # 256 MB, so the title B-tree stays in memory
+    connection.execute("CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)")
+    connection.execute("CREATE VIRTUAL TABLE docs USING fts5(title, text, tokenize = 'porter unicode61')")
+    connection.execute("CREATE TABLE titles (key TEXT, doc INTEGER, PRIMARY KEY (key, doc)) WITHOUT ROWID")
+
+    written = skipped = 0
+    batch = []
+
+    def flush():
+        nonlocal written
+        with connection:
+            cursor = connection.execute("SELECT coalesce(max(rowid), 0) FROM docs")
+            first = cursor.fetchone()[0] + 1
+            connection.executemany("INSERT INTO docs (rowid, title, text) VALUES (?, ?, ?)",
+                                   ((first + i, title, text) for i, (title, text) in enumerate(batch)))
+            # Several documents may share a title; a question naming it checks each of them
+            connection.executemany("INSERT INTO titles VALUES (?, ?)",
+                                   ((title_key(title), first + i) for i, (title, _) in enumerate(batch)))
+        written += len(batch)
+        batch.clear()
+        if progress is not None:
+            progress(written)
+
+    for title, text in documents:
+        if not _useful(title, text):
+            skipped += 1
+            continue
+        batch.append((title, text))
+        if len(batch) >= batch_size:
+            flush()
+    if batch:
+        flush()
+
+    with connection:
+        connection.execute("INSERT INTO docs (docs) VALUES ('optimize')")
+        connection.executemany("INSERT INTO meta VALUES (?, ?)",
+                               [("version", str(SCHEMA_VERSION)), ("documents", str(written)),
+                                ("built_at", str(time.time()))])
+    connection.close()
+    os.replace(partial, path)
+    return {
+        "documents": written,
+        "skipped": skipped,
+        "seconds": time.perf_counter() - began,
+        "size_mb": os.path.getsize(path) / 1e6,
+    }
+
+
+def build_from_files(paths, output, **options):
+    """Build an index from corpus files (see read_corpus) in the order given."""
+    return build((document for path in paths for document in read_corpus(path)), output, **options)
+
+
+# ----------------------------------------------------------------------
+# Shared index
+# ----------------------------------------------------------------------
+def get_index():
+    """
+    Return the shared index, opening it on first use.
+
+    Returns:
+        KnowledgeIndex: The index, or None if none is configured or it cannot be opened
+    """
+    global _index
+    if _index is _UNSET:
+        with _index_lock:
+            if _index is _UNSET:
+                path = os.getenv("VIOLA_KNOWLEDGE_INDEX") or DEFAULT_INDEX_FILE
+                index = None
+                if os.path.exists(path):
+                    try:
+                        index = KnowledgeIndex(path)
+                    except (sqlite3.Error, ValueError, TypeError) as e:
+                        print(f"Knowledge index {path} not used: {e}")
+                _index = index
+    return _index
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Build and query Viola's offline knowledge index")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build_parser = commands.add_parser("build", help="Index corpus files")
+    build_parser.add_argument("corpus", nargs="+", help="Wikipedia abstracts XML, JSON lines, CSV or FAQ text files")
+    build_parser.add_argument("--output", default=os.getenv("VIOLA_KNOWLEDGE_INDEX") or DEFAULT_INDEX_FILE)
+    query_parser = commands.add_parser("query", help="Ask an index a question")
+    query_parser.add_argument("index")
+    query_parser.add_argument("question")
+    args = parser.parse_args(argv)
+
+    if args.command == "build":
+        def progress(written):
+            print(f"\r{written} documents", end="", file=sys.stderr, flush=True)
+
+        result = build_from_files(args.corpus, args.output, progress=progress)
+        print(file=sys.stderr)
+        print(f"Indexed {result['documents']} documents ({result['skipped']} skipped) into {args.output}: "
+              f"{result['size_mb']:.1f} MB in {result['seconds']:.1f}s")
+        return 0
+
+    index = KnowledgeIndex(args.index)
+    began = time.perf_counter()
+    found = index.answer(args.question)
+    elapsed = (time.perf_counter() - began) * 1000
+    if found is None:
+        print(f"No local answer ({elapsed:.2f} ms); Viola would ask DuckDuckGo")
+        return 1
+    print(f"{found.title} ({'title' if found.exact else 'full text'} match, {elapsed:.2f} ms):")
+    print(found.text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -32,232 +32,636 @@ Control:
 Wake Word: "Viola" (case-insensitive)
 """
 
-import speech_recognition as sr
-import webbrowser
-import pyttsx3
 import sys
-import os
-from dotenv import load_dotenv
+import startup
+
+if "--profile-startup" in sys.argv:
+    # Time every import from here on
+    startup.profile.enable()
 
+import contextlib
+import os
 import re
-import musicLibrary
-import newsLibrary
-import duckduckgo_library
-import urllib.parse
+import threading
+from datetime import datetime
+
+import intent_router
+import tracing
+import tts_engine
+
+# Everything else loads on first use, so Viola starts listening sooner
+asyncio = startup.lazy_import("asyncio")
+webbrowser = startup.lazy_import("webbrowser")
+async_runtime = startup.lazy_import("async_runtime")
+audio_capture = startup.lazy_import("audio_capture")
+vad = startup.lazy_import("vad")
+wake_word = startup.lazy_import("wake_word")
+recognizers = startup.lazy_import("recognizers")
+phrase_cache = startup.lazy_import("phrase_cache")
+http_client = startup.lazy_import("http_client")
+musicLibrary = startup.lazy_import("musicLibrary")
+news_prefetch = startup.lazy_import("news_prefetch")
+duckduckgo_library = startup.lazy_import("duckduckgo_library")
+knowledge_index = startup.lazy_import("knowledge_index")
+speculation = startup.lazy_import("speculation")
+responses = startup.lazy_import("responses")
+sessions = startup.lazy_import("sessions")
+batch = startup.lazy_import("batch")
+speech_pipeline = startup.lazy_import("speech_pipeline")
+
+# Web Navigation targets
+SITES = {
+    "google": "https://www.google.com",
+    "youtube": "https://www.youtube.com/@LotusOutlook",
+    "github": "https://github.com/lotus-outlook-6",
+
+}
+
+# Songs named when listing the library (a catalog may hold thousands)
+SONG_SUGGESTIONS = 5
+
+_phrases = None
+_active_stream = None
+_speculator = None
+_songs_reply = None
+
+
+def get_phrase_cache():
+    """Return the shared phrase cache, creating it on first use."""
+    global _phrases
+    if _phrases is None:
+        _phrases = phrase_cache.PhraseCache(tts_engine.get_engine())
+    return _phrases
+
 
-load_dotenv()
+def available_songs():
+    """The song suggestions, rebuilt only when the music catalog changes."""
+    global _songs_reply
+    if _songs_reply is None:
+        _songs_reply = responses.Reply(
+            lambda: ", ".join(musicLibrary.list_available_songs(SONG_SUGGESTIONS)),
+            musicLibrary.catalog_version)
+    return _songs_reply.get()
 
-def speak(text):
+
+def fixed_phrases():
     """
-    Convert text to speech using pyttsx3.
+    Phrases Viola says word for word, worth pre-rendering to audio.
+    
+    Returns:
+        list: Phrase strings
+    """
+    phrases = [
+        "Initializing Viola...",
+        "Yes, how can I help you?",
+        "I am Viola, your AI assistant",
+        "I didn't understand that command",
+        "Stopping Viola. Goodbye!",
+        f"Available songs are: {available_songs()}",
+    ]
+    phrases.extend(f"Opening {site}..." for site in SITES)
+    return phrases
+
+
+def speak(text, clips=None):
+    """
+    Speak text and wait until it finishes.
+    Fixed phrases play from the pre-rendered cache, templated replies are
+    stitched from cached clips, anything else is synthesized live.
     
     Args:
         text (str): The text to be spoken
+        clips (list): Pre-rendered clips that say the same (see responses.Template)
     
     Returns:
         None
     """
+    session = sessions.current()
+    if session is not None:
+        # Serving a remote client (server.py): the reply goes back to it
+        session.say(text, clips)
+        return
     try:
-        # Utilize pyttsx3 for offline text-to-speech
-        engine = pyttsx3.init()
-        engine.setProperty('rate', 150)
-        voices = engine.getProperty('voices')
-        if len(voices) > 1:
-            engine.setProperty('voice', voices[1].id)  # Female voice
-        engine.say(text)
-        engine.runAndWait()
-        engine.stop()
+        with tracing.span("tts") as span:
+            utterance = get_phrase_cache().speak(text, clips)
+            if utterance is not None and utterance.time_to_first_audio is not None:
+                span.set(first_audio_ms=round(utterance.time_to_first_audio * 1000, 1),
+                         cached=utterance.audio_file is not None)
 
     except Exception as e:
         print(f"Error in speak: {e}")
         sys.stdout.flush()
 
 
+def speak_async(text):
+    """
+    Queue text for speaking without waiting for it to finish.
+    
+    Args:
+        text (str): The text to be spoken
+    
+    Returns:
+        tts_engine.Utterance: Handle for the queued speech, or None on error
+    """
+    try:
+        return tts_engine.get_engine().speak_async(text)
 
+    except Exception as e:
+        print(f"Error in speak: {e}")
+        sys.stdout.flush()
+        return None
 
-def process_command(c):
+
+def speak_stream(chunks):
     """
-    Process user commands and perform corresponding actions.
+    Speak a long answer sentence by sentence, starting with the first sentence
+    while the rest are still queued. Blocks until finished or cancelled.
+    
+    When rendered audio can be played (speech_pipeline), the next sentence is
+    synthesized while the current one plays, so multi-part answers such as the
+    headlines play without pauses between parts.
     
     Args:
-        c (str): The command string to process (case-insensitive)
+        chunks (str or iterable): Answer text, or a generator of text pieces
     
     Returns:
-        None
+        tts_engine.SpeechStream or speech_pipeline.PipelinedSpeech: The finished
+            stream, or None on error
     """
-    c = c.lower()
-    print("Processing command: " + c)
-    
-    # Web Navigation (Short & Sweet)
-    sites = {
-        "google": "https://www.google.com",
-        "youtube": "https://www.youtube.com/@LotusOutlook",
-        "github": "https://github.com/lotus-outlook-6",
+    global _active_stream
+    session = sessions.current()
+    if session is not None:
+        for chunk in [chunks] if isinstance(chunks, str) else chunks:
+            session.say(chunk)
+        return None
+    try:
+        with tracing.span("tts", stream=True) as span:
+            engine = tts_engine.get_engine()
+            if speech_pipeline.available(engine):
+                stream = speech_pipeline.PipelinedSpeech(engine, chunks)
+            else:
+                stream = engine.speak_stream(chunks)
+            _active_stream = stream
+            stream.wait()
+            stats = stream.stats()
+            span.set(first_audio_ms=stats["first_audio_ms"], chunks=stats["chunks"],
+                     max_gap_ms=stats.get("max_gap_ms"))
+        if stats["first_audio_ms"] is not None and stats["whole_text_ms"] is not None:
+            gap = f", longest gap {stats['max_gap_ms']:.0f} ms" if "max_gap_ms" in stats else ""
+            print(f"Speech: first audio {stats['first_audio_ms']:.0f} ms, "
+                  f"whole text {stats['whole_text_ms']:.0f} ms over {stats['chunks']} chunks{gap}")
+        return stream
+
+    except Exception as e:
+        print(f"Error in speak: {e}")
+        sys.stdout.flush()
+        return None
+    finally:
+        _active_stream = None
 
-    }
+
+def open_url(url):
+    """Open a URL in the browser (a remote client's, when serving one)."""
+    session = sessions.current()
+    if session is not None:
+        session.open(url)
+    else:
+        webbrowser.open(url)
+
+
+def stop_speaking():
+    """Barge-in: cancel the answer being streamed and flush anything still queued."""
+    try:
+        stream = _active_stream
+        if stream is not None:
+            stream.cancel()
+        return tts_engine.get_engine().interrupt()
+    except Exception as e:
+        print(f"Error stopping speech: {e}")
+        return 0
+
+
+
+
+def was_speaking_since(since):
+    """
+    Echo guard for the capture session: True if Viola was talking since `since`.
     
-    for site, url in sites.items():
-        if f"open {site}" in c:
-            speak(f"Opening {site}...")
-            webbrowser.open(url)
-            return
+    Args:
+        since (float): A time.perf_counter() timestamp
     
-    # Information Commands
-    if "what is the time" in c or "tell me the time" in c:
-        from datetime import datetime
-        time = datetime.now().strftime("%I:%M %p")
-        speak(f"The time is {time}")
+    Returns:
+        bool: Whether a captured phrase may contain Viola's own voice
+    """
+    try:
+        return tts_engine.get_engine().active_since(since)
+    except Exception:
+        return False
+
+
+
+
+# Command registry: intents are tried in registration order and compiled into
+# a single matcher. Add new skills with @router.register(name, pattern).
+router = intent_router.IntentRouter()
+
+
+# Web Navigation (Short & Sweet)
+@router.register("open_site", r"open (?P<site>" + "|".join(re.escape(site) for site in SITES) + r")")
+def handle_open_site(match):
+    site = match.group("site")
+    speak(f"Opening {site}...")
+    open_url(SITES[site])
+
+
+# Information Commands
+@router.register("time", r"what is the time|tell me the time")
+def handle_time(match):
+    # Stitched from cached clips: "The time is" "three" "twenty two" "PM"
+    speak(*responses.TIME.render(time=responses.clock(datetime.now())))
+
+
+@router.register("name", r"what is your name|who are you")
+def handle_name(match):
+    speak("I am Viola, your AI assistant")
+
+
+# Music Control Commands
+@router.register("play", r"play(?P<song>.*)")
+def handle_play(match):
+    # Extract song name from command (e.g., "play virtual" -> "virtual")
+    song_name = match.group("song", "").strip()
     
-    elif "what is your name" in c or "who are you" in c:
-        speak("I am Viola, your AI assistant")
+    # Remove "the" if it's at the beginning as a separate word
+    if song_name.startswith("the "):
+        song_name = song_name[4:].strip()
     
-    # Music Control Commands
-    elif "play" in c:
-        # Extract song name from command (e.g., "play virtual" -> "virtual")
-        # Remove "play" from start and handle "the" as a word, not substring
-        song_name = c.replace("play", "", 1).strip()  # Remove first occurrence of "play"
-        
-        # Remove "the" if it's at the beginning as a separate word
-        if song_name.startswith("the "):
-            song_name = song_name[4:].strip()
-        
-        if song_name:
-            # Try to find the song in the music library
-            link = musicLibrary.get_music_link(song_name)
-            if link:
-                speak(f"Playing {song_name}")
-                webbrowser.open(link)
-            else:
-                available_songs = ", ".join(musicLibrary.list_available_songs())
-                speak(f"Sorry, I don't have {song_name} in my library. Available songs are: {available_songs}")
+    if song_name:
+        # Try to find the song in the music library (tolerates misheard titles)
+        song = musicLibrary.find_song(song_name)
+        if song:
+            speak(f"Playing {song.title}")
+            open_url(song.link)
         else:
-            # User said "play" without specifying a song
-            available_songs = ", ".join(musicLibrary.list_available_songs())
-            speak(f"Available songs are: {available_songs}")
-    
-    # News Commands
-    elif "news" in c or "headlines" in c:
+            speak(f"Sorry, I don't have {song_name} in my library. Available songs are: {available_songs()}")
+    else:
+        # User said "play" without specifying a song
+        speak(f"Available songs are: {available_songs()}")
+
+
+# News Commands
+@router.register("news", r"news|headlines")
+def handle_news(match):
+    prefetcher = news_prefetch.get_prefetcher()
+    if prefetcher.headlines:
+        speak("Here is the latest news from India.")
+    else:
         speak("Fetching the latest news from India. Please wait...")
-        headlines = newsLibrary.get_india_news()
-        
-        if headlines:
-            # Speak each headline
-            for headline in headlines:
-                speak(headline)
-            speak("That's all the news for now.")
-        else:
-            speak("Sorry, I couldn't fetch any news at the moment. Please try again later.")
+    # Served from the background-refreshed cache whenever possible
+    headlines = prefetcher.get_headlines()
     
-    # Default case: command not recognized
+    if headlines:
+        # Stream the headlines so the first plays while the rest are queued
+        speak_stream(headlines + ["That's all the news for now."])
     else:
-        # Try web search for factual queries (where/what/who/how far)
-        # Patterns like 'where is X', 'what is X', 'who is X', 'distance between X and Y'
-        
-        # Check for distance queries first
-        m = re.search(r"how far is (.+?) from (.+)", c.lower())
-        if not m:
-            m = re.search(r"distance between (.+?) and (.+)", c.lower())
-        
-        if m:
-            origin = m.group(1).strip()
-            destination = m.group(2).strip()
-            query = f"distance from {origin} to {destination}"
-            result = duckduckgo_library.web_search_summary(query)
-            speak(result)
-            return
-        
-        # Check for factual queries
-        qmatch = re.search(r"^(where|what|who|when|why|how)\b(.+)$", c.lower())
-        if qmatch:
-            qtext = qmatch.group(0).strip()
-            result = duckduckgo_library.web_search_summary(qtext)
-            speak(result)
-            return
-        
-        # General fallback: ask DuckDuckGo
-        result = duckduckgo_library.web_search_summary(c)
-        speak(result)
+        speak("Sorry, I couldn't fetch any news at the moment. Please try again later.")
+
+
+# Web search for distance queries ('how far is X from Y', 'distance between X and Y')
+@router.register("distance", [
+    r"how far is (?P<origin>.+?) from (?P<destination>.+)",
+    r"distance between (?P<origin>.+?) and (?P<destination>.+)",
+])
+def handle_distance(match):
+    speak_search(search_query(match))
+
+
+# Web search for factual queries ('where is X', 'what is X', 'who is X', ...)
+@router.register("question", r"^(?:where|what|who|when|why|how)\b.+$")
+def handle_question(match):
+    speak_search(search_query(match))
+
+
+def handle_fallback(match):
+    # General fallback: ask DuckDuckGo
+    speak_search(match.command)
+
+
+router.set_fallback(handle_fallback)
+
+# Intents whose answer can be looked up while the question is still being spoken
+SPECULATIVE_INTENTS = ("question", "distance")
+# Words a finished question does not end on
+_UNFINISHED = frozenset("a an the of in on at to from for by with and or is are was were".split())
+
+
+def search_query(match):
+    """The DuckDuckGo query a question or distance command looks up."""
+    if match.intent == "distance":
+        origin = match.group("origin").strip()
+        destination = match.group("destination").strip()
+        return f"distance from {origin} to {destination}"
+    return match.text.strip()
 
+
+def search(query):
+    """
+    Answer a query from the offline knowledge index when it knows, otherwise from DuckDuckGo.
+
+    Args:
+        query (str): The question or search text
+
+    Returns:
+        str: The answer to speak
+    """
+    index = knowledge_index.get_index()
+    if index is not None:
+        with tracing.span("knowledge") as span:
+            found = index.answer(query)
+            span.set(hit=found is not None)
+        if found is not None:
+            return found.text
+    return duckduckgo_library.web_search_summary(query)
+
+
+def speak_search(query):
+    """Look a query up (joining a speculative lookup already under way) and read the answer."""
+    if _speculator is not None:
+        _speculator.resolve(query)
+    speak_stream(search(query))
+
+
+def speculative_query(partial):
+    """
+    The lookup a partial transcript will need if the user stops talking now.
+
+    Args:
+        partial (str): What has been recognized so far, wake word included
+
+    Returns:
+        str: DuckDuckGo query, or None if this does not look like a question yet
+    """
+    text = async_runtime.strip_wake_word(partial.lower())
+    words = text.split()
+    if len(words) < 3 or words[-1] in _UNFINISHED:
+        # "what is the", "how far is delhi from": more is coming
+        return None
+    match = router.match(text, record=False)
+    if match.intent not in SPECULATIVE_INTENTS:
+        return None
+    return search_query(match)
+
+
+def get_speculator(**options):
+    """Return the shared speculator for partial transcripts, creating it on first use."""
+    global _speculator
+    if _speculator is None:
+        _speculator = speculation.Speculator(
+            speculative_query, search,
+            normalize=lambda query: duckduckgo_library.cache.normalize(query), **options)
+    return _speculator
+
+
+def process_command(c):
+    """
+    Process user commands and perform corresponding actions.
+    
+    Args:
+        c (str): The command string to process (case-insensitive)
     
+    Returns:
+        intent_router.IntentMatch: The intent that handled the command
+    """
+    c = c.lower()
+    print("Processing command: " + c)
+    return router.dispatch(c)
 
-if __name__ == "__main__":
+
+
+def process_for(session, text):
+    """
+    Run a command for a client other than the local microphone (the server,
+    batch mode): what Viola says and opens is collected on the session.
+
+    Args:
+        session (sessions.ClientSession): The client's session
+        text (str): The command, wake word optional
+
+    Returns:
+        tuple: (command, intent_router.IntentMatch, list of sessions.Reply, list of URLs)
+    """
+    text = text.strip().lower()
+    command = async_runtime.strip_wake_word(text) or text
+    session.begin(command)
+    interaction = tracing.tracer.interaction("command", command=command, session=session.id)
+    try:
+        with sessions.activate(session), tracing.activate(interaction):
+            match = process_command(command)
+    except Exception:
+        # Do not hand half a reply to the session's next command
+        session.take()
+        if interaction is not None:
+            interaction.finish(error=True)
+        raise
+    if interaction is not None:
+        interaction.finish(intent=match.intent)
+    replies, opened = session.take()
+    return command, match, replies, opened
+
+
+def start_speech():
+    """Start the TTS engine and announce startup without waiting for it to finish."""
+    try:
+        with startup.profile.phase("tts engine"):
+            tts_engine.get_engine()
+    except Exception as e:
+        print(f"Warning: Speech engine failed to start - {e}")
+        print("Continuing anyway...")
+        return
+    speak_async("Initializing Viola...")
+
+
+def start_background_services():
+    """Network and cache work that must not delay the first listen."""
+    # Open connections to DuckDuckGo and NewsAPI before the first question
+    with startup.profile.phase("http prewarm"):
+        http_client.prewarm()
+
+    # Map the offline knowledge index (if there is one) so the first question does not wait for it
+    with startup.profile.phase("knowledge index"):
+        index = knowledge_index.get_index()
+    if index is not None:
+        print(f"Knowledge index: {index.documents} documents, opened in {index.open_ms:.1f} ms")
+
+    # Keep headlines fresh in the background so news requests answer instantly
+    with startup.profile.phase("news prefetch"):
+        news_prefetch.get_prefetcher().start()
+
+    # Pick up edits to the music catalog without a restart
+    with startup.profile.phase("music catalog"):
+        musicLibrary.watch_catalog()
+
+    # Render fixed replies, then the clips templated replies are stitched from,
+    # in the background so later wakes skip synthesis
+    try:
+        with startup.profile.phase("phrase cache"):
+            get_phrase_cache().warm(fixed_phrases() + responses.clip_texts())
+    except Exception as e:
+        print(f"Warning: Phrase cache unavailable - {e}")
+
+
+def print_trace(record):
+    """One line per traced interaction: total time and the stages it went to."""
+    stages = ", ".join(f"{span['name']} {span['ms']:.0f}" for span in record["spans"])
+    print(f"Trace {record['kind']} #{record['id']}: {record['total_ms']:.0f} ms ({stages})")
+
+
+def run_batch(path, sink="stdout", jobs=16):
+    """
+    Headless mode: run the commands in a file (or stdin) and write the replies
+    to a sink instead of speaking them. The summary goes to stderr.
+
+    Args:
+        path (str): Command file, or "-" for stdin
+        sink (str): "stdout", "json" or "null" (see batch.SINKS)
+        jobs (int): Commands run at once
+
+    Returns:
+        int: Exit status, 1 if any command failed
+    """
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    output = batch.SINKS[sink](sys.stdout)
+    with contextlib.ExitStack() as stack:
+        stream = sys.stdin if path == "-" else stack.enter_context(open(path, encoding="utf-8"))
+        # Skill chatter ("Processing command: ...") would interleave with the sink's output
+        stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        summary = batch.run_batch(batch.read_commands(stream), process_for, output, jobs=jobs)
+    print(batch.format_summary(summary), file=sys.stderr)
+    if tracing.tracer.enabled:
+        print(tracing.tracer.report(), file=sys.stderr)
+        tracing.tracer.disable()
+    return 1 if summary["errors"] else 0
+
+
+def main(argv=None):
     """
     Main entry point of the Viola voice assistant.
     Continuously listens for the wake word "Viola" and processes user commands.
+
+    Args:
+        argv (list): Command line arguments (default: sys.argv[1:])
+
+    Returns:
+        int: Exit status of --batch mode (None after a voice session)
     """
-    
+    import argparse
+    parser = argparse.ArgumentParser(description="Viola voice assistant")
+    parser.add_argument("--profile-startup", action="store_true",
+                        help="Print an import and init time breakdown once Viola is listening")
+    parser.add_argument("--trace", nargs="?", const=tracing.DEFAULT_TRACE_FILE, metavar="FILE",
+                        help="Time every stage and append one JSON line per interaction "
+                             f"(default file: {tracing.DEFAULT_TRACE_FILE})")
+    parser.add_argument("--batch", metavar="FILE",
+                        help="Run the text commands in FILE ('-' for stdin) without a microphone or speakers")
+    parser.add_argument("--sink", choices=("stdout", "json", "null"), default="stdout",
+                        help="Where --batch writes replies (default: stdout)")
+    parser.add_argument("--jobs", type=int, default=16, help="Commands --batch runs at once (default: 16)")
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        if args.trace:
+            tracing.tracer.enable(args.trace)
+        return run_batch(args.batch, args.sink, args.jobs)
+
+    if args.trace:
+        tracing.tracer.enable(args.trace, on_finish=print_trace)
+        print(f"Tracing to {args.trace}")
+
     print("Starting Viola...")
+    with startup.profile.phase("dotenv"):
+        from dotenv import load_dotenv
+        load_dotenv()
+
+    # The speech engine starts while the microphone opens and calibrates
+    speech_thread = threading.Thread(target=start_speech, name="viola-start-speech", daemon=True)
+    speech_thread.start()
+
+    # Open the microphone and calibrate once for the whole session. Phrases that
+    # overlap Viola's own speech are kept (flagged) so "Viola, stop" still works,
+    # and voice activity detection trims silence before anything is uploaded.
     try:
-        speak("Initializing Viola...")
+        with startup.profile.phase("microphone"):
+            session = audio_capture.CaptureSession(echo_guard=was_speaking_since, keep_echo=True,
+                                                   vad=vad.from_env())
+            session.start()
     except Exception as e:
-        print(f"Warning: Initial speak failed - {e}")
-        print("Continuing anyway...")
-    
-    # Main listening loop
-    while True:
-        # Create a speech recognizer object
-        r = sr.Recognizer()
-        r.dynamic_energy_threshold = True
-        r.pause_threshold = 0.5
-
-        try:
-            # Use the microphone as the audio source
-            with sr.Microphone() as source:
-                # Adjust recognizer to ambient noise to improve accuracy
-                r.adjust_for_ambient_noise(source, duration=0.5)
-
-                # Listen for the wake word (blocking until speech starts)
-                print("Listening...")
-                # Block until speech starts, then capture up to 4 seconds
-                audio = r.listen(source, phrase_time_limit=4)
-
-                # Recognize speech using Google Speech Recognition API
-                print("Recognizing...")
-                try:
-                    word = r.recognize_google(audio)
-                    print(f"Heard: {word}")
-                except sr.UnknownValueError:
-                    print("Could not understand, returning to listen mode...")
-                    continue
-
-                lw = word.lower().strip()
-                # Only react if the user said the exact wake word 'viola' (word-boundary) or 'stop listening'
-                if "stop listening" in lw:
-                    print("Stop listening command detected, exiting...")
-                    speak("Stopping Viola. Goodbye!")
-                    break
-
-                if not re.search(r"\bviola\b", lw):
-                    # Not the wake word; go back to listening without further processing
-                    print("Wake word not detected, continuing to listen...")
-                    continue
-
-                # Wake word matched
-                print("Wake word detected!")
-                speak("Yes, how can I help you?")
-                print("Viola is listening for a command...")
-                try:
-                    # Listen for the actual command (timeout=8 seconds)
-                    audio = r.listen(source, timeout=8, phrase_time_limit=8)
-                except sr.WaitTimeoutError:
-                    print("Timed out, returning to listen mode...")
-                    continue
-
-                # Recognize the command
-                print("Recognizing...")
-                try:
-                    command = r.recognize_google(audio)
-                    print(f"Command received: {command}")
-                    # Process the recognized command
-                    process_command(command)
-                except sr.UnknownValueError:
-                    speak("I didn't understand that command")
-
-        except sr.WaitTimeoutError:
-            # Timeout while listening for wake word, continue
-            pass
-        except Exception as e:
-            # Handle any other exceptions
-            print("Error!!! {0}".format(e))
-            import traceback
-            traceback.print_exc()
\ No newline at end of file
+        print(f"Error: Could not open the microphone - {e}")
+        if args.profile_startup:
+            print(startup.profile.report())
+        sys.exit(1)
+    startup.profile.mark("first listen")
+
+    threading.Thread(target=start_background_services, name="viola-start-services",
+                     daemon=True).start()
+
+    # Speech-to-text backends (VIOLA_STT_BACKENDS, e.g. "google,vosk" races both)
+    with startup.profile.phase("recognizers"):
+        stt = recognizers.build_recognizer()
+
+        # Decide on-device whether a phrase is the wake word; only then use cloud STT
+        wake = wake_word.default_stage(stt.transcribe, recognizer=session.recognizer)
+    print(f"Wake word detector: {wake.detector.name}")
+
+    # Stream audio to an incremental recognizer (Vosk) so answers to questions
+    # are fetched while they are still being asked
+    partial_backend = next((b for b in stt.backends if hasattr(b, "start_stream")), None)
+    if session.vad is not None and partial_backend is not None and os.getenv("VIOLA_SPECULATE", "1") != "0":
+        session.vad.on_audio = speculation.StreamingTranscriber(partial_backend, get_speculator())
+        print(f"Speculative lookups from {partial_backend.name} partial results")
+
+    speech_thread.join()
+    if args.profile_startup:
+        startup.profile.mark("ready")
+        print(startup.profile.report())
+
+    # Capture, recognition, commands and speech run concurrently
+    runtime = async_runtime.VoiceRuntime(session, wake, stt, process_command, speak, stop_speaking)
+    try:
+        asyncio.run(runtime.run())
+    except KeyboardInterrupt:
+        print("Interrupted, exiting...")
+
+    stats = session.stats()
+    print(f"Audio: {stats['calibration_s']:.1f}s calibrating, {stats['listening_s']:.1f}s listening, "
+          f"{stats['captured']} phrases captured, {stats['dropped']} dropped")
+    if "vad" in stats and stats["vad"]["phrases"]:
+        vad_stats = stats["vad"]
+        print(f"VAD ({vad_stats['classifier']}): {vad_stats['bytes_saved'] / 1024:.0f} KB "
+              f"({vad_stats['saved_ratio']:.0%}) not uploaded, {vad_stats['segments_dropped']} noises dropped, "
+              f"end of speech p50 {vad_stats['end_of_speech_p50_ms']:.0f} ms "
+              f"(pause_threshold {vad_stats['pause_threshold_ms']:.0f} ms)")
+    wake_stats = wake.stats()
+    print(f"Wake word: {wake_stats['detected']} detected, {wake_stats['rejected']} rejected, "
+          f"{wake_stats['gated_out']} gated out")
+    runtime_stats = runtime.stats()
+    print(f"Runtime: {runtime_stats['commands']} commands, {runtime_stats['barge_ins']} barge-ins")
+    if _speculator is not None:
+        spec = _speculator.stats()
+        print(f"Speculation: {spec['hits']} hits of {spec['hits'] + spec['misses']} lookups "
+              f"({spec['hit_rate']:.0%}), {spec['wasted']} wasted of {spec['launched']} started")
+    for name, endpoint in http_client.stats().items():
+        if endpoint["requests"] or endpoint["opened"]:
+            p95 = "-" if endpoint["p95_ms"] is None else f"{endpoint['p95_ms']:.0f} ms"
+            print(f"{name}: {endpoint['requests']} requests, p95 {p95}, "
+                  f"timeout {endpoint['timeout_s']:.1f}s, {endpoint['timeouts']} timed out, "
+                  f"circuit {endpoint['state']} (opened {endpoint['opened']}x, {endpoint['rejected']} refused)")
+    if tracing.tracer.enabled:
+        print(tracing.tracer.report())
+        tracing.tracer.disable()
+    session.stop()
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,8 +1,19 @@
 """
 Music Library for Viola
 Contains a collection of music links mapped to specific keywords
+
+Songs beyond the built-in ones can come from a catalog file (JSON, CSV or
+SQLite, see music_index.load_catalog) named by the VIOLA_MUSIC_CATALOG
+environment variable. Titles are matched fuzzily, so "play check point"
+or a slightly misheard title still finds the song. Edits to the catalog
+are picked up while Viola runs (see watch_catalog).
 """
 
+import os
+import threading
+
+import music_index
+
 music = {
     "virtual": "https://youtu.be/oklzVH8FfVQ?si=4l_9BmVeXazgCvO5",
     "checkpoint": "https://youtu.be/ieCU9OV8_tg?si=DoxhXJG6iPxv5DGQ",
@@ -11,16 +22,90 @@ music = {
     "playlist": "https://www.youtube.com/watch?v=oklzVH8FfVQ&list=RDoklzVH8FfVQ&index=1"
 }
 
+_index = None
+_watcher = None
+_index_lock = threading.Lock()
+
+
+def _build(catalog_path=None):
+    index = music_index.MusicIndex()
+    index.update(music.items())
+    watcher = None
+    catalog_path = catalog_path or os.getenv("VIOLA_MUSIC_CATALOG")
+    if catalog_path:
+        # The watcher does the first load too, so later reloads know what changed
+        watcher = music_index.CatalogWatcher(index, catalog_path, base=music)
+        watcher.reload()
+    return index, watcher
+
+
+def build_index(catalog_path=None):
+    """
+    Index the built-in songs plus an optional catalog file.
+
+    Args:
+        catalog_path (str): Catalog to load (default: $VIOLA_MUSIC_CATALOG)
+
+    Returns:
+        music_index.MusicIndex: The index
+    """
+    return _build(catalog_path)[0]
+
+
+def get_index():
+    """Return the shared music index, building it on first use."""
+    global _index, _watcher
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index, _watcher = _build()
+    return _index
+
+
+def watch_catalog(interval=2.0):
+    """
+    Apply edits to the catalog file while Viola runs (no-op without a catalog).
+
+    Args:
+        interval (float): Seconds between checks of the file
+
+    Returns:
+        music_index.CatalogWatcher: The running watcher, or None
+    """
+    get_index()
+    if _watcher is None:
+        return None
+    _watcher.interval = interval
+    return _watcher.start()
+
+
+def find_song(song_name):
+    """
+    Find the best matching song for a spoken title
+    Returns a music_index.SongMatch (title, link, score), or None
+    """
+    return get_index().find(song_name)
+
+
 def get_music_link(song_name):
     """
     Get the YouTube link for a specific song
     Returns the link if found, None otherwise
     """
-    song_name = song_name.lower().strip()
-    return music.get(song_name, None)
+    match = find_song(song_name)
+    return match.link if match else None
+
+def list_available_songs(limit=None):
+    """
+    Return a list of all available songs (or the first `limit` of them)
+    """
+    return get_index().titles(limit)
+
 
-def list_available_songs():
+def catalog_version():
     """
-    Return a list of all available songs
+    A value that changes whenever songs are added, removed or relinked,
+    so replies listing songs can be cached until then
     """
-    return list(music.keys())
+    index = get_index()
+    return id(index), index.version
@@ -0,0 +1,529 @@
+"""
+Music Index for Viola
+In-memory title index for large music catalogs, with fuzzy and phonetic lookup.
+
+Titles are matched exactly first (ignoring case, punctuation and spaces, so
+"check point" finds "Checkpoint"), then word by word: misrecognized words are
+mapped to similar vocabulary words through a trigram index and a sound-alike
+key ("vertual" -> "virtual"), and titles are scored by how many words match.
+
+Catalogs can be JSON, CSV or SQLite:
+  JSON   - {"title": "link", ...} or [{"title": ..., "link": ...}, ...]
+  CSV    - header row with title and link columns
+  SQLite - table `songs` with title and link columns
+
+CatalogWatcher polls a catalog file and applies only the changed songs to a
+live index, so edits show up without restarting Viola.
+"""
+
+import csv
+import heapq
+import itertools
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+from collections import Counter
+
+_NON_ALNUM = re.compile(r"[^a-z0-9 ]+")
+_SOUNDS = str.maketrans("bfpvcgjkqsxzdtlmnr", "111122222222334556")
+_DIGRAPHS = (("ph", "f"), ("ck", "k"), ("gh", "g"), ("sch", "sk"), ("wr", "r"), ("kn", "n"))
+
+
+def normalize(text):
+    """Lowercase, strip accents and punctuation, collapse whitespace."""
+    text = unicodedata.normalize("NFKD", text)
+    text = "".join(c for c in text if not unicodedata.combining(c)).lower()
+    return " ".join(_NON_ALNUM.sub(" ", text).split())
+
+
+def compact(text):
+    """Normalized text without spaces, the form titles are keyed and indexed by."""
+    return normalize(text).replace(" ", "")
+
+
+def trigrams(key):
+    """Overlapping 3-character pieces of a word, padded so short words still have some."""
+    padded = f"^{key}$"
+    if len(padded) < 3:
+        return [padded]
+    return [padded[i:i + 3] for i in range(len(padded) - 2)]
+
+
+def phonetic_key(key):
+    """
+    Sound-alike key of a word: Soundex-style consonant classes with
+    vowels dropped and repeats collapsed, so "vertual" and "virtual" agree.
+    """
+    for digraph, sound in _DIGRAPHS:
+        key = key.replace(digraph, sound)
+    coded = key.translate(_SOUNDS)
+    out = []
+    for c in coded:
+        if c in "aeiouyhw":
+            continue
+        if not out or out[-1] != c:
+            out.append(c)
+    return "".join(out)
+
+
+class SongMatch:
+    """A catalog entry found for a spoken title."""
+
+    def __init__(self, title, link, score):
+        self.title = title
+        self.link = link
+        self.score = score  # 1.0 for an exact match
+
+    def __repr__(self):
+        return f"SongMatch({self.title!r}, score={self.score:.2f})"
+
+
+class MusicIndex:
+    """
+    Title -> link index with exact, fuzzy and phonetic lookup.
+
+    Titles are indexed by word. A spoken word that is not in the vocabulary
+    is expanded to similar vocabulary words through a trigram index over the
+    (much smaller) set of distinct words and a sound-alike key, and only the
+    titles containing the most selective query word are scored.
+
+    Entries are stored in parallel lists and referenced by position; removed
+    entries leave a hole that lookups skip, so add() and remove() do not
+    rebuild the index. Once holes make up `compact_ratio` of the entries the
+    index is rebuilt from the remaining songs, so a catalog that keeps
+    changing does not grow it without bound. Lookups may run while another
+    thread adds or removes; one that overlaps a rebuild is run again.
+
+    Args:
+        min_score (float): Lowest similarity accepted as a match
+        max_candidates (int): Titles scored per lookup before narrowing by a second word
+        max_sound_alikes (int): Known words with more sound-alikes than this are taken as heard
+        compact_ratio (float): Share of removed entries that triggers a rebuild
+    """
+
+    _TABLES = ("_titles", "_links", "_words", "_by_key", "_postings", "_word_grams", "_word_sizes",
+               "_word_sounds")
+
+    def __init__(self, min_score=0.5, max_candidates=2000, max_sound_alikes=20, compact_ratio=0.25):
+        self.min_score = min_score
+        self.max_candidates = max_candidates
+        self.max_sound_alikes = max_sound_alikes
+        self.compact_ratio = compact_ratio
+        self._titles = []
+        self._links = []
+        self._words = []
+        self._by_key = {}
+        self._postings = {}     # word -> entries containing it
+        self._word_grams = {}   # trigram -> vocabulary words containing it
+        self._word_sizes = {}   # vocabulary word -> number of trigrams
+        self._word_sounds = {}  # phonetic key -> vocabulary words
+        self._lock = threading.Lock()
+        self._holes = 0
+        self._generation = 0    # odd while a rebuild swaps the tables
+        self.compactions = 0
+        self.version = 0        # bumped by every change, for replies that list titles
+
+    def __len__(self):
+        return len(self._by_key)
+
+    def __contains__(self, title):
+        return compact(title) in self._by_key
+
+    # ------------------------------------------------------------------
+    # Updates
+    # ------------------------------------------------------------------
+    def _add_word(self, word):
+        grams = set(trigrams(word))
+        self._word_sizes[word] = len(grams)
+        for gram in grams:
+            self._word_grams.setdefault(gram, []).append(word)
+        self._word_sounds.setdefault(phonetic_key(word), set()).add(word)
+
+    def add(self, title, link):
+        """Add a song, or update its link if the title is already indexed."""
+        words = tuple(normalize(title).split())
+        key = "".join(words)
+        if not key:
+            return
+        with self._lock:
+            existing = self._by_key.get(key)
+            if existing is not None:
+                if (self._titles[existing], self._links[existing]) != (title, link):
+                    self._titles[existing] = title
+                    self._links[existing] = link
+                    self.version += 1
+                return
+            entry = len(self._titles)
+            self._titles.append(title)
+            self._links.append(link)
+            self._words.append(words)
+            for word in set(words):
+                posting = self._postings.get(word)
+                if posting is None:
+                    posting = self._postings[word] = []
+                    self._add_word(word)
+                posting.append(entry)
+            self._by_key[key] = entry
+            self.version += 1
+
+    def update(self, songs):
+        """Add every (title, link) pair."""
+        for title, link in songs:
+            self.add(title, link)
+
+    def remove(self, title):
+        """Remove a song. Returns True if it was indexed."""
+        key = compact(title)
+        with self._lock:
+            entry = self._by_key.pop(key, None)
+            if entry is None:
+                return False
+            # Leave the postings in place; lookups skip entries without a title
+            self._titles[entry] = None
+            self._links[entry] = None
+            self._holes += 1
+            self.version += 1
+            if self._holes > self.compact_ratio * len(self._titles):
+                self._compact()
+        return True
+
+    def _compact(self):
+        # Called with the lock held. The new tables are built aside and swapped in
+        # while the generation is odd, so lookups that overlap the swap run again.
+        fresh = MusicIndex(self.min_score, self.max_candidates, self.max_sound_alikes)
+        for title, link in self._items():
+            fresh.add(title, link)
+        self._generation += 1
+        for name in self._TABLES:
+            setattr(self, name, getattr(fresh, name))
+        self._holes = 0
+        self.compactions += 1
+        self._generation += 1
+
+    def _read(self, lookup, *args):
+        # Run a lookup against one consistent set of tables
+        while True:
+            generation = self._generation
+            if generation % 2 == 0:
+                try:
+                    result = lookup(*args)
+                except (IndexError, KeyError):
+                    if generation == self._generation:
+                        raise
+                    continue
+                if generation == self._generation:
+                    return result
+            time.sleep(0)
+
+    def get(self, title):
+        """Link for an exact (normalized) title, or None."""
+        return self._read(self._get, compact(title))
+
+    def _get(self, key):
+        entry = self._by_key.get(key)
+        return None if entry is None else self._links[entry]
+
+    def titles(self, limit=None):
+        """Indexed titles in insertion order."""
+        titles = (title for title in self._titles if title is not None)
+        return list(titles if limit is None else itertools.islice(titles, limit))
+
+    def items(self):
+        return self._read(self._items)
+
+    def _items(self):
+        return [(title, link) for title, link in zip(self._titles, self._links) if title is not None]
+
+    # ------------------------------------------------------------------
+    # Lookup
+    # ------------------------------------------------------------------
+    def similar_words(self, word, limit=5):
+        """
+        Vocabulary words that look or sound like `word`.
+
+        A word missing from the vocabulary is compared by trigrams; sound-alike
+        words are included even for known words, since recognition often turns
+        one real word into another ("bin" for "ban").
+
+        Returns:
+            dict: vocabulary word -> similarity (1.0 for the word itself)
+        """
+        return self._read(self._similar_words, word, limit)
+
+    def _similar_words(self, word, limit=5):
+        # A copy: add() grows these sets while lookups run (copying a set happens in one step)
+        sounds = frozenset(self._word_sounds.get(phonetic_key(word), ()))
+        if word in self._postings:
+            if len(sounds) > self.max_sound_alikes:
+                return {word: 1.0}
+            grams = set(trigrams(word))
+            counts = Counter()
+            for candidate in sounds:
+                counts[candidate] = len(grams.intersection(trigrams(candidate)))
+            similar = {word: 1.0}
+        else:
+            grams = set(trigrams(word))
+            counts = Counter()
+            for gram in grams:
+                counts.update(self._word_grams.get(gram, ()))
+            similar = {}
+            if len(sounds) > self.max_sound_alikes:
+                # A common sound key says little; keep only sound-alikes that also look alike
+                sounds = [c for c in counts if c in sounds]
+        size = len(grams)
+        # A word can only reach min_score if it shares at least this many trigrams
+        needed = self.min_score * size / (2.0 - self.min_score)
+        sizes = self._word_sizes
+        for candidate in [c for c, shared in counts.items() if shared >= needed]:
+            score = 2.0 * counts[candidate] / (size + sizes[candidate])
+            if score >= self.min_score:
+                similar[candidate] = score
+        for candidate in sounds:
+            if candidate != word:
+                # Closer spellings win among words that sound the same
+                dice = 2.0 * counts.get(candidate, 0) / (size + self._word_sizes[candidate])
+                similar[candidate] = max(similar.get(candidate, 0.0), 0.6 + 0.4 * dice)
+        if len(similar) > limit:
+            similar = dict(heapq.nlargest(limit, similar.items(), key=lambda item: item[1]))
+        return similar
+
+    def _candidates(self, expansions):
+        # Titles containing the most selective query word (or something like it),
+        # narrowed by the next word when that is still too many
+        ranked = sorted((sum(len(self._postings[w]) for w in similar), i)
+                        for i, similar in enumerate(expansions) if similar)
+        if not ranked:
+            return set()
+        candidates = set()
+        for word in expansions[ranked[0][1]]:
+            candidates.update(self._postings[word])
+        for _, i in ranked[1:]:
+            if len(candidates) <= self.max_candidates:
+                break
+            narrowed = set()
+            for word in expansions[i]:
+                narrowed.update(self._postings[word])
+            candidates &= narrowed
+        return candidates
+
+    def search(self, query, limit=5):
+        """
+        Best matching songs for a spoken title.
+
+        Args:
+            query (str): What the user asked for
+            limit (int): Maximum number of matches
+
+        Returns:
+            list: SongMatch objects, best first (empty if nothing scores above min_score)
+        """
+        return self._read(self._search, query, limit)
+
+    def _search(self, query, limit):
+        words = normalize(query).split()
+        key = "".join(words)
+        if not key:
+            return []
+        entry = self._by_key.get(key)
+        if entry is not None:
+            title, link = self._titles[entry], self._links[entry]
+            if title is not None:
+                return [SongMatch(title, link, 1.0)]
+
+        matches = self._search_words(words, limit)
+        if len(words) > 1 and (not matches or matches[0].score < 0.8):
+            # The recognizer may have split one word ("check point" for "checkpoint")
+            joined = self._search_words([key], limit)
+            if joined and (not matches or joined[0].score > matches[0].score):
+                matches = joined
+        return matches
+
+    def _search_words(self, words, limit):
+        expansions = [self._similar_words(word) for word in words]
+        scored = []
+        for entry in self._candidates(expansions):
+            title = self._titles[entry]
+            if title is None:
+                continue
+            entry_words = self._words[entry]
+            # Soft word overlap: each query word counts with its best similarity
+            matched = sum(max((similar.get(w, 0.0) for w in entry_words), default=0.0)
+                          for similar in expansions)
+            score = 2.0 * matched / (len(words) + len(entry_words))
+            if score >= self.min_score:
+                scored.append((score, -entry))
+        scored.sort(reverse=True)
+        return [SongMatch(self._titles[-entry], self._links[-entry], score)
+                for score, entry in scored[:limit]]
+
+    def find(self, query):
+        """Best match for a spoken title, or None."""
+        matches = self.search(query, limit=1)
+        return matches[0] if matches else None
+
+    def stats(self):
+        return {
+            "songs": len(self._by_key),
+            "removed": self._holes,
+            "compactions": self.compactions,
+            "words": len(self._postings),
+            "trigrams": len(self._word_grams),
+        }
+
+
+# ----------------------------------------------------------------------
+# Catalog files
+# ----------------------------------------------------------------------
+def load_catalog(path):
+    """
+    Read (title, link) pairs from a JSON, CSV or SQLite catalog.
+
+    Args:
+        path (str): Catalog file; the format is chosen by extension
+            (.json, .csv, .db/.sqlite/.sqlite3)
+
+    Returns:
+        list: (title, link) pairs
+
+    Raises:
+        ValueError: If the extension is not a known catalog format
+        OSError: If the file cannot be read
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".json":
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [(str(title), str(link)) for title, link in data.items()]
+        return [(str(item["title"]), str(item["link"])) for item in data if item.get("title") and item.get("link")]
+    if extension == ".csv":
+        with open(path, encoding="utf-8", newline="") as f:
+            return [(row["title"], row["link"]) for row in csv.DictReader(f) if row.get("title") and row.get("link")]
+    if extension in (".db", ".sqlite", ".sqlite3"):
+        connection = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+        try:
+            return [(title, link) for title, link in connection.execute("SELECT title, link FROM songs")
+                    if title and link]
+        finally:
+            connection.close()
+    raise ValueError(f"Unknown music catalog format: {path}")
+
+
+class CatalogWatcher:
+    """
+    Keeps a MusicIndex in step with a catalog file.
+
+    The file's modification time and size are polled; when they change the
+    catalog is re-read and only added, changed and removed songs are applied
+    to the index. Lookups keep working throughout.
+
+    Args:
+        index (MusicIndex): Index to update
+        path (str): Catalog file
+        interval (float): Seconds between checks
+        base (dict): Built-in title -> link songs restored if the catalog drops them
+    """
+
+    def __init__(self, index, path, interval=2.0, base=None):
+        self.index = index
+        self.path = path
+        self.interval = interval
+        self.base = {compact(title): (title, link) for title, link in (base or {}).items()}
+        self.reloads = 0
+        self.last_reload_ms = None
+        self._songs = {}
+        self._signature = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _stat(self):
+        try:
+            info = os.stat(self.path)
+        except OSError:
+            return None
+        return (info.st_mtime_ns, info.st_size)
+
+    def reload(self):
+        """
+        Re-read the catalog and apply the differences.
+
+        Returns:
+            dict: Counts of added, changed and removed songs (None if the file could not be read)
+        """
+        signature = self._stat()
+        began = time.perf_counter()
+        try:
+            songs = dict(load_catalog(self.path))
+        except (OSError, ValueError, KeyError, sqlite3.Error) as e:
+            # Possibly caught mid-write; the next check tries again
+            print(f"Error reading music catalog {self.path}: {e}")
+            return None
+
+        # Compare raw titles so only the changed songs are normalized and indexed.
+        # Removals go first, so a title that only changed case is re-added.
+        added = changed = removed = 0
+        for title in self._songs:
+            if title in songs:
+                continue
+            removed += 1
+            self.index.remove(title)
+            key = compact(title)
+            if key in self.base:
+                self.index.add(*self.base[key])
+        for title, link in songs.items():
+            previous = self._songs.get(title)
+            if previous == link:
+                continue
+            if previous is None:
+                added += 1
+            else:
+                changed += 1
+            self.index.add(title, link)
+
+        self._songs = songs
+        self._signature = signature
+        self.reloads += 1
+        self.last_reload_ms = (time.perf_counter() - began) * 1000
+        return {"added": added, "changed": changed, "removed": removed}
+
+    def check(self):
+        """Reload if the file changed since the last reload. Returns True if it did."""
+        signature = self._stat()
+        if signature is None or signature == self._signature:
+            return False
+        changes = self.reload()
+        if changes is None:
+            return False
+        print(f"Music catalog reloaded in {self.last_reload_ms:.1f} ms: {changes['added']} added, "
+              f"{changes['changed']} changed, {changes['removed']} removed")
+        return True
+
+    def start(self):
+        """Start polling in the background."""
+        if self._thread is not None:
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="viola-music-watch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(self.interval + 1)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self.check()
+
+    def stats(self):
+        return {
+            "songs": len(self._songs),
+            "reloads": self.reloads,
+            "last_reload_ms": self.last_reload_ms,
+        }
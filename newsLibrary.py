@@ -9,6 +9,9 @@ import requests
 import os
 from dotenv import load_dotenv
 
+import circuit_breaker
+import http_client
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -17,6 +20,84 @@ load_dotenv()
 NEWS_API_KEY = os.getenv('NEWS_API_KEY', 'YOUR_NEWSAPI_KEY')
 NEWS_API_URL = "https://newsapi.org/v2/top-headlines"
 
+class NewsAPIError(Exception):
+    """NewsAPI answered, but with an error status."""
+
+
+def api_key_configured():
+    """Return True if a real NewsAPI key has been set."""
+    return NEWS_API_KEY != "YOUR_NEWSAPI_KEY"
+
+
+def fetch_india_news(language="en"):
+    """
+    Fetch the top 5 India headlines from NewsAPI, raising on failure.
+    
+    Args:
+        language (str): Language code (default: "en" for English)
+    
+    Returns:
+        list: Up to 5 formatted headlines (empty if NewsAPI returned no articles)
+    
+    Raises:
+        requests.exceptions.RequestException: If NewsAPI could not be reached
+        NewsAPIError: If NewsAPI returned an error status
+    """
+    # Use the 'everything' endpoint with query for India news (top-headlines with country=in returns 0 results)
+    params = {
+        "q": "India",
+        "apiKey": NEWS_API_KEY,
+        "pageSize": 5,  # Get top 5 headlines
+        "sortBy": "publishedAt",
+        "language": language
+    }
+    
+    # Make API request
+    response = http_client.get("newsapi", "everything", params=params)
+    response.raise_for_status()  # Raise exception for bad status codes
+    
+    # Parse JSON response
+    data = response.json()
+    
+    # Check if request was successful
+    if data.get("status") != "ok":
+        error_message = data.get("message", "Unknown error occurred")
+        raise NewsAPIError(f"Error fetching news: {error_message}")
+    
+    # Format headlines
+    headlines = []
+    for i, article in enumerate(data.get("articles", [])[:5], 1):
+        title = article.get("title", "No title available")
+        source = article.get("source", {}).get("name", "Unknown source")
+        headline = f"Headline {i}: {title} from {source}"
+        headlines.append(headline)
+    
+    return headlines
+
+
+def news_error_message(error):
+    """
+    Turn an exception from fetch_india_news into a spoken message.
+    
+    Args:
+        error (Exception): The exception that was raised
+    
+    Returns:
+        str: Message suitable for speaking to the user
+    """
+    if isinstance(error, circuit_breaker.CircuitOpenError):
+        return "The news service isn't responding at the moment. Please try again in a few minutes."
+    if isinstance(error, requests.exceptions.Timeout):
+        return "News API request timed out. Please try again later."
+    if isinstance(error, requests.exceptions.ConnectionError):
+        return "Unable to connect to News API. Please check your internet connection."
+    if isinstance(error, requests.exceptions.HTTPError):
+        return f"HTTP Error: {error.response.status_code}. Please check your API key."
+    if isinstance(error, NewsAPIError):
+        return str(error)
+    return f"Error fetching news: {str(error)}"
+
+
 def get_india_news(language="en", country="in", category="general"):
     """
     Fetch top 5 news headlines about India using NewsAPI.
@@ -27,59 +108,22 @@ def get_india_news(language="en", country="in", category="general"):
         category (str): News category - not used with current API
     
     Returns:
-        list: List of top 5 headlines as strings, or empty list if API call fails
+        list: List of top 5 headlines as strings, or an error message in a list if the API call fails
     """
     
     # Check if API key is configured
-    if NEWS_API_KEY == "YOUR_NEWSAPI_KEY":
+    if not api_key_configured():
         return ["Please configure your NewsAPI key in .env file to use this feature."]
     
     try:
-        # Use the 'everything' endpoint with query for India news (top-headlines with country=in returns 0 results)
-        params = {
-            "q": "India",
-            "apiKey": NEWS_API_KEY,
-            "pageSize": 5,  # Get top 5 headlines
-            "sortBy": "publishedAt",
-            "language": language
-        }
-        
-        # Make API request
-        response = requests.get("https://newsapi.org/v2/everything", params=params, timeout=10)
-        response.raise_for_status()  # Raise exception for bad status codes
-        
-        # Parse JSON response
-        data = response.json()
-        
-        # Check if request was successful
-        if data.get("status") != "ok":
-            error_message = data.get("message", "Unknown error occurred")
-            return [f"Error fetching news: {error_message}"]
-        
-        # Extract headlines from articles
-        articles = data.get("articles", [])
-        
-        if not articles:
-            return ["No news articles found."]
-        
-        # Format headlines
-        headlines = []
-        for i, article in enumerate(articles[:5], 1):
-            title = article.get("title", "No title available")
-            source = article.get("source", {}).get("name", "Unknown source")
-            headline = f"Headline {i}: {title} from {source}"
-            headlines.append(headline)
-        
-        return headlines
-    
-    except requests.exceptions.Timeout:
-        return ["News API request timed out. Please try again later."]
-    except requests.exceptions.ConnectionError:
-        return ["Unable to connect to News API. Please check your internet connection."]
-    except requests.exceptions.HTTPError as e:
-        return [f"HTTP Error: {e.response.status_code}. Please check your API key."]
+        headlines = fetch_india_news(language)
     except Exception as e:
-        return [f"Error fetching news: {str(e)}"]
+        return [news_error_message(e)]
+    
+    if not headlines:
+        return ["No news articles found."]
+    
+    return headlines
 
 def setup_api_key(api_key):
     """
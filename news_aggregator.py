@@ -0,0 +1,351 @@
+"""
+News Aggregator for Viola
+Fetches several NewsAPI feeds (categories and sources) in parallel over the
+shared HTTP pool, merges near-identical headlines and ranks the stories.
+
+Duplicate detection uses MinHash signatures of character shingles with an
+LSH band index, so each title is only compared against likely matches.
+
+Configure with environment variables:
+  VIOLA_NEWS_CATEGORIES - extra India topics, one request each, e.g. business,technology (default: none)
+  VIOLA_NEWS_SOURCES    - extra NewsAPI source ids, comma separated (default: none)
+"""
+
+import contextvars
+import os
+import random
+import re
+import threading
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import http_client
+import newsLibrary
+
+
+class NewsFeed:
+    """
+    One NewsAPI request that contributes articles.
+
+    Args:
+        name (str): Label used in stats and logs
+        path (str): NewsAPI path ("everything" or "top-headlines")
+        params (dict): Query parameters (the API key is added when fetching)
+    """
+
+    def __init__(self, name, path, params):
+        self.name = name
+        self.path = path
+        self.params = params
+
+    def __repr__(self):
+        return f"NewsFeed({self.name!r})"
+
+
+def default_feeds(language="en"):
+    """
+    The India feeds Viola reads.
+
+    One feed by default: every feed costs a request per refresh against the
+    100 a day of NewsAPI's free tier. Categories are searched with the
+    everything endpoint, since top-headlines returns nothing for country=in.
+    """
+    feeds = [NewsFeed("india", "everything",
+                      {"q": "India", "sortBy": "publishedAt", "language": language, "pageSize": 20})]
+    categories = os.getenv("VIOLA_NEWS_CATEGORIES", "")
+    for category in filter(None, (c.strip() for c in categories.split(","))):
+        feeds.append(NewsFeed(category, "everything",
+                              {"q": f"India {category}", "sortBy": "publishedAt", "language": language,
+                               "pageSize": 20}))
+    sources = os.getenv("VIOLA_NEWS_SOURCES", "")
+    for source in filter(None, (s.strip() for s in sources.split(","))):
+        feeds.append(NewsFeed(source, "top-headlines", {"sources": source, "pageSize": 20}))
+    return feeds
+
+
+# ----------------------------------------------------------------------
+# Near-duplicate detection
+# ----------------------------------------------------------------------
+_MASK64 = (1 << 64) - 1
+_NON_WORD = re.compile(r"[^a-z0-9]+")
+
+
+def normalize_title(title, source=None):
+    """Lowercase, strip punctuation and a trailing " - Source Name" suffix."""
+    if source and title.endswith(" - " + source):
+        title = title[:-len(source) - 3]
+    return " ".join(_NON_WORD.sub(" ", title.lower()).split())
+
+
+def shingles(text, k=4):
+    """Set of overlapping k-character substrings of text."""
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+class MinHashIndex:
+    """
+    Finds near-duplicate texts by estimated Jaccard similarity of their shingles.
+
+    Signatures have num_perm values split into bands; texts sharing any band
+    are candidates, and a candidate matches if its signatures agree on at
+    least `threshold` of their values.
+
+    Args:
+        threshold (float): Estimated Jaccard similarity counted as a duplicate
+        num_perm (int): Hash functions per signature
+        bands (int): LSH bands (num_perm must be divisible by it)
+        seed (int): Seed for the hash functions, so signatures are reproducible
+    """
+
+    def __init__(self, threshold=0.6, num_perm=64, bands=16, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        rng = random.Random(seed)
+        # Multiply-shift hashing: cheap 64-bit arithmetic instead of a modular prime
+        self._perms = [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(num_perm)]
+        self._buckets = [{} for _ in range(bands)]
+        self._signatures = {}
+
+    def signature(self, text):
+        hashes = [zlib.crc32(s.encode("utf-8")) for s in shingles(text)]
+        return tuple(min([(a * h + b) & _MASK64 for h in hashes]) >> 32 for a, b in self._perms)
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [signature[i * rows:(i + 1) * rows] for i in range(self.bands)]
+
+    def similarity(self, first, second):
+        """Estimated Jaccard similarity of two signatures."""
+        return sum(1 for x, y in zip(first, second) if x == y) / self.num_perm
+
+    def query(self, text, signature=None):
+        """Return the key of the most similar stored text above the threshold, or None."""
+        signature = signature or self.signature(text)
+        candidates = set()
+        for band, key in zip(self._buckets, self._band_keys(signature)):
+            candidates.update(band.get(key, ()))
+        best, best_score = None, self.threshold
+        for candidate in candidates:
+            score = self.similarity(signature, self._signatures[candidate])
+            if score >= best_score:
+                best, best_score = candidate, score
+        return best
+
+    def add(self, key, text, signature=None):
+        signature = signature or self.signature(text)
+        self._signatures[key] = signature
+        for band, band_key in zip(self._buckets, self._band_keys(signature)):
+            band.setdefault(band_key, []).append(key)
+        return signature
+
+    def __len__(self):
+        return len(self._signatures)
+
+
+class Story:
+    """A headline, merged with every near-identical copy from other feeds."""
+
+    def __init__(self, title, source, published_at, feed, rank):
+        self.title = title
+        self.source = source
+        self.published_at = published_at
+        self.feeds = {feed}
+        self.sources = {source}
+        self.copies = 1
+        self.rank = rank  # (feed position, article position) of the title shown
+
+    def merge(self, title, source, published_at, feed, rank):
+        self.copies += 1
+        self.feeds.add(feed)
+        self.sources.add(source)
+        if published_at > self.published_at:
+            self.published_at = published_at
+        if rank < self.rank:
+            # Feeds finish in any order; keep the title from the highest priority feed
+            self.title, self.source, self.rank = title, source, rank
+
+    @property
+    def score(self):
+        # Stories carried by several outlets and feeds rank first
+        return len(self.sources) + len(self.feeds)
+
+    def __repr__(self):
+        return f"Story({self.title!r}, sources={len(self.sources)}, feeds={len(self.feeds)})"
+
+
+class StoryMerger:
+    """
+    Deduplicates articles into stories as feeds arrive.
+
+    Args:
+        threshold (float): Similarity above which two titles are the same story
+        feed_order (list): Feed names in priority order (titles from earlier feeds win)
+    """
+
+    def __init__(self, threshold=0.6, feed_order=()):
+        self.index = MinHashIndex(threshold=threshold)
+        self.priority = {name: i for i, name in enumerate(feed_order)}
+        self.stories = []
+        self.duplicates = 0
+        self._exact = {}
+
+    def add(self, feed, articles):
+        """Merge one feed's (title, source, published_at) tuples."""
+        feed_rank = self.priority.get(feed, len(self.priority))
+        for position, (title, source, published_at) in enumerate(articles):
+            rank = (feed_rank, position)
+            text = normalize_title(title, source)
+            story_id = self._exact.get(text)
+            if story_id is None:
+                signature = self.index.signature(text)
+                story_id = self.index.query(text, signature)
+                if story_id is None:
+                    story_id = len(self.stories)
+                    self.index.add(story_id, text, signature)
+                    self._exact[text] = story_id
+                    self.stories.append(Story(title, source, published_at, feed, rank))
+                    continue
+                self._exact[text] = story_id
+            self.stories[story_id].merge(title, source, published_at, feed, rank)
+            self.duplicates += 1
+
+    def ranked(self):
+        """Stories, most widely reported first, then newest, then feed priority."""
+        return sorted(self.stories, key=lambda s: (-s.score, _descending(s.published_at), s.rank))
+
+
+def _descending(timestamp):
+    # publishedAt is ISO 8601, so negating its characters sorts newest first; undated stories go last
+    if not timestamp:
+        return (1,)
+    return (0,) + tuple(-ord(c) for c in timestamp)
+
+
+# ----------------------------------------------------------------------
+# Aggregation
+# ----------------------------------------------------------------------
+class NewsAggregator:
+    """
+    Parallel multi-feed headline fetcher with deduplication and ranking.
+
+    Args:
+        feeds (list): NewsFeed objects to query (default: default_feeds())
+        threshold (float): Similarity above which two titles are the same story
+        max_workers (int): Parallel requests (default: one per feed)
+    """
+
+    def __init__(self, feeds=None, threshold=0.6, max_workers=None):
+        self.feeds = list(feeds) if feeds is not None else default_feeds()
+        self.threshold = threshold
+        self._executor = ThreadPoolExecutor(max_workers=max_workers or max(1, len(self.feeds)),
+                                            thread_name_prefix="viola-news")
+        self._lock = threading.Lock()
+        self.requests = 0
+        self.failures = 0
+        self.duplicates = 0
+        self.last_latency = {}
+
+    def fetch_feed(self, feed):
+        """Articles from one feed as (title, source, published_at) tuples, raising on failure."""
+        params = dict(feed.params, apiKey=newsLibrary.NEWS_API_KEY)
+        began = time.perf_counter()
+        try:
+            response = http_client.get("newsapi", feed.path, params=params)
+            response.raise_for_status()
+            data = response.json()
+        finally:
+            with self._lock:
+                self.requests += 1
+                self.last_latency[feed.name] = time.perf_counter() - began
+        if data.get("status") != "ok":
+            raise newsLibrary.NewsAPIError(f"Error fetching news: {data.get('message', 'Unknown error occurred')}")
+        articles = []
+        for article in data.get("articles", []):
+            title = article.get("title")
+            if not title or title == "[Removed]":
+                continue
+            source = (article.get("source") or {}).get("name") or "Unknown source"
+            articles.append((title, source, article.get("publishedAt") or ""))
+        return articles
+
+    def fetch_all(self):
+        """
+        Query every feed at once.
+
+        Yields:
+            tuple: (feed, articles, error) for each feed as soon as it finishes
+        """
+        # Each request runs in a copy of the caller's context so it shows up in its trace
+        futures = {self._executor.submit(contextvars.copy_context().run, self.fetch_feed, feed): feed
+                   for feed in self.feeds}
+        for future in as_completed(futures):
+            feed = futures[future]
+            try:
+                yield feed, future.result(), None
+            except Exception as e:
+                with self._lock:
+                    self.failures += 1
+                print(f"News feed {feed.name} failed: {e}")
+                yield feed, [], e
+
+    def merge(self, results):
+        """Deduplicate (feed, articles) pairs into ranked Story objects."""
+        merger = StoryMerger(self.threshold, [feed.name for feed in self.feeds])
+        for feed, articles in results:
+            merger.add(feed.name, articles)
+        self.duplicates += merger.duplicates
+        return merger.ranked()
+
+    def stories(self):
+        """
+        Ranked, deduplicated stories from every feed.
+
+        Each feed is merged while the slower ones are still downloading, so
+        the total time stays close to the slowest single request.
+
+        Raises:
+            Exception: The first feed's error if every feed failed
+        """
+        merger = StoryMerger(self.threshold, [feed.name for feed in self.feeds])
+        errors = []
+        for feed, articles, error in self.fetch_all():
+            if error is not None:
+                errors.append(error)
+            else:
+                merger.add(feed.name, articles)
+        if errors and len(errors) == len(self.feeds):
+            raise errors[0]
+        self.duplicates += merger.duplicates
+        return merger.ranked()
+
+    def headlines(self, limit=5):
+        """Top stories formatted like newsLibrary.fetch_india_news, raising if every feed failed."""
+        return [f"Headline {i}: {story.title} from {story.source}"
+                for i, story in enumerate(self.stories()[:limit], 1)]
+
+    def stats(self):
+        return {
+            "feeds": len(self.feeds),
+            "requests": self.requests,
+            "failures": self.failures,
+            "duplicates": self.duplicates,
+            "slowest_s": max(self.last_latency.values(), default=0.0),
+        }
+
+
+_aggregator = None
+
+
+def get_aggregator():
+    """Return the shared NewsAggregator, creating it on first use."""
+    global _aggregator
+    if _aggregator is None:
+        _aggregator = NewsAggregator()
+    return _aggregator
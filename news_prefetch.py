@@ -0,0 +1,254 @@
+"""
+News Prefetcher for Viola
+Refreshes headlines in the background into a timestamped on-disk cache, so a
+news request is answered immediately instead of waiting on NewsAPI.
+
+Configure with environment variables:
+  VIOLA_NEWS_REFRESH_SECONDS - background refresh interval (default: 900)
+  VIOLA_NEWS_MAX_AGE         - headlines older than this trigger a refresh on request (default: 1800)
+  VIOLA_NEWS_DAILY_QUOTA     - NewsAPI requests allowed per 24 hours (default: 100, the free tier)
+"""
+
+import json
+import os
+import threading
+import time
+
+import circuit_breaker
+import http_client
+import newsLibrary
+import news_aggregator
+
+DEFAULT_CACHE_FILE = os.path.join(
+    os.getenv("VIOLA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".viola", "cache")),
+    "news.json",
+)
+DAY_SECONDS = 24 * 3600
+
+
+class NewsPrefetcher:
+    """
+    Background headline refresher with an on-disk cache and a request budget.
+
+    Args:
+        fetch (callable): Returns a list of headlines, raising on failure
+            (default: newsLibrary.fetch_india_news)
+        cache_file (str): JSON file holding the last good batch and recent request times
+        refresh_interval (float): Seconds between background refreshes
+        max_age (float): Freshness limit; older headlines are refreshed when requested
+        daily_quota (int): Maximum NewsAPI requests in any rolling 24 hours
+        min_interval (float): Never ask NewsAPI more often than this
+        requests_per_fetch (int): NewsAPI requests one call to fetch makes (counted against the quota)
+    """
+
+    def __init__(self, fetch=None, cache_file=DEFAULT_CACHE_FILE,
+                 refresh_interval=float(os.getenv("VIOLA_NEWS_REFRESH_SECONDS", 900)),
+                 max_age=float(os.getenv("VIOLA_NEWS_MAX_AGE", 1800)),
+                 daily_quota=int(os.getenv("VIOLA_NEWS_DAILY_QUOTA", 100)),
+                 min_interval=60, requests_per_fetch=1):
+        self.fetch = fetch or newsLibrary.fetch_india_news
+        self.cache_file = cache_file
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.daily_quota = daily_quota
+        self.min_interval = min_interval
+        self.requests_per_fetch = requests_per_fetch
+        self.headlines = []
+        self.fetched_at = 0.0
+        self.last_error = None
+        self.request_times = []
+        self.refreshes = 0
+        self.failures = 0
+        self.quota_skips = 0
+        self.breaker_skips = 0
+        self._lock = threading.Lock()
+        self._refreshing = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self._load()
+
+    # ------------------------------------------------------------------
+    # Disk cache
+    # ------------------------------------------------------------------
+    def _load(self):
+        try:
+            with open(self.cache_file, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return
+        self.headlines = data.get("headlines", [])
+        self.fetched_at = data.get("fetched_at", 0.0)
+        self.request_times = data.get("requests", [])
+
+    def _save(self):
+        directory = os.path.dirname(self.cache_file)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        tmp_path = self.cache_file + ".tmp"
+        with self._lock:
+            data = {"fetched_at": self.fetched_at, "headlines": self.headlines, "requests": self.request_times}
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(data, f)
+            os.replace(tmp_path, self.cache_file)
+        except OSError as e:
+            print(f"Error saving news cache: {e}")
+
+    # ------------------------------------------------------------------
+    # Refreshing
+    # ------------------------------------------------------------------
+    @property
+    def age(self):
+        """Seconds since the cached headlines were fetched (infinite if there are none)."""
+        if not self.headlines:
+            return float("inf")
+        return time.time() - self.fetched_at
+
+    def requests_left(self):
+        """NewsAPI requests still allowed in the current 24 hour window."""
+        cutoff = time.time() - DAY_SECONDS
+        with self._lock:
+            self.request_times = [t for t in self.request_times if t > cutoff]
+            return self.daily_quota - len(self.request_times)
+
+    def _may_request(self):
+        if self.requests_left() < self.requests_per_fetch:
+            return False
+        with self._lock:
+            last = self.request_times[-1] if self.request_times else 0.0
+        return time.time() - last >= self.min_interval
+
+    def refresh(self, force=False):
+        """
+        Fetch new headlines if the quota allows it.
+
+        Args:
+            force (bool): Ignore the minimum interval (the daily quota still applies)
+
+        Returns:
+            bool: True if new headlines were stored
+        """
+        if not self._refreshing.acquire(blocking=False):
+            # Another refresh is already running; wait for it instead of spending quota
+            with self._refreshing:
+                return False
+        try:
+            if self.requests_left() < self.requests_per_fetch or (not force and not self._may_request()):
+                self.quota_skips += 1
+                return False
+            if http_client.is_open("newsapi"):
+                # The requests would be refused anyway; don't count them against the quota
+                self.breaker_skips += 1
+                self.last_error = circuit_breaker.CircuitOpenError("newsapi is not responding")
+                return False
+            with self._lock:
+                self.request_times.extend([time.time()] * self.requests_per_fetch)
+            try:
+                headlines = self.fetch()
+            except Exception as e:
+                self.failures += 1
+                self.last_error = e
+                print(f"News refresh failed: {e}")
+                self._save()
+                return False
+            if not headlines:
+                self._save()
+                return False
+            with self._lock:
+                self.headlines = headlines
+                self.fetched_at = time.time()
+                self.last_error = None
+            self.refreshes += 1
+            self._save()
+            return True
+        finally:
+            self._refreshing.release()
+
+    def get_headlines(self, max_age=None):
+        """
+        Headlines for a news request, served from the cache whenever possible.
+
+        Fresh headlines are returned immediately. Stale ones are also returned
+        immediately, with a refresh started in the background. Only an empty
+        cache makes the caller wait for NewsAPI. If NewsAPI is unreachable the
+        last good batch is used.
+
+        Args:
+            max_age (float): Freshness limit in seconds (default: self.max_age)
+
+        Returns:
+            list: Headline strings, or a one-item list with an error message
+        """
+        if not newsLibrary.api_key_configured():
+            return ["Please configure your NewsAPI key in .env file to use this feature."]
+
+        max_age = self.max_age if max_age is None else max_age
+        if not self.headlines:
+            self.refresh(force=True)
+        elif self.age > max_age:
+            threading.Thread(target=self.refresh, name="viola-news-refresh", daemon=True).start()
+
+        with self._lock:
+            if self.headlines:
+                return list(self.headlines)
+            error = self.last_error
+        if error is not None:
+            return [newsLibrary.news_error_message(error)]
+        return ["No news articles found."]
+
+    # ------------------------------------------------------------------
+    # Background thread
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start refreshing on a schedule (no-op without an API key)."""
+        if self._thread is not None or not newsLibrary.api_key_configured():
+            return self
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="viola-news-prefetch", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def _run(self):
+        while not self._stop.is_set():
+            if self.age >= self.refresh_interval:
+                self.refresh()
+            # Wake up when the current batch is due for a refresh
+            wait = max(self.min_interval, self.refresh_interval - self.age) if self.headlines else self.min_interval
+            self._stop.wait(min(wait, self.refresh_interval))
+
+    def stats(self):
+        return {
+            "age_s": self.age,
+            "headlines": len(self.headlines),
+            "refreshes": self.refreshes,
+            "failures": self.failures,
+            "quota_skips": self.quota_skips,
+            "breaker_skips": self.breaker_skips,
+            "requests_left": self.requests_left(),
+        }
+
+
+_prefetcher = None
+
+
+def get_prefetcher():
+    """
+    Return the shared NewsPrefetcher, creating it on first use.
+
+    It refreshes from every news_aggregator feed at once, and never more
+    often than the daily quota allows for that many requests.
+    """
+    global _prefetcher
+    if _prefetcher is None:
+        aggregator = news_aggregator.get_aggregator()
+        prefetcher = NewsPrefetcher(fetch=aggregator.headlines, requests_per_fetch=len(aggregator.feeds))
+        prefetcher.refresh_interval = max(prefetcher.refresh_interval,
+                                          DAY_SECONDS * prefetcher.requests_per_fetch / prefetcher.daily_quota)
+        _prefetcher = prefetcher
+    return _prefetcher
@@ -0,0 +1,307 @@
+"""
+Phrase Cache for Viola
+Renders fixed assistant phrases to WAV once and plays the cached audio back,
+so constant replies do not wait on live synthesis. Replies assembled from
+cached clips (see responses.Template) are stitched into one file instead.
+"""
+
+import array
+import hashlib
+import os
+import sys
+import threading
+import wave
+from collections import OrderedDict
+
+DEFAULT_CACHE_DIR = os.path.join(
+    os.getenv("VIOLA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".viola", "cache")),
+    "phrases",
+)
+DEFAULT_MAX_BYTES = 50 * 1024 * 1024  # 50 MB
+
+# Stitching: silence around clips is cut down to this, so words follow on naturally
+JOIN_PAD_SECONDS = 0.04
+SILENCE_PEAK = 200
+
+
+def trim_silence(frames, params, start=True, end=True, pad_seconds=JOIN_PAD_SECONDS):
+    """
+    Cut leading and/or trailing silence from 16-bit WAV frames, keeping a short pad.
+
+    Other sample widths are returned unchanged.
+
+    Args:
+        frames (bytes): Raw frames
+        params (wave._wave_params): The clip's parameters
+
+    Returns:
+        bytes: The trimmed frames
+    """
+    if params.sampwidth != 2 or not frames:
+        return frames
+    samples = array.array("h")
+    samples.frombytes(frames[:len(frames) - len(frames) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    # Look at 10 ms windows rather than single samples, which cross zero all the time
+    window = max(1, params.framerate // 100) * params.nchannels
+    loud = [i for i in range(0, len(samples), window)
+            if max(abs(s) for s in samples[i:i + window]) >= SILENCE_PEAK]
+    if not loud:
+        return frames
+    pad = int(pad_seconds * params.framerate) * params.nchannels
+    first = max(0, loud[0] - pad) if start else 0
+    last = min(len(samples), loud[-1] + window + pad) if end else len(samples)
+    # Keep whole frames
+    first -= first % params.nchannels
+    last -= last % params.nchannels
+    return frames[first * 2:last * 2]
+
+
+class PhraseCache:
+    """
+    On-disk cache of synthesized phrases with LRU size eviction.
+
+    Entries are keyed by text, voice and rate, so changing the voice settings
+    never plays stale audio.
+
+    Args:
+        engine (tts_engine.SpeechEngine): Engine used for rendering and playback
+        cache_dir (str): Directory holding the WAV files
+        max_bytes (int): Total size after which least recently used files are removed
+    """
+
+    def __init__(self, engine, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.engine = engine
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.stitched = 0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # file name -> size, oldest first
+        self._rendering = {}
+        self._load_index()
+
+    def _load_index(self):
+        if not os.path.isdir(self.cache_dir):
+            return
+        files = []
+        for name in os.listdir(self.cache_dir):
+            if not name.endswith(".wav"):
+                continue
+            path = os.path.join(self.cache_dir, name)
+            stat = os.stat(path)
+            files.append((stat.st_mtime, name, stat.st_size))
+        for _, name, size in sorted(files):
+            self._entries[name] = size
+
+    @property
+    def enabled(self):
+        """Cached audio is only useful when the engine can play files."""
+        return self.engine.player.available
+
+    def key(self, text):
+        """Cache key for text with the engine's current voice and rate."""
+        raw = f"{self.engine.voice_id}|{self.engine.rate}|{text}"
+        return hashlib.sha1(raw.encode("utf-8")).hexdigest()
+
+    def path_for(self, text):
+        return os.path.join(self.cache_dir, self.key(text) + ".wav")
+
+    def get(self, text):
+        """
+        Look up the cached audio for text.
+
+        Returns:
+            str: Path to the WAV file, or None if it is not cached
+        """
+        name = self.key(text) + ".wav"
+        with self._lock:
+            if name not in self._entries:
+                self.misses += 1
+                return None
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.exists(path):
+                del self._entries[name]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(name)
+            self.hits += 1
+        try:
+            os.utime(path)  # keeps LRU order across restarts
+        except OSError:
+            pass
+        return path
+
+    def _cached_path(self, name):
+        """Path of a cache entry, or None; unlike get() it leaves the counters alone."""
+        with self._lock:
+            if name not in self._entries:
+                return None
+            path = os.path.join(self.cache_dir, name)
+            if not os.path.exists(path):
+                del self._entries[name]
+                return None
+            self._entries.move_to_end(name)
+            return path
+
+    def stitch(self, clips):
+        """
+        One WAV file of cached clips played back to back.
+
+        The result is cached too, so a reply that repeats (the same time, say)
+        is stitched once.
+
+        Args:
+            clips (list): Clip texts in order, each rendered before (see warm)
+
+        Returns:
+            str: Path to the stitched file, or None if a clip is not cached yet
+                or the clips cannot be joined
+        """
+        name = self.key("\x1f".join(clips)) + ".wav"
+        path = self._cached_path(name)
+        if path is not None:
+            with self._lock:
+                self.hits += 1
+            return path
+        paths = [self._cached_path(self.key(clip) + ".wav") for clip in clips]
+        if not clips or None in paths:
+            with self._lock:
+                self.misses += 1
+            return None
+
+        tmp_path = os.path.join(self.cache_dir, name + ".tmp")
+        final_path = os.path.join(self.cache_dir, name)
+        try:
+            with wave.open(tmp_path, "wb") as out:
+                params = None
+                for i, clip_path in enumerate(paths):
+                    with wave.open(clip_path, "rb") as clip:
+                        clip_params = clip.getparams()
+                        frames = clip.readframes(clip.getnframes())
+                    if params is None:
+                        params = clip_params
+                        out.setparams(params)
+                    elif clip_params[:3] != params[:3]:
+                        raise wave.Error(f"{clips[i]!r} was rendered in a different format")
+                    out.writeframes(trim_silence(frames, params, start=i > 0, end=i < len(paths) - 1))
+            os.replace(tmp_path, final_path)
+        except (wave.Error, EOFError, OSError) as e:
+            print(f"Error stitching phrase: {e}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        with self._lock:
+            self._entries[name] = os.path.getsize(final_path)
+            self.stitched += 1
+        self._evict()
+        return final_path
+
+    def render(self, text, timeout=None):
+        """
+        Synthesize text into the cache on the engine thread and wait for it.
+        Concurrent calls for the same text share one synthesis.
+
+        Returns:
+            str: Path to the cached WAV file, or None if rendering failed
+        """
+        name = self.key(text) + ".wav"
+        with self._lock:
+            if name in self._entries:
+                return os.path.join(self.cache_dir, name)
+            rendering = self._rendering.get(name)
+            if rendering is None:
+                self._rendering[name] = threading.Event()
+        if rendering is not None:
+            # Someone else is rendering the same text; share their file
+            rendering.wait(timeout)
+            with self._lock:
+                return os.path.join(self.cache_dir, name) if name in self._entries else None
+
+        tmp_path = os.path.join(self.cache_dir, name + ".tmp")
+        final_path = os.path.join(self.cache_dir, name)
+        try:
+            job = self.engine.render_async(text, tmp_path)
+            job.wait(timeout)
+            if job.done() and job.error is None and not job.cancelled and os.path.getsize(tmp_path) > 0:
+                os.replace(tmp_path, final_path)
+                with self._lock:
+                    self._entries[name] = os.path.getsize(final_path)
+                self._evict()
+                return final_path
+            if job.error is not None:
+                print(f"Error caching phrase: {job.error}")
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            return None
+        except OSError as e:
+            print(f"Error caching phrase: {e}")
+            return None
+        finally:
+            with self._lock:
+                self._rendering.pop(name).set()
+
+    def warm(self, phrases):
+        """
+        Render every phrase that is not cached yet on a background thread.
+
+        Returns:
+            threading.Thread: The warming thread, or None if cached playback is unavailable
+        """
+        if not self.enabled:
+            return None
+        self.engine.start()
+        phrases = list(phrases)
+
+        def run():
+            for phrase in phrases:
+                self.render(phrase)
+
+        thread = threading.Thread(target=run, name="viola-phrase-cache", daemon=True)
+        thread.start()
+        return thread
+
+    def _evict(self):
+        with self._lock:
+            total = sum(self._entries.values())
+            while total > self.max_bytes and len(self._entries) > 1:
+                name, size = self._entries.popitem(last=False)
+                total -= size
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def speak(self, text, clips=None):
+        """
+        Play text from the cache if possible, otherwise synthesize it live.
+
+        Args:
+            text (str): What to say
+            clips (list): Cached clips that say the same, stitched together when all
+                are rendered (see responses.Template.render)
+
+        Returns:
+            tts_engine.Utterance: The finished utterance
+        """
+        path = None
+        if self.enabled:
+            path = self.stitch(clips) if clips else self.get(text)
+        if path:
+            try:
+                return self.engine.play_file(path, text)
+            except Exception as e:
+                print(f"Error playing cached phrase: {e}")
+        return self.engine.speak(text)
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": sum(self._entries.values()),
+                "hits": self.hits,
+                "misses": self.misses,
+                "stitched": self.stitched,
+            }
@@ -0,0 +1,360 @@
+"""
+Speech Recognition backends for Viola
+Wraps Google, Vosk and Sphinx behind one interface, plus a stub for tests and a
+racing recognizer that asks several backends at once and takes the first confident answer.
+
+Configure with environment variables:
+  VIOLA_STT_BACKENDS  - comma separated backend names, in preference order (default: google)
+  VIOLA_VOSK_MODEL    - path to a Vosk model directory (default: model)
+"""
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+
+import speech_recognition as sr
+
+
+class RecognitionResult:
+    """A transcript with the backend that produced it."""
+
+    def __init__(self, text, confidence, backend, elapsed=0.0):
+        self.text = text
+        self.confidence = confidence
+        self.backend = backend
+        self.elapsed = elapsed
+
+    def __repr__(self):
+        return f"RecognitionResult({self.text!r}, confidence={self.confidence:.2f}, backend={self.backend!r})"
+
+
+class RecognizerBackend:
+    """
+    Base class for speech-to-text backends.
+
+    Subclasses implement `_recognize(audio)` returning (text, confidence) and
+    raise sr.UnknownValueError when nothing intelligible was said.
+
+    Args:
+        timeout (float): Seconds after which the backend's answer is no longer waited for
+    """
+
+    name = "base"
+
+    def __init__(self, timeout=5.0):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.errors = 0
+        self.total_seconds = 0.0
+
+    def recognize(self, audio):
+        """
+        Transcribe audio.
+
+        Returns:
+            RecognitionResult: The transcript and confidence
+
+        Raises:
+            sr.UnknownValueError: If the speech was unintelligible
+            sr.RequestError: If the backend could not be reached
+        """
+        began = time.perf_counter()
+        try:
+            text, confidence = self._recognize(audio)
+        except sr.UnknownValueError:
+            raise
+        except Exception:
+            with self._lock:
+                self.errors += 1
+            raise
+        finally:
+            with self._lock:
+                self.calls += 1
+                self.total_seconds += time.perf_counter() - began
+        return RecognitionResult(text, confidence, self.name, time.perf_counter() - began)
+
+    def transcribe(self, audio):
+        """Transcribe audio and return just the text."""
+        return self.recognize(audio).text
+
+    def _recognize(self, audio):
+        raise NotImplementedError
+
+    def stats(self):
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "errors": self.errors,
+                "avg_ms": self.total_seconds / self.calls * 1000 if self.calls else None,
+            }
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API (online)."""
+
+    name = "google"
+
+    def __init__(self, timeout=5.0, language="en-US"):
+        super().__init__(timeout)
+        self.language = language
+        self.recognizer = sr.Recognizer()
+        # Let the HTTP request itself give up, so a stalled call does not hold a worker forever
+        self.recognizer.operation_timeout = timeout
+
+    def _recognize(self, audio):
+        response = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        alternatives = response.get("alternative") if isinstance(response, dict) else None
+        if not alternatives:
+            raise sr.UnknownValueError()
+        best = alternatives[0]
+        # Google only reports confidence for the top alternative, and not always
+        return best["transcript"], best.get("confidence", 0.8)
+
+
+class SphinxBackend(RecognizerBackend):
+    """CMU PocketSphinx (offline, lower accuracy)."""
+
+    name = "sphinx"
+
+    def __init__(self, timeout=5.0, confidence=0.5):
+        super().__init__(timeout)
+        self.confidence = confidence
+        self.recognizer = sr.Recognizer()
+
+    def _recognize(self, audio):
+        text = self.recognizer.recognize_sphinx(audio)
+        if not text.strip():
+            raise sr.UnknownValueError()
+        # PocketSphinx does not expose a usable confidence through SpeechRecognition
+        return text, self.confidence
+
+
+class VoskBackend(RecognizerBackend):
+    """
+    Vosk / Kaldi (offline).
+
+    Args:
+        model_path (str): Directory of a downloaded Vosk model
+    """
+
+    name = "vosk"
+
+    def __init__(self, timeout=5.0, model_path=None):
+        super().__init__(timeout)
+        self.model_path = model_path or os.getenv("VIOLA_VOSK_MODEL", "model")
+        self._model = None
+
+    @property
+    def model(self):
+        if self._model is None:
+            from vosk import Model, SetLogLevel
+            SetLogLevel(-1)
+            self._model = Model(self.model_path)
+        return self._model
+
+    def start_stream(self, sample_rate):
+        """
+        Recognize audio incrementally as it is captured.
+
+        Returns:
+            VoskStream: feed(bytes) returns the partial transcript so far
+        """
+        from vosk import KaldiRecognizer
+        return VoskStream(KaldiRecognizer(self.model, sample_rate))
+
+    def _recognize(self, audio):
+        from vosk import KaldiRecognizer
+        recognizer = KaldiRecognizer(self.model, 16000)
+        recognizer.SetWords(True)
+        recognizer.AcceptWaveform(audio.get_raw_data(convert_rate=16000, convert_width=2))
+        result = json.loads(recognizer.FinalResult())
+        text = result.get("text", "")
+        if not text:
+            raise sr.UnknownValueError()
+        words = result.get("result") or []
+        confidence = sum(w.get("conf", 0) for w in words) / len(words) if words else 0.5
+        return text, confidence
+
+
+class VoskStream:
+    """Partial results from a Vosk recognizer fed 16-bit mono audio as it arrives."""
+
+    def __init__(self, recognizer):
+        self.recognizer = recognizer
+        self.text = ""
+
+    def feed(self, data):
+        if self.recognizer.AcceptWaveform(data):
+            # Vosk finalized a segment; later partials start after it
+            final = json.loads(self.recognizer.Result()).get("text", "")
+            self.text = (self.text + " " + final).strip()
+            return self.text
+        partial = json.loads(self.recognizer.PartialResult()).get("partial", "")
+        return (self.text + " " + partial).strip()
+
+
+class StubBackend(RecognizerBackend):
+    """
+    Scripted backend for tests and offline replay.
+
+    Args:
+        responses (list or callable): Transcripts to return in order, or a function of the audio;
+            None entries (or return values) mean "could not understand"
+        confidence (float): Confidence reported for every result
+        delay (float): Seconds to sleep before answering
+    """
+
+    name = "stub"
+
+    def __init__(self, responses, confidence=1.0, delay=0.0, timeout=5.0, name=None):
+        super().__init__(timeout)
+        self.responses = responses if callable(responses) else list(responses)
+        self.confidence = confidence
+        self.delay = delay
+        if name:
+            self.name = name
+
+    def _recognize(self, audio):
+        if self.delay:
+            time.sleep(self.delay)
+        if callable(self.responses):
+            text = self.responses(audio)
+        else:
+            with self._lock:
+                text = self.responses.pop(0) if self.responses else None
+        if not text:
+            raise sr.UnknownValueError()
+        return text, self.confidence
+
+
+class RacingRecognizer:
+    """
+    Sends the same audio to several backends concurrently.
+
+    The first result at or above min_confidence wins. If nobody is confident,
+    the most confident answer received before the timeouts is used. A backend
+    that has not answered within its own timeout is ignored.
+
+    Args:
+        backends (list): RecognizerBackend instances, in preference order
+        min_confidence (float): Confidence needed to accept a result immediately
+    """
+
+    name = "race"
+
+    def __init__(self, backends, min_confidence=0.6):
+        if not backends:
+            raise ValueError("RacingRecognizer needs at least one backend")
+        self.backends = list(backends)
+        self.min_confidence = min_confidence
+        self._pool = ThreadPoolExecutor(max_workers=len(self.backends) * 2, thread_name_prefix="viola-stt")
+        self._lock = threading.Lock()
+        self.wins = {backend.name: 0 for backend in self.backends}
+        self.timeouts = {backend.name: 0 for backend in self.backends}
+
+    def recognize(self, audio):
+        """
+        Race all backends on the same AudioData.
+
+        Returns:
+            RecognitionResult: The winning transcript
+
+        Raises:
+            sr.UnknownValueError: If no backend understood the audio
+            sr.RequestError: If every backend failed with a request error
+        """
+        began = time.perf_counter()
+        futures = {self._pool.submit(backend.recognize, audio): backend for backend in self.backends}
+        deadlines = {future: began + backend.timeout for future, backend in futures.items()}
+        pending = set(futures)
+        best = None
+        request_errors = []
+        unintelligible = 0
+
+        try:
+            while pending:
+                now = time.perf_counter()
+                for future in [f for f in pending if deadlines[f] <= now]:
+                    pending.discard(future)
+                    request_errors.append(sr.RequestError(f"{futures[future].name} timed out"))
+                    with self._lock:
+                        self.timeouts[futures[future].name] += 1
+                if not pending:
+                    break
+
+                done, pending = wait(pending, timeout=min(deadlines[f] for f in pending) - now,
+                                     return_when=FIRST_COMPLETED)
+                for future in done:
+                    try:
+                        result = future.result()
+                    except sr.UnknownValueError:
+                        unintelligible += 1
+                        continue
+                    except Exception as e:
+                        request_errors.append(e)
+                        continue
+                    if result.confidence >= self.min_confidence:
+                        return self._win(result)
+                    if best is None or result.confidence > best.confidence:
+                        best = result
+        finally:
+            for future in pending:
+                future.cancel()
+
+        if best is not None:
+            return self._win(best)
+        if not unintelligible and request_errors:
+            raise sr.RequestError(f"All recognizers failed: {request_errors[0]}")
+        raise sr.UnknownValueError()
+
+    def _win(self, result):
+        with self._lock:
+            self.wins[result.backend] += 1
+        return result
+
+    def transcribe(self, audio):
+        """Race the backends and return just the winning text."""
+        return self.recognize(audio).text
+
+    def stats(self):
+        """
+        Per-backend counters.
+
+        Returns:
+            dict: backend name -> calls, errors, average latency, wins and timeouts
+        """
+        with self._lock:
+            return {
+                backend.name: dict(backend.stats(), wins=self.wins[backend.name],
+                                   timeouts=self.timeouts[backend.name])
+                for backend in self.backends
+            }
+
+
+BACKENDS = {
+    "google": GoogleBackend,
+    "sphinx": SphinxBackend,
+    "vosk": VoskBackend,
+}
+
+
+def build_recognizer(names=None, timeout=5.0):
+    """
+    Create the configured recognizer.
+
+    Args:
+        names (list): Backend names; defaults to VIOLA_STT_BACKENDS or just "google"
+        timeout (float): Per-backend timeout in seconds
+
+    Returns:
+        RacingRecognizer: Races the backends (a single backend still gets its timeout enforced)
+    """
+    if names is None:
+        names = [n.strip() for n in os.getenv("VIOLA_STT_BACKENDS", "google").split(",") if n.strip()]
+    unknown = [n for n in names if n not in BACKENDS]
+    if unknown:
+        raise ValueError(f"Unknown speech recognition backend(s): {', '.join(unknown)}")
+    return RacingRecognizer([BACKENDS[name](timeout=timeout) for name in names])
@@ -0,0 +1,615 @@
+"""
+Offline Replay for Viola
+Feeds recorded WAV files or transcript scripts through the real main loop and
+process_command, with a scripted microphone, speech-to-text, speech output and
+browser, and DuckDuckGo / NewsAPI served by the local stub server. Reports
+throughput (commands per second) and per-stage latency, so performance can be
+measured on a headless machine without speakers, a microphone or network access.
+
+Script format (one phrase per line, as it would be heard):
+    # comments and blank lines are ignored
+    viola
+    what is the time
+    viola open youtube
+    ~ viola stop                     <- "~" marks a phrase spoken over Viola (barge-in)
+    clips/weather.wav | what is the weather in delhi
+    clips/viola.wav                  <- transcript from clips/viola.txt, or the file name
+
+Usage:
+    python replay.py benchmarks/replay_commands.txt [--repeat 5] [--direct] [--realtime]
+    python replay.py recordings/                    # every *.wav, with .txt transcripts
+"""
+
+import argparse
+import array
+import contextlib
+import glob
+import io
+import json
+import math
+import os
+import sys
+import tempfile
+import threading
+import time
+import wave
+from collections import Counter
+
+import speech_recognition as sr
+
+import tracing
+
+SAMPLE_RATE = 16000
+SECONDS_PER_WORD = 0.3
+
+# DuckDuckGo answers served by the stub; anything else gets a generic result
+DEFAULT_ANSWERS = {
+    "capital of france": "Paris is the capital and most populous city of France.",
+    "distance from": "The distance is about 1,400 kilometres by road.",
+    "taj mahal": "The Taj Mahal is an ivory-white marble mausoleum in Agra, India.",
+}
+
+
+class Phrase:
+    """One captured phrase: its audio, what was said, and whether Viola was talking over it."""
+
+    def __init__(self, transcript, audio=None, during_speech=False, source=None):
+        self.transcript = transcript
+        self.audio = audio if audio is not None else synthetic_audio(transcript)
+        self.during_speech = during_speech
+        self.source = source
+
+    @property
+    def is_command(self):
+        """Whether this phrase carries a command (rather than just the wake word or a barge-in)."""
+        import async_runtime
+        return not self.during_speech and bool(async_runtime.strip_wake_word(self.transcript.strip()))
+
+    @property
+    def seconds(self):
+        return len(self.audio.frame_data) / float(self.audio.sample_rate * self.audio.sample_width)
+
+
+def synthetic_audio(text, sample_rate=SAMPLE_RATE):
+    """
+    A voiced tone about as long as `text` takes to say, so the energy gate and
+    capture timing see realistic audio.
+
+    Returns:
+        sr.AudioData: 16-bit mono audio
+    """
+    seconds = 0.2 + SECONDS_PER_WORD * max(1, len(text.split()))
+    samples = array.array("h", (int(3000 * math.sin(2 * math.pi * 220 * i / sample_rate))
+                                for i in range(int(seconds * sample_rate))))
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return sr.AudioData(samples.tobytes(), sample_rate, 2)
+
+
+def load_wav(path, transcript=None):
+    """
+    Load a recording; the transcript comes from a .txt file next to it, or the file name.
+
+    Returns:
+        Phrase: The recorded phrase
+    """
+    if transcript is None:
+        sidecar = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(sidecar):
+            with open(sidecar, encoding="utf-8") as f:
+                transcript = f.read().strip()
+        else:
+            transcript = os.path.splitext(os.path.basename(path))[0].replace("_", " ").replace("-", " ")
+    with sr.AudioFile(path) as source:
+        audio = sr.Recognizer().record(source)
+    return Phrase(transcript, audio, source=path)
+
+
+def load_script(path):
+    """
+    Read a replay script, or every WAV file in a directory.
+
+    Args:
+        path (str): Script file or directory of recordings
+
+    Returns:
+        list: Phrase objects in the order they are heard
+    """
+    if os.path.isdir(path):
+        return [load_wav(wav) for wav in sorted(glob.glob(os.path.join(path, "*.wav")))]
+    base = os.path.dirname(os.path.abspath(path))
+    with open(path, encoding="utf-8") as f:
+        return parse_script(f.read(), base)
+
+
+def parse_script(text, base="."):
+    """Parse script text (see the module docstring) into phrases."""
+    phrases = []
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        during_speech = line.startswith("~")
+        if during_speech:
+            line = line[1:].strip()
+        name, _, transcript = line.partition("|")
+        name = name.strip()
+        if name.lower().endswith(".wav"):
+            phrase = load_wav(os.path.join(base, name), transcript.strip() or None)
+            phrase.during_speech = during_speech
+        else:
+            phrase = Phrase(line, during_speech=during_speech)
+        phrases.append(phrase)
+    return phrases
+
+
+# ----------------------------------------------------------------------
+# Fakes for the devices and services Viola talks to
+# ----------------------------------------------------------------------
+class ReplaySession:
+    """
+    Stands in for audio_capture.CaptureSession, handing out the scripted phrases.
+
+    Args:
+        phrases (list): Phrase objects
+        realtime (bool): Wait as long as each phrase takes to say before handing it
+            out, like a microphone; otherwise phrases arrive as fast as they are read
+        speculator (speculation.Speculator): Given word-by-word partial transcripts of each
+            phrase while it is "spoken", as a streaming recognizer would produce them
+        before_barge_in (callable): Called with the number of commands said so far before a
+            phrase said over Viola is handed out, so it can wait for the answer it interrupts
+    """
+
+    def __init__(self, phrases, realtime=False, speculator=None, before_barge_in=None):
+        self.phrases = list(phrases)
+        self.realtime = realtime
+        self.speculator = speculator
+        self.before_barge_in = before_barge_in
+        self.recognizer = sr.Recognizer()
+        self.phrases_captured = 0
+        self.listening_seconds = 0.0
+        self._next = 0
+        self._lock = threading.Lock()
+        self._running = threading.Event()
+        self._running.set()
+
+    @property
+    def running(self):
+        return self._running.is_set()
+
+    def start(self):
+        return self
+
+    def stop(self):
+        self._running.clear()
+
+    def get_phrase(self, timeout=None):
+        with self._lock:
+            phrase = self.phrases[self._next] if self._next < len(self.phrases) else None
+            said = self.phrases[:self._next]
+            self._next += phrase is not None
+        if phrase is None:
+            # Script finished, like a microphone being unplugged; the runtime drains and stops
+            self._running.clear()
+            raise sr.WaitTimeoutError("Capture session is not running")
+        if phrase.during_speech and self.before_barge_in is not None:
+            self.before_barge_in(sum(1 for p in said if p.is_command))
+        if self.speculator is not None:
+            self._speak_partials(phrase)
+        elif self.realtime:
+            time.sleep(phrase.seconds)
+        self.phrases_captured += 1
+        self.listening_seconds += phrase.seconds
+        return phrase.audio, phrase.during_speech
+
+    def _speak_partials(self, phrase):
+        words = phrase.transcript.split()
+        pause = phrase.seconds / (len(words) + 1) if self.realtime else 0.0
+        for i in range(1, len(words) + 1):
+            time.sleep(pause)
+            self.speculator.observe(" ".join(words[:i]))
+        # The trailing silence before the end of the phrase is detected
+        time.sleep(pause)
+        self.speculator.observe(phrase.transcript)
+        self.speculator.end_utterance()
+
+    def stats(self):
+        return {
+            "calibration_s": 0.0,
+            "listening_s": self.listening_seconds,
+            "captured": self.phrases_captured,
+            "dropped": 0,
+            "echo_discarded": 0,
+            "buffered": len(self.phrases) - self._next,
+            "energy_threshold": self.recognizer.energy_threshold,
+        }
+
+
+class ScriptedSpeechDriver:
+    """
+    pyttsx3-compatible engine that "speaks" by recording text.
+
+    Rendered files are WAVs whose 8-bit frames are the text itself, which
+    ScriptedPlayer reads back, so cached phrases (and replies stitched from
+    cached clips) show up in the transcript too.
+
+    Args:
+        spoken (list): Shared list the spoken text is appended to
+        seconds_per_char (float): Simulated speaking time (0 answers instantly)
+    """
+
+    def __init__(self, spoken, seconds_per_char=0.0):
+        self.spoken = spoken
+        self.seconds_per_char = seconds_per_char
+        self.properties = {"voices": []}
+        self.callbacks = {}
+        self.pending = []
+        self.stopped = threading.Event()
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def connect(self, topic, callback):
+        self.callbacks[topic] = callback
+
+    def say(self, text):
+        self.pending.append((text, None))
+
+    def save_to_file(self, text, path):
+        self.pending.append((text, path))
+
+    def runAndWait(self):
+        self.stopped.clear()
+        pending, self.pending = self.pending, []
+        for text, path in pending:
+            if path is not None:
+                with wave.open(path, "wb") as f:
+                    f.setnchannels(1)
+                    f.setsampwidth(1)
+                    f.setframerate(8000)
+                    f.writeframes(text.encode("utf-8") + b" ")
+                continue
+            self.callbacks["started-utterance"]("utterance")
+            self.spoken.append(text)
+            if self.stopped.wait(self.seconds_per_char * len(text)):
+                break
+
+    def stop(self):
+        self.stopped.set()
+
+
+class ScriptedPlayer:
+    """Plays cached phrases by appending the text stored in the file's frames."""
+
+    available = True
+
+    def __init__(self, spoken, seconds_per_char=0.0):
+        self.spoken = spoken
+        self.seconds_per_char = seconds_per_char
+        self._stopped = threading.Event()
+
+    def play(self, path):
+        with wave.open(path, "rb") as f:
+            text = f.readframes(f.getnframes()).decode("utf-8").strip()
+        self._stopped.clear()
+        self.spoken.append(text)
+        self._stopped.wait(self.seconds_per_char * len(text))
+
+    def stop(self):
+        self._stopped.set()
+
+
+class ScriptedBrowser:
+    """Records the URLs Viola would open."""
+
+    def __init__(self):
+        self.opened = []
+
+    def open(self, url, new=0, autoraise=True):
+        self.opened.append(url)
+        return True
+
+
+class ReplayEnvironment:
+    """
+    Points main and its services at fakes for the length of a replay.
+
+    On entry the stub server is started and DuckDuckGo / NewsAPI point at it,
+    and main's speech engine, phrase cache, browser, news prefetcher and search
+    cache are swapped for scripted or temporary ones. Everything is restored on exit.
+
+    Args:
+        answers (dict): DuckDuckGo query substring -> answer text
+        headlines (list): (title, source) pairs served as news
+        http_delay (float): Seconds the stub server waits before every response
+        seconds_per_char (float): Simulated speaking time per character (0 is instant)
+        fault_rate (float): Fraction of stub requests answered with 503 (see StubServer.inject_fault)
+        knowledge (knowledge_index.KnowledgeIndex): Offline index searched before the stub
+            DuckDuckGo (default: none, whatever VIOLA_KNOWLEDGE_INDEX says)
+    """
+
+    def __init__(self, answers=None, headlines=None, http_delay=0.0, seconds_per_char=0.0, fault_rate=0.0,
+                 knowledge=None):
+        self.answers = DEFAULT_ANSWERS if answers is None else answers
+        self.headlines = headlines
+        self.http_delay = http_delay
+        self.fault_rate = fault_rate
+        self.knowledge = knowledge
+        self.seconds_per_char = seconds_per_char
+        self.spoken = []
+        self.browser = ScriptedBrowser()
+        self.server = None
+        self.engine = None
+        self.speculator = None
+        self._stack = None
+
+    def __enter__(self):
+        import duckduckgo_library
+        import http_client
+        import knowledge_index
+        import main
+        import newsLibrary
+        import news_aggregator
+        import news_prefetch
+        import phrase_cache
+        import speculation
+        import stub_server
+        import ttl_cache
+        import tts_engine
+
+        stack = contextlib.ExitStack()
+        self._stack = stack
+        directory = stack.enter_context(tempfile.TemporaryDirectory(prefix="viola-replay-"))
+
+        self.server = stack.enter_context(stub_server.StubServer({
+            "/": stub_server.duckduckgo_route(self.answers),
+            "/top-headlines": stub_server.newsapi_route(self.headlines),
+            "/everything": stub_server.newsapi_route(self.headlines),
+        }, delay=self.http_delay))
+        if self.fault_rate:
+            self.server.inject_fault(rate=self.fault_rate)
+        stack.enter_context(http_client.override_endpoint("duckduckgo", self.server.url))
+        stack.enter_context(http_client.override_endpoint("newsapi", self.server.url))
+
+        self.engine = tts_engine.SpeechEngine(
+            engine_factory=lambda: ScriptedSpeechDriver(self.spoken, self.seconds_per_char),
+            player=ScriptedPlayer(self.spoken, self.seconds_per_char)).start()
+        stack.callback(self.engine.shutdown)
+
+        speculator = self.speculator = speculation.Speculator(
+            main.speculative_query, main.search,
+            normalize=lambda query: duckduckgo_library.cache.normalize(query))
+
+        aggregator = news_aggregator.NewsAggregator(news_aggregator.default_feeds())
+        prefetcher = news_prefetch.NewsPrefetcher(fetch=aggregator.headlines,
+                                                  cache_file=os.path.join(directory, "news.json"),
+                                                  requests_per_fetch=len(aggregator.feeds))
+        replacements = [
+            (newsLibrary, "NEWS_API_KEY", "replay-stub-key-0000"),
+            (tts_engine, "_default_engine", self.engine),
+            (main, "_phrases", phrase_cache.PhraseCache(self.engine, os.path.join(directory, "phrases"))),
+            (main, "webbrowser", self.browser),
+            (news_prefetch, "_prefetcher", prefetcher),
+            (main, "_speculator", speculator),
+            (knowledge_index, "_index", self.knowledge),
+            (duckduckgo_library, "cache", ttl_cache.TTLCache(ttl=duckduckgo_library.cache.ttl)),
+        ]
+        for module, name, value in replacements:
+            stack.callback(setattr, module, name, getattr(module, name))
+            setattr(module, name, value)
+
+        # Fixed replies and clips are pre-rendered at startup, as in main.start_background_services
+        warming = main.get_phrase_cache().warm(main.fixed_phrases() + main.responses.clip_texts())
+        if warming is not None:
+            warming.join()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self._stack.close()
+        return False
+
+
+# ----------------------------------------------------------------------
+# Replay
+# ----------------------------------------------------------------------
+def run_loop(phrases, realtime=False, stt_delay=0.0, speculate=True):
+    """
+    Replay phrases through async_runtime.VoiceRuntime and main.process_command,
+    exactly as main() wires them, with a scripted microphone and speech-to-text.
+
+    Returns:
+        tuple: (intent names in completion order, runtime stats, seconds elapsed)
+    """
+    import asyncio
+    import async_runtime
+    import main
+    import recognizers
+    import wake_word
+
+    transcripts = {id(phrase.audio): phrase.transcript for phrase in phrases}
+    intents = []
+    progress = threading.Condition()
+    started, finished = [0], [0]
+
+    def before_barge_in(commands_said):
+        # Talk over the last command's answer, not over whichever command happens to be
+        # speaking: wait until it has started and the ones before it have finished
+        with progress:
+            progress.wait_for(lambda: started[0] >= commands_said and finished[0] >= commands_said - 1, 10)
+
+    def handle_command(command):
+        with progress:
+            started[0] += 1
+            progress.notify_all()
+        try:
+            intents.append(main.process_command(command).intent)
+        finally:
+            with progress:
+                finished[0] += 1
+                progress.notify_all()
+
+    session = ReplaySession(phrases, realtime=realtime, speculator=main.get_speculator() if speculate else None,
+                            before_barge_in=before_barge_in)
+    stt = recognizers.StubBackend(lambda audio: transcripts.get(id(audio)), delay=stt_delay, name="replay")
+    wake = wake_word.WakeWordStage(wake_word.CloudWakeWord(stt.transcribe), gate=wake_word.EnergyGate())
+
+    runtime = async_runtime.VoiceRuntime(session, wake, stt, handle_command, main.speak, main.stop_speaking)
+    began = time.perf_counter()
+    asyncio.run(runtime.run())
+    elapsed = time.perf_counter() - began
+    session.stop()
+    return intents, runtime.stats(), elapsed
+
+
+def run_direct(phrases):
+    """
+    Call main.process_command for each command line in turn, skipping the wake
+    word and the microphone. Measures the skills on their own.
+
+    Returns:
+        tuple: (intent names, stats, seconds elapsed)
+    """
+    import async_runtime
+    import main
+
+    commands = []
+    for phrase in phrases:
+        command = async_runtime.strip_wake_word(phrase.transcript.strip())
+        if "stop listening" in command.lower():
+            break
+        if command and not phrase.during_speech and not async_runtime.STOP_WORDS.match(command.lower()):
+            commands.append(command)
+
+    intents = []
+    began = time.perf_counter()
+    for command in commands:
+        interaction = tracing.tracer.interaction("command", command=command)
+        with tracing.activate(interaction):
+            intents.append(main.process_command(command).intent)
+        if interaction is not None:
+            interaction.finish()
+    elapsed = time.perf_counter() - began
+    return intents, {"commands": len(intents), "barge_ins": 0, "running": 0}, elapsed
+
+
+def replay(phrases, direct=False, realtime=False, stt_delay=0.0, http_delay=0.0,
+           repeat=1, trace_file=None, verbose=False, speculate=True, **env_options):
+    """
+    Replay phrases and measure Viola end to end.
+
+    Args:
+        phrases (list): Phrase objects (see load_script)
+        direct (bool): Call process_command directly instead of running the main loop
+        realtime (bool): Pace phrases and speech like a real conversation
+        stt_delay (float): Simulated speech-to-text latency in seconds
+        http_delay (float): Simulated network latency in seconds
+        repeat (int): Times to play the script
+        trace_file (str): Also append every traced interaction to this JSON lines file
+        verbose (bool): Show Viola's console output
+        speculate (bool): Feed partial transcripts to main's speculator (loop mode only)
+
+    Returns:
+        dict: Throughput, per-intent counts, per-stage latency percentiles, what was said and opened
+    """
+    import http_client
+
+    seconds_per_char = 1 / 15.0 if realtime else 0.0  # ~150 words per minute
+    was_enabled = tracing.tracer.enabled
+    if not was_enabled:
+        tracing.tracer.enable(trace_file)
+    tracing.tracer.reset()
+    output = contextlib.nullcontext() if verbose else contextlib.redirect_stdout(io.StringIO())
+    try:
+        with output, ReplayEnvironment(http_delay=http_delay, seconds_per_char=seconds_per_char,
+                                       **env_options) as env:
+            intents, elapsed, runs = [], 0.0, []
+            for _ in range(repeat):
+                if direct:
+                    names, stats, seconds = run_direct(phrases)
+                else:
+                    names, stats, seconds = run_loop(phrases, realtime=realtime, stt_delay=stt_delay,
+                                                     speculate=speculate)
+                intents.extend(names)
+                elapsed += seconds
+                runs.append(stats)
+            requests = env.server.request_count()
+            speculation = env.speculator.stats()
+            endpoints = http_client.stats()
+        stages = tracing.tracer.summary()
+    finally:
+        if not was_enabled:
+            tracing.tracer.disable()
+            tracing.tracer.reset()
+
+    return {
+        "mode": "direct" if direct else "loop",
+        "phrases": len(phrases) * repeat,
+        "commands": len(intents),
+        "seconds": elapsed,
+        "commands_per_sec": len(intents) / elapsed if elapsed else 0.0,
+        "barge_ins": sum(stats["barge_ins"] for stats in runs),
+        "intents": dict(Counter(intents)),
+        "stages": stages,
+        "http_requests": requests,
+        "speculation": speculation,
+        "endpoints": endpoints,
+        "spoken": env.spoken,
+        "opened": env.browser.opened,
+    }
+
+
+def format_report(report):
+    """The replay report as a printable table."""
+    lines = [
+        f"Replay ({report['mode']}): {report['commands']} commands from {report['phrases']} phrases "
+        f"in {report['seconds']:.2f}s = {report['commands_per_sec']:.1f} commands/sec",
+        "Intents: " + ", ".join(f"{name} {count}" for name, count in sorted(report["intents"].items())),
+        f"Barge-ins: {report['barge_ins']}, stub HTTP requests: {report['http_requests']}, "
+        f"phrases spoken: {len(report['spoken'])}, pages opened: {len(report['opened'])}",
+        f"Speculative lookups: {report['speculation']['launched']} started, {report['speculation']['hits']} hits "
+        f"({report['speculation']['hit_rate']:.0%} of searches), {report['speculation']['wasted']} wasted",
+        "Circuits: " + ", ".join(f"{name} {endpoint['state']} (opened {endpoint['opened']}x, "
+                                 f"{endpoint['rejected']} refused, timeout {endpoint['timeout_s']:.1f}s)"
+                                 for name, endpoint in sorted(report["endpoints"].items())),
+        f"{'stage':<24} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+    ]
+    for name in sorted(report["stages"]):
+        stats = report["stages"][name]
+        lines.append(f"{name:<24} {stats['count']:>6} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}")
+    return "\n".join(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded phrases through Viola with fake devices and services")
+    parser.add_argument("script", help="Transcript script, or a directory of WAV recordings")
+    parser.add_argument("--direct", action="store_true", help="Call process_command directly (no wake word or runtime)")
+    parser.add_argument("--realtime", action="store_true", help="Pace the microphone and speech like a real session")
+    parser.add_argument("--repeat", type=int, default=1, help="Times to play the script")
+    parser.add_argument("--stt-delay", type=float, default=0.0, help="Simulated speech-to-text seconds")
+    parser.add_argument("--http-delay", type=float, default=0.0, help="Simulated network seconds")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="Fraction of stub requests that fail with 503")
+    parser.add_argument("--trace", metavar="FILE", help="Append every interaction to a JSON lines file")
+    parser.add_argument("--json", action="store_true", help="Print the report as JSON")
+    parser.add_argument("--verbose", action="store_true", help="Show Viola's console output")
+    parser.add_argument("--no-speculate", action="store_true", help="Do not look answers up from partial transcripts")
+    args = parser.parse_args(argv)
+
+    phrases = load_script(args.script)
+    if not phrases:
+        print(f"No phrases found in {args.script}")
+        return 1
+    report = replay(phrases, direct=args.direct, realtime=args.realtime, stt_delay=args.stt_delay,
+                    http_delay=args.http_delay, repeat=args.repeat, trace_file=args.trace, verbose=args.verbose,
+                    speculate=not args.no_speculate, fault_rate=args.fault_rate)
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(format_report(report))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
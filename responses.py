@@ -0,0 +1,148 @@
+"""
+Response templates for Viola
+Replies are split into their constant wording and slots once, up front.
+The constant parts, and the small vocabulary the slots are drawn from (hour
+and minute words for the time), are pre-rendered like the fixed phrases, so
+the most frequent answers are stitched together from cached clips (see
+phrase_cache.PhraseCache.stitch) instead of synthesized on every request.
+
+  Template - reply wording with slots, e.g. Template("The time is {time}")
+  Slot     - a slot value: the text shown and the clips it is spoken with
+  clock()  - the time of day as a Slot ("03:22 PM" -> "three", "twenty two", "PM")
+  Reply    - a reply listing data that rarely changes, rebuilt only when it does
+"""
+
+import string
+import threading
+from collections import namedtuple
+
+_ONES = ["zero", "one", "two", "three", "four", "five", "six", "seven", "eight", "nine",
+         "ten", "eleven", "twelve", "thirteen", "fourteen", "fifteen", "sixteen",
+         "seventeen", "eighteen", "nineteen"]
+_TENS = {2: "twenty", 3: "thirty", 4: "forty", 5: "fifty"}
+
+
+def number_words(n):
+    """Words for 0-59 as a clock reads them ("twenty two")."""
+    if n < 20:
+        return _ONES[n]
+    tens, ones = divmod(n, 10)
+    return _TENS[tens] if ones == 0 else f"{_TENS[tens]} {_ONES[ones]}"
+
+
+# Everything a time answer is made of, computed once
+HOUR_WORDS = [None] + [number_words(h) for h in range(1, 13)]
+MINUTE_WORDS = ["o'clock"] + [f"oh {_ONES[m]}" for m in range(1, 10)] + [number_words(m) for m in range(10, 60)]
+MERIDIEM_WORDS = ["AM", "PM"]
+
+Slot = namedtuple("Slot", "text clips")
+
+
+class Template:
+    """
+    Reply wording with named slots, parsed once.
+
+    Args:
+        pattern (str): str.format-style wording, e.g. "The time is {time}"
+    """
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self._parts = [(literal, field) for literal, field, _, _ in string.Formatter().parse(pattern)]
+
+    @property
+    def constants(self):
+        """The fixed wording as clips ("The time is")."""
+        return [clip for clip in (_clip(literal) for literal, _ in self._parts) if clip]
+
+    def render(self, **slots):
+        """
+        Fill the slots.
+
+        Args:
+            **slots: Slot values, or plain strings (spoken as one clip)
+
+        Returns:
+            tuple: (text to show and log, list of clips to speak in order)
+        """
+        text = []
+        clips = []
+        for literal, field in self._parts:
+            text.append(literal)
+            clip = _clip(literal)
+            if clip:
+                clips.append(clip)
+            if field is None:
+                continue
+            value = slots[field]
+            if isinstance(value, Slot):
+                text.append(value.text)
+                clips.extend(value.clips)
+            else:
+                text.append(str(value))
+                clips.append(str(value))
+        return "".join(text), clips
+
+
+def _clip(literal):
+    # Spacing and punctuation between slots are not worth a clip of their own
+    literal = literal.strip()
+    return literal if any(c.isalnum() for c in literal) else ""
+
+
+def clock(now):
+    """
+    The time of day as a slot.
+
+    Args:
+        now (datetime.datetime or datetime.time): The time to say
+
+    Returns:
+        Slot: "03:22 PM" spoken as ("three", "twenty two", "PM")
+    """
+    hour = now.hour % 12 or 12
+    return Slot(now.strftime("%I:%M %p"),
+                (HOUR_WORDS[hour], MINUTE_WORDS[now.minute], MERIDIEM_WORDS[now.hour >= 12]))
+
+
+TIME = Template("The time is {time}")
+
+
+def clip_texts():
+    """
+    Every clip the templated replies can be stitched from, worth pre-rendering.
+
+    Returns:
+        list: Clip strings
+    """
+    clips = TIME.constants + HOUR_WORDS[1:] + MINUTE_WORDS + MERIDIEM_WORDS
+    return list(dict.fromkeys(clips))
+
+
+class Reply:
+    """
+    A reply built from data that rarely changes, such as the song list.
+
+    Args:
+        build (callable): Returns the reply text
+        version (callable): Returns a value that changes whenever build() would
+    """
+
+    def __init__(self, build, version):
+        self.build = build
+        self.version = version
+        self.builds = 0
+        self._cached = None  # (version, text)
+        self._lock = threading.Lock()
+
+    def get(self):
+        """The reply, rebuilt only if the data changed since last time."""
+        version = self.version()
+        cached = self._cached
+        if cached is not None and cached[0] == version:
+            return cached[1]
+        with self._lock:
+            if self._cached is None or self._cached[0] != version:
+                self._cached = (version, self.build())
+                self.builds += 1
+            return self._cached[1]
@@ -0,0 +1,383 @@
+"""
+Viola server
+Serves many rooms or devices from one process. Clients send commands as
+text or recorded audio over HTTP and get back what Viola would have said
+(optionally as audio too) and any URLs to open.
+
+Each client has its own sessions.ClientSession, so nothing a command
+produces leaks to another client. Commands of one session run in order,
+different sessions run concurrently. The answer caches (DuckDuckGo, news,
+rendered phrases) and the pooled HTTP session are shared by every session.
+
+Endpoints (JSON bodies and responses):
+    POST   /sessions/<id>/command  {"text": "what is the time", "audio": false}
+                                   or a WAV body (Content-Type: audio/wav), recognized first
+        -> {"session", "command", "intent", "replies", "open", "audio", "ms"}
+    DELETE /sessions/<id>          forget a session
+    GET    /stats                  sessions, commands, latency percentiles and cache counters
+
+Usage:
+    python server.py [--host 127.0.0.1] [--port 8765] [--workers 64]
+    python benchmarks/server_load.py --sessions 300   # load test
+"""
+
+import argparse
+import asyncio
+import base64
+import contextlib
+import contextvars
+import functools
+import io
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import unquote, urlsplit
+
+import sessions
+import tracing
+
+DEFAULT_PORT = 8765
+MAX_BODY_BYTES = 10 * 1024 * 1024
+REASONS = {200: "OK", 400: "Bad Request", 404: "Not Found", 405: "Method Not Allowed",
+           413: "Payload Too Large", 500: "Internal Server Error"}
+
+_COMMAND_PATH = re.compile(r"^/sessions/(?P<id>[^/]+)/command$")
+_SESSION_PATH = re.compile(r"^/sessions/(?P<id>[^/]+)$")
+
+
+class HTTPError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)]
+
+
+class ViolaServer:
+    """
+    asyncio HTTP/1.1 server (keep-alive) running Viola commands per session.
+
+    Connections are handled on the event loop; commands, speech-to-text and
+    audio rendering run on a thread pool, in a copy of the request's context
+    so the session and trace stay current.
+
+    Args:
+        host (str): Interface to listen on
+        port (int): Port to listen on (0 picks a free one)
+        workers (int): Commands allowed to run at once across all sessions
+        store (sessions.SessionStore): Session registry (default: a new one)
+        stt: Recognizer with transcribe(audio) for recorded commands
+            (default: recognizers.build_recognizer(), created on first use)
+        history (int): Recent command latencies kept for the percentiles
+    """
+
+    def __init__(self, host="127.0.0.1", port=DEFAULT_PORT, workers=64, store=None, stt=None, history=2000):
+        self.host = host
+        self.port = port
+        self.workers = workers
+        self.store = store or sessions.SessionStore()
+        self.commands = 0
+        self.errors = 0
+        self.in_flight = 0
+        self._latencies = deque(maxlen=history)
+        self._session_locks = {}
+        self._stt = stt
+        self._loop = None
+        self._server = None
+        self._executor = None
+        self._thread = None
+        self._ready = threading.Event()
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    async def serve(self):
+        """Listen until cancelled (or stop() is called)."""
+        self._loop = asyncio.get_running_loop()
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="viola-server")
+        self._server = await asyncio.start_server(self._connection, self.host, self.port, backlog=1024)
+        self.port = self._server.sockets[0].getsockname()[1]
+        self._ready.set()
+        try:
+            async with self._server:
+                await self._server.serve_forever()
+        except asyncio.CancelledError:
+            pass
+        finally:
+            self._executor.shutdown(wait=False)
+
+    def start(self):
+        """Serve on a background thread (tests, benchmarks). Returns once listening."""
+        self._ready.clear()
+        self._thread = threading.Thread(target=asyncio.run, args=(self.serve(),), name="viola-server-loop",
+                                        daemon=True)
+        self._thread.start()
+        self._ready.wait(10)
+        return self
+
+    def stop(self):
+        if self._loop is not None and self._server is not None:
+            self._loop.call_soon_threadsafe(self._server.close)
+        if self._thread is not None:
+            self._thread.join(5)
+            self._thread = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def url(self):
+        return f"http://{self.host}:{self.port}/"
+
+    async def _blocking(self, func, *args):
+        # Run in a copy of this task's context so the thread sees the current session and trace
+        context = contextvars.copy_context()
+        return await self._loop.run_in_executor(self._executor, functools.partial(context.run, func, *args))
+
+    # ------------------------------------------------------------------
+    # HTTP
+    # ------------------------------------------------------------------
+    async def _connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line.strip():
+                    break
+                try:
+                    method, target, version = request_line.decode("latin-1").split()
+                except ValueError:
+                    await self._respond(writer, 400, {"error": "malformed request line"}, keep_alive=False)
+                    break
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    name, _, value = line.decode("latin-1").partition(":")
+                    headers[name.strip().lower()] = value.strip()
+                length = int(headers.get("content-length") or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {"error": "body too large"}, keep_alive=False)
+                    break
+                body = await reader.readexactly(length) if length else b""
+                keep_alive = version == "HTTP/1.1" and headers.get("connection", "").lower() != "close"
+                try:
+                    status, payload = 200, await self._route(method, unquote(urlsplit(target).path), headers, body)
+                except HTTPError as e:
+                    status, payload = e.status, {"error": str(e)}
+                except Exception as e:
+                    print(f"Error handling {method} {target}: {e}")
+                    status, payload = 500, {"error": str(e)}
+                await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, writer, status, payload, keep_alive):
+        body = json.dumps(payload).encode("utf-8")
+        head = (f"HTTP/1.1 {status} {REASONS[status]}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def _route(self, method, path, headers, body):
+        match = _COMMAND_PATH.match(path)
+        if match:
+            if method != "POST":
+                raise HTTPError(405, "use POST")
+            if headers.get("content-type", "").split(";")[0].strip() in ("audio/wav", "audio/x-wav"):
+                return await self.command(match.group("id"), audio=body)
+            try:
+                request = json.loads(body or b"{}")
+                text = request.get("text")
+            except (ValueError, AttributeError):
+                raise HTTPError(400, "expected a JSON object")
+            if not isinstance(text, str) or not text.strip():
+                raise HTTPError(400, "missing \"text\"")
+            return await self.command(match.group("id"), text=text, want_audio=bool(request.get("audio")))
+        match = _SESSION_PATH.match(path)
+        if match and method == "DELETE":
+            removed = self.store.remove(match.group("id"))
+            self._session_locks.pop(match.group("id"), None)
+            return {"session": match.group("id"), "removed": removed}
+        if path == "/stats" and method == "GET":
+            return self.stats()
+        raise HTTPError(404, f"no route for {method} {path}")
+
+    # ------------------------------------------------------------------
+    # Commands
+    # ------------------------------------------------------------------
+    async def command(self, session_id, text=None, audio=None, want_audio=False):
+        """
+        Run one command for a session.
+
+        Args:
+            session_id (str): The client's session
+            text (str): The command, wake word optional
+            audio (bytes): WAV recording of the command, used when text is None
+            want_audio (bool): Also return each reply as base64 WAV
+
+        Returns:
+            dict: The command, intent, replies, URLs to open, audio and latency
+        """
+        session = self.store.get(session_id)
+        if len(self._session_locks) > 2 * len(self.store) + 100:
+            # Forget the locks of sessions the store has expired
+            self._session_locks = {key: lock for key, lock in self._session_locks.items() if key in self.store}
+        lock = self._session_locks.setdefault(session_id, asyncio.Lock())
+        async with lock:
+            began = time.perf_counter()
+            self.in_flight += 1
+            try:
+                if text is None:
+                    text = await self._blocking(self._transcribe, audio)
+                command, intent, replies, opened = await self._blocking(self._run, session, text)
+                clips = await self._blocking(self._render, replies) if want_audio else None
+            except HTTPError:
+                raise
+            except Exception:
+                self.errors += 1
+                raise
+            finally:
+                self.in_flight -= 1
+            elapsed = time.perf_counter() - began
+            self.commands += 1
+            self._latencies.append(elapsed * 1000)
+        return {
+            "session": session.id,
+            "command": command,
+            "intent": intent,
+            "replies": [reply.text for reply in replies],
+            "open": opened,
+            "audio": clips,
+            "ms": round(elapsed * 1000, 2),
+        }
+
+    def _run(self, session, text):
+        import main
+
+        command, match, replies, opened = main.process_for(session, text)
+        return command, match.intent, replies, opened
+
+    def _transcribe(self, audio):
+        import speech_recognition as sr
+        import recognizers
+
+        if self._stt is None:
+            self._stt = recognizers.build_recognizer()
+        try:
+            with sr.AudioFile(io.BytesIO(audio)) as source:
+                data = sr.Recognizer().record(source)
+        except (ValueError, EOFError) as e:
+            raise HTTPError(400, f"expected a WAV recording: {e}")
+        try:
+            with tracing.span("stt"):
+                return self._stt.transcribe(data)
+        except sr.UnknownValueError:
+            raise HTTPError(400, "could not understand the recording")
+
+    def _render(self, replies):
+        """Each reply as base64 WAV, from the shared phrase cache (stitched, cached or rendered once)."""
+        import main
+
+        cache = main.get_phrase_cache()
+        rendered = []
+        for reply in replies:
+            try:
+                path = (cache.stitch(reply.clips) if reply.clips else None) or cache.get(reply.text) \
+                    or cache.render(reply.text, timeout=30)
+            except Exception as e:
+                print(f"Error rendering reply: {e}")
+                path = None
+            if path is None:
+                rendered.append(None)
+                continue
+            with open(path, "rb") as f:
+                rendered.append(base64.b64encode(f.read()).decode("ascii"))
+        return rendered
+
+    def stats(self):
+        """
+        Server counters.
+
+        Returns:
+            dict: Sessions, commands, errors, commands in flight, latency percentiles
+                in ms, the shared caches' counters and each endpoint's circuit breaker and latency
+        """
+        import duckduckgo_library
+        import http_client
+        import knowledge_index
+        import news_prefetch
+
+        latencies = list(self._latencies)
+        return {
+            "sessions": self.store.stats(),
+            "commands": self.commands,
+            "errors": self.errors,
+            "in_flight": self.in_flight,
+            "latency_ms": {f"p{p}": _percentile(latencies, p) for p in tracing.PERCENTILES},
+            "search_cache": duckduckgo_library.cache.stats(),
+            "news": news_prefetch.get_prefetcher().stats(),
+            "endpoints": http_client.stats(),
+            "knowledge": None if knowledge_index.get_index() is None else knowledge_index.get_index().stats(),
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve Viola to many clients over HTTP")
+    parser.add_argument("--host", default=os.getenv("VIOLA_SERVER_HOST", "127.0.0.1"))
+    parser.add_argument("--port", type=int, default=int(os.getenv("VIOLA_SERVER_PORT", DEFAULT_PORT)))
+    parser.add_argument("--workers", type=int, default=64, help="Commands run at once across all sessions")
+    parser.add_argument("--idle-timeout", type=float, default=600.0, help="Seconds before an idle session is dropped")
+    parser.add_argument("--trace", nargs="?", const=tracing.DEFAULT_TRACE_FILE, metavar="FILE",
+                        help="Time every command and append one JSON line per command")
+    parser.add_argument("--verbose", action="store_true", help="Print every command as it is processed")
+    args = parser.parse_args(argv)
+
+    from dotenv import load_dotenv
+    load_dotenv()
+    import main as viola
+
+    if args.trace:
+        tracing.tracer.enable(args.trace)
+    # The answer caches, headline prefetch, HTTP pool and phrase audio are shared by every session
+    viola.start_background_services()
+    server = ViolaServer(args.host, args.port, workers=args.workers,
+                         store=sessions.SessionStore(idle_timeout=args.idle_timeout))
+    print(f"Viola server listening on http://{args.host}:{args.port}/ ({args.workers} workers)")
+    sys.stdout.flush()
+    with contextlib.ExitStack() as stack:
+        if not args.verbose:
+            # One "Processing command" line per request would cost more than the commands
+            stack.enter_context(contextlib.redirect_stdout(stack.enter_context(open(os.devnull, "w"))))
+        try:
+            asyncio.run(server.serve())
+        except KeyboardInterrupt:
+            pass
+    print(f"Served {server.commands} commands for {server.store.created} sessions, {server.errors} errors")
+    if tracing.tracer.enabled:
+        print(tracing.tracer.report())
+        tracing.tracer.disable()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,133 @@
+"""
+Client sessions for Viola
+When one Viola process serves many rooms or devices (see server.py), each
+command runs with its client's session current. main.speak() and friends
+then collect replies on the session instead of playing them on the local
+speaker, and URLs to open are handed back to the client instead of being
+opened in the local browser.
+
+The current session lives in a context variable, like tracing's current
+interaction, so it follows asyncio tasks and threads started through
+contextvars.copy_context().run.
+"""
+
+import contextvars
+import threading
+import time
+from collections import OrderedDict, deque, namedtuple
+from contextlib import contextmanager
+
+_current = contextvars.ContextVar("viola_session", default=None)
+
+Reply = namedtuple("Reply", "text clips")
+
+
+class ClientSession:
+    """
+    One client's state: what it asked and the replies of the command in progress.
+
+    Args:
+        session_id (str): Name the client chose (a room or device)
+        history (int): Recent commands kept
+    """
+
+    def __init__(self, session_id, history=20):
+        self.id = session_id
+        self.created_at = time.time()
+        self.last_active = time.monotonic()
+        self.commands = 0
+        self.history = deque(maxlen=history)
+        self._replies = []
+        self._opened = []
+
+    def say(self, text, clips=None):
+        """Queue a reply for the client (called instead of speaking it)."""
+        self._replies.append(Reply(text, tuple(clips) if clips else None))
+
+    def open(self, url):
+        """Ask the client to open a URL (called instead of the local browser)."""
+        self._opened.append(url)
+
+    def begin(self, command):
+        self.last_active = time.monotonic()
+        self.commands += 1
+        self.history.append(command)
+
+    def take(self):
+        """
+        Hand over what the last command produced.
+
+        Returns:
+            tuple: (list of Reply, list of URLs)
+        """
+        replies, self._replies = self._replies, []
+        opened, self._opened = self._opened, []
+        return replies, opened
+
+
+class SessionStore:
+    """
+    Sessions by id, created on first use and dropped when idle.
+
+    Args:
+        idle_timeout (float): Seconds without a command after which a session is dropped
+        max_sessions (int): Least recently active sessions are dropped beyond this
+    """
+
+    def __init__(self, idle_timeout=600.0, max_sessions=10000):
+        self.idle_timeout = idle_timeout
+        self.max_sessions = max_sessions
+        self.created = 0
+        self.expired = 0
+        self._sessions = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def __contains__(self, session_id):
+        return session_id in self._sessions
+
+    def get(self, session_id):
+        """Return the session, creating it (and expiring idle ones) if it is new."""
+        with self._lock:
+            session = self._sessions.get(session_id)
+            if session is not None:
+                self._sessions.move_to_end(session_id)
+                return session
+            self._expire(time.monotonic())
+            session = self._sessions[session_id] = ClientSession(session_id)
+            self.created += 1
+            return session
+
+    def remove(self, session_id):
+        """Forget a session. Returns True if it existed."""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def _expire(self, now):
+        while self._sessions:
+            session_id, oldest = next(iter(self._sessions.items()))
+            if now - oldest.last_active < self.idle_timeout and len(self._sessions) < self.max_sessions:
+                break
+            del self._sessions[session_id]
+            self.expired += 1
+
+    def stats(self):
+        with self._lock:
+            return {"active": len(self._sessions), "created": self.created, "expired": self.expired}
+
+
+def current():
+    """The client session commands are running for in this context, or None (local use)."""
+    return _current.get()
+
+
+@contextmanager
+def activate(session):
+    """Make `session` current for the enclosed code."""
+    token = _current.set(session)
+    try:
+        yield session
+    finally:
+        _current.reset(token)
@@ -0,0 +1,242 @@
+"""
+Speculative lookups for Viola
+Starts fetching the answer to a question while the user is still saying it.
+
+Partial transcripts (e.g. from Vosk's streaming recognizer) are passed to
+Speculator.observe(). Once a partial maps to a lookup (say "what is the
+capital of france") and stays the same for longer than the pause between
+words, the lookup is started in the background; when the phrase ends, its
+last guess is started if it was not yet. Only a few lookups are started per
+utterance. When the final transcript arrives, the command handler
+calls resolve() with the query it is about to run: a matching speculation
+is a hit, and the answer is already cached or in flight (see
+ttl_cache.TTLCache.get_or_fetch). Speculations the user talked past are
+cancelled if they have not started yet, and counted as wasted.
+
+  StreamingTranscriber - feeds VAD audio to a streaming recognizer and its partials to a Speculator
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+_END = object()
+
+
+class _Speculation:
+    def __init__(self, key, future, launched_at):
+        self.key = key
+        self.future = future
+        self.launched_at = launched_at
+
+
+class Speculator:
+    """
+    Runs lookups for partial transcripts that look settled.
+
+    Args:
+        predict (callable): Partial transcript -> lookup key (e.g. a search query), or None
+        fetch (callable): Runs the lookup for a key; its result should land in a shared
+            cache so the real request finds it
+        normalize (callable): Makes keys from partial and final transcripts comparable
+        stable_seconds (float): How long a key must stay unchanged before it is fetched
+            mid-phrase; longer than the usual pause between words, since partials arrive
+            every few milliseconds and each prefix of a question stays put until the next word
+        max_per_utterance (int): Lookups started per utterance, one of them kept for its last guess
+        expire_seconds (float): Speculations nobody asked for after this are wasted
+        max_workers (int): Lookups allowed in flight at once (queued ones can be cancelled)
+        clock (callable): Time source, replaceable in tests
+    """
+
+    def __init__(self, predict, fetch, normalize=None, stable_seconds=0.4, max_per_utterance=2,
+                 expire_seconds=15.0, max_workers=2, clock=time.perf_counter):
+        self.predict = predict
+        self.fetch = fetch
+        self.normalize = normalize or (lambda key: key)
+        self.stable_seconds = stable_seconds
+        self.max_per_utterance = max_per_utterance
+        self.expire_seconds = expire_seconds
+        self.clock = clock
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="viola-speculate")
+        self._lock = threading.Lock()
+        self._candidate = None      # (normalized key, key, first seen) for the utterance in progress
+        self._current = None        # speculation launched for the utterance in progress
+        self._launched_now = 0      # lookups started for the utterance in progress
+        self._speculations = {}     # normalized key -> _Speculation awaiting resolve()
+
+        # Counters
+        self.launched = 0
+        self.hits = 0
+        self.misses = 0
+        self.wasted = 0
+        self.cancelled = 0
+        self._head_start = 0.0
+
+    def observe(self, partial):
+        """Consider a partial transcript of the utterance in progress."""
+        key = self.predict(partial) if partial else None
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            if key is None:
+                self._candidate = None
+                return None
+            norm = self.normalize(key)
+            if self._candidate is None or self._candidate[0] != norm:
+                self._candidate = (norm, key, now)
+                return None
+            if now - self._candidate[2] < self.stable_seconds or self._launched_now + 1 >= self.max_per_utterance:
+                return None
+            return self._launch(norm, key, now)
+
+    def _launch(self, norm, key, now):
+        # Called with the lock held
+        if norm in self._speculations:
+            return None
+        # The user kept talking past the previous guess
+        if self._current is not None and self._current.key != norm:
+            self._discard(self._speculations.pop(self._current.key, None))
+        speculation = _Speculation(norm, self._pool.submit(self._run, key), now)
+        self._speculations[norm] = self._current = speculation
+        self.launched += 1
+        self._launched_now += 1
+        return key
+
+    def _run(self, key):
+        try:
+            return self.fetch(key)
+        except Exception as e:
+            print(f"Speculative lookup failed: {e}")
+            return None
+
+    def end_utterance(self, heard=True):
+        """
+        The utterance ended; the next partial belongs to a new one.
+
+        Args:
+            heard (bool): Whether the phrase is going on to recognition (False when it was
+                dropped as noise). If so, its last guess is started now if it was not yet,
+                ahead of the final transcript.
+
+        Returns:
+            str: The key started now, or None
+        """
+        with self._lock:
+            launched = None
+            if heard and self._candidate is not None and self._launched_now < self.max_per_utterance:
+                norm, key, _ = self._candidate
+                launched = self._launch(norm, key, self.clock())
+            self._candidate = None
+            self._current = None
+            self._launched_now = 0
+            return launched
+
+    def resolve(self, key):
+        """
+        The final command is about to look `key` up.
+
+        Returns:
+            bool: True if a speculation for it was already running or done
+        """
+        norm = self.normalize(key)
+        now = self.clock()
+        with self._lock:
+            speculation = self._speculations.pop(norm, None)
+            if speculation is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+                self._head_start += now - speculation.launched_at
+                if self._current is speculation:
+                    self._current = None
+            # Guesses nobody asked for expire (commands can run behind the next utterance)
+            self._expire(now)
+            return speculation is not None
+
+    def _discard(self, speculation):
+        if speculation is None:
+            return
+        if speculation.future.cancel():
+            self.cancelled += 1
+        self.wasted += 1
+
+    def _expire(self, now):
+        for key in [k for k, s in self._speculations.items() if now - s.launched_at > self.expire_seconds]:
+            speculation = self._speculations.pop(key)
+            if self._current is speculation:
+                self._current = None
+            self._discard(speculation)
+
+    def stats(self):
+        """
+        Hit rate and waste.
+
+        Returns:
+            dict: Speculations launched, hits, misses, wasted (and cancelled before starting),
+                hit_rate (share of lookups that were speculated), waste_rate and the average
+                head start hits had over the final transcript in ms
+        """
+        with self._lock:
+            return {
+                "launched": self.launched,
+                "hits": self.hits,
+                "misses": self.misses,
+                "wasted": self.wasted,
+                "cancelled": self.cancelled,
+                "pending": len(self._speculations),
+                "hit_rate": self.hits / (self.hits + self.misses) if self.hits + self.misses else 0.0,
+                "waste_rate": self.wasted / self.launched if self.launched else 0.0,
+                "head_start_ms": self._head_start / self.hits * 1000 if self.hits else None,
+            }
+
+
+class StreamingTranscriber:
+    """
+    Turns VAD audio events into partial transcripts for a Speculator.
+
+    Plug it into vad.VADListener(on_audio=...). Audio is handed to a worker
+    thread, so the streaming recognizer never slows down capture.
+
+    Args:
+        backend: Recognizer with start_stream(sample_rate) returning an object whose
+            feed(bytes) returns the partial transcript so far (e.g. recognizers.VoskBackend)
+        speculator (Speculator): Receives the partials
+    """
+
+    def __init__(self, backend, speculator):
+        self.backend = backend
+        self.speculator = speculator
+        self.partials = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._run, name="viola-partial-stt", daemon=True)
+        self._thread.start()
+
+    def __call__(self, event, data, sample_rate):
+        self._queue.put((event, data, sample_rate))
+
+    def close(self):
+        self._queue.put(_END)
+        self._thread.join(2)
+
+    def _run(self):
+        stream = None
+        while True:
+            item = self._queue.get()
+            if item is _END:
+                return
+            event, data, sample_rate = item
+            try:
+                if event == "start":
+                    stream = self.backend.start_stream(sample_rate)
+                    event = "audio"
+                if event == "audio" and stream is not None:
+                    partial = stream.feed(data)
+                    self.partials += 1
+                    self.speculator.observe(partial)
+                elif event == "end":
+                    stream = None
+                    self.speculator.end_utterance(heard=data is not None)
+            except Exception as e:
+                print(f"Error in partial recognition: {e}")
+                stream = None
@@ -0,0 +1,257 @@
+"""
+Pipelined speech for Viola
+Plays multi-part answers (news headlines, long search answers) with the
+next part synthesized while the current one plays.
+
+Parts are rendered to WAV on the speech engine's thread a few parts ahead,
+and a separate output thread plays them in order. With a streaming player
+(aplay or paplay reading raw PCM from stdin) every part goes into the same
+output, with the silence at the joins trimmed, so there is no gap between
+parts and no player start-up per part. Without one, the rendered files are
+played one after another through the engine's WavPlayer, which still hides
+the synthesis time.
+
+Usage:
+    stream = speech_pipeline.PipelinedSpeech(tts_engine.get_engine(), headlines)
+    stream.wait()
+"""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import wave
+
+import phrase_cache
+import tts_engine
+
+# Silence kept on each side of a join (so about 0.1 s between parts)
+PART_PAD_SECONDS = 0.05
+
+_END = object()
+
+
+class PCMOutput:
+    """
+    One player process fed raw PCM on stdin, so buffers written back to back play gap-free.
+
+    Uses aplay or paplay, whichever is installed. The process is (re)started
+    when the audio format changes.
+    """
+
+    COMMANDS = ["aplay", "paplay"]
+    FORMATS = {1: ("U8", "u8"), 2: ("S16_LE", "s16le")}
+
+    def __init__(self):
+        self._command = next((c for c in self.COMMANDS if shutil.which(c)), None)
+        self._process = None
+        self._params = None
+
+    @property
+    def available(self):
+        return self._command is not None
+
+    def _open(self, params):
+        self.close()
+        aplay_format, pulse_format = self.FORMATS[params.sampwidth]
+        if self._command == "aplay":
+            args = ["aplay", "-q", "-t", "raw", "-f", aplay_format, "-r", str(params.framerate),
+                    "-c", str(params.nchannels), "-"]
+        else:
+            args = ["paplay", "--raw", f"--format={pulse_format}", f"--rate={params.framerate}",
+                    f"--channels={params.nchannels}"]
+        self._process = subprocess.Popen(args, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL,
+                                         stderr=subprocess.DEVNULL)
+        self._params = params
+
+    def supports(self, params):
+        return params.sampwidth in self.FORMATS
+
+    def write(self, frames, params):
+        """Queue frames for playback; blocks only while the player's buffer is full."""
+        if self._process is None or self._process.poll() is not None or params[:3] != self._params[:3]:
+            self._open(params)
+        self._process.stdin.write(frames)
+        self._process.stdin.flush()
+
+    def close(self):
+        """Let the buffered audio finish, then end the player (and reap it, even after stop())."""
+        process = self._process
+        if process is None:
+            return
+        try:
+            process.stdin.close()
+        except OSError:
+            pass  # stopped: the pipe is already broken
+        # Still reachable by stop() while the last buffer drains
+        process.wait()
+        if self._process is process:
+            self._process = None
+
+    def stop(self):
+        """Barge-in: drop the buffered audio now."""
+        process = self._process
+        if process is not None:
+            process.terminate()
+
+
+class PipelinedSpeech:
+    """
+    A multi-part answer rendered ahead and played in order.
+
+    Has the same wait() / cancel() / done() / stats() interface as
+    tts_engine.SpeechStream, so main can hold either as the active stream.
+
+    Args:
+        engine (tts_engine.SpeechEngine): Renders the parts (and plays files without an output)
+        parts (iterable): Text pieces (a generator works); long ones are split into sentences
+        lookahead (int): Parts rendered ahead of the one playing
+        output (PCMOutput): Streaming output (default: a PCMOutput when the engine plays through
+            the real WavPlayer and aplay/paplay exists; otherwise files go to engine.player)
+    """
+
+    def __init__(self, engine, parts, lookahead=2, output=None):
+        self.engine = engine
+        self.lookahead = lookahead
+        if output is None and isinstance(engine.player, tts_engine.WavPlayer):
+            output = PCMOutput()
+        self.output = output if output is not None and output.available else None
+        self.created_at = time.perf_counter()
+        self.first_audio_at = None
+        self.finished_at = None
+        self.cancelled = False
+        self.parts = 0
+        self.gaps = []          # seconds the output waited for the next part
+        self.render_times = []  # seconds each part took to synthesize
+        self._texts = (sentence for part in ([parts] if isinstance(parts, str) else parts)
+                       for sentence in tts_engine.split_sentences(part))
+        self._renders = []
+        self._lock = threading.Lock()
+        self._done = threading.Event()
+        self._directory = tempfile.mkdtemp(prefix="viola-speech-")
+        self._thread = threading.Thread(target=self._play, name="viola-speech-output", daemon=True)
+        self._thread.start()
+
+    # ------------------------------------------------------------------
+    # Rendering
+    # ------------------------------------------------------------------
+    def _render_ahead(self, upto):
+        """Queue renders until `upto` parts are rendering or done (or the parts run out)."""
+        while len(self._renders) < upto:
+            text = next(self._texts, _END)
+            if text is _END:
+                return
+            path = os.path.join(self._directory, f"{len(self._renders)}.wav")
+            with self._lock:
+                if self.cancelled:
+                    return
+                self._renders.append(self.engine.render_async(text, path))
+
+    # ------------------------------------------------------------------
+    # Output thread
+    # ------------------------------------------------------------------
+    def _play(self):
+        clock = None  # when the audio handed to the output so far will have finished playing
+        index = 0
+        try:
+            while not self.cancelled:
+                self._render_ahead(index + 1 + self.lookahead)
+                if index >= len(self._renders):
+                    break
+                render = self._renders[index]
+                render.wait()
+                if self.cancelled or render.cancelled or render.error is not None:
+                    if render.error is not None:
+                        print(f"Error preparing speech: {render.error}")
+                    index += 1
+                    continue
+                self.render_times.append(render.finished_at - (render.started_at or render.enqueued_at))
+                ready = time.perf_counter()
+                if clock is not None:
+                    self.gaps.append(max(0.0, ready - clock))
+                clock = self._output_part(render, ready, clock)
+                self.parts += 1
+                os.remove(render.render_to)
+                index += 1
+        except Exception as e:
+            print(f"Error in speech output: {e}")
+        finally:
+            if self.output is not None:
+                # Drains the last part, or reaps the player cancel() stopped
+                self.output.close()
+            self.engine.note_audio(False)
+            self.finished_at = time.perf_counter()
+            # A cancelled render may still be writing its file; let it finish before the directory goes
+            for render in self._renders:
+                render.wait(5)
+            shutil.rmtree(self._directory, ignore_errors=True)
+            self._done.set()
+
+    def _output_part(self, render, ready, clock):
+        """Play one rendered part; returns when the audio queued so far will end."""
+        if self.first_audio_at is None:
+            self.first_audio_at = ready
+        self.engine.note_audio(True)
+        if self.output is not None:
+            try:
+                with wave.open(render.render_to, "rb") as clip:
+                    params = clip.getparams()
+                    frames = clip.readframes(clip.getnframes())
+            except (wave.Error, EOFError) as e:
+                print(f"Error reading speech: {e}")
+                return clock
+            if self.output.supports(params):
+                # Trim the silence at the joins (and before the first word, which only delays it)
+                frames = phrase_cache.trim_silence(frames, params, pad_seconds=PART_PAD_SECONDS)
+                seconds = len(frames) / (params.sampwidth * params.nchannels * params.framerate)
+                self.output.write(frames, params)
+                return max(clock or ready, ready) + seconds
+        self.engine.player.play(render.render_to)
+        return time.perf_counter()
+
+    # ------------------------------------------------------------------
+    # SpeechStream interface
+    # ------------------------------------------------------------------
+    def cancel(self):
+        """Barge-in: stop the audio and drop the parts not played yet."""
+        with self._lock:
+            self.cancelled = True
+            renders = list(self._renders)
+        cancelled = self.engine.cancel(renders)
+        if self.output is not None:
+            self.output.stop()
+        else:
+            self.engine.player.stop()
+        return cancelled
+
+    def wait(self, timeout=None):
+        """Block until every part has been played or the answer was cancelled."""
+        return self._done.wait(timeout)
+
+    def done(self):
+        return self._done.is_set()
+
+    def stats(self):
+        """
+        Latency of this answer.
+
+        Returns:
+            dict: Parts played, first-audio and whole-text latency, average synthesis time
+                per part and the longest wait between parts, in milliseconds
+        """
+        return {
+            "chunks": self.parts,
+            "cancelled": self.cancelled,
+            "streamed": self.output is not None,
+            "first_audio_ms": None if self.first_audio_at is None else (self.first_audio_at - self.created_at) * 1000,
+            "whole_text_ms": None if not self.done() else (self.finished_at - self.created_at) * 1000,
+            "render_ms": sum(self.render_times) / len(self.render_times) * 1000 if self.render_times else None,
+            "max_gap_ms": max(self.gaps) * 1000 if self.gaps else 0.0,
+        }
+
+
+def available(engine):
+    """Whether rendered parts can be played (otherwise speak through engine.speak_stream)."""
+    return engine.player.available or (isinstance(engine.player, tts_engine.WavPlayer) and PCMOutput().available)
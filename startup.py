@@ -0,0 +1,175 @@
+"""
+Startup helpers for Viola
+Lazy module loading, so skills and network clients are imported on first use,
+and a startup profiler that breaks time-to-first-listen into imports and init steps.
+
+Usage:
+    musicLibrary = startup.lazy_import("musicLibrary")   # imported on first attribute access
+
+    with startup.profile.phase("microphone"):
+        session.start()
+    startup.profile.mark("first listen")
+    print(startup.profile.report())
+"""
+
+import builtins
+import importlib
+import sys
+import threading
+import time
+import types
+from contextlib import contextmanager
+
+
+class StartupProfile:
+    """
+    Records how long imports and initialization steps take after launch.
+
+    Import timing hooks builtins.__import__, so it is only installed when
+    enabled; disabled, phase() and mark() just note a timestamp.
+    """
+
+    def __init__(self):
+        self.began = time.perf_counter()
+        self.enabled = False
+        self.imports = []   # (module, seconds, depth, thread name)
+        self.phases = []    # (name, start offset, seconds, thread name)
+        self.marks = []     # (name, offset)
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._original_import = None
+
+    def enable(self):
+        """Start timing imports (call before the imports to be measured)."""
+        if self.enabled:
+            return self
+        self.enabled = True
+        self._original_import = builtins.__import__
+        builtins.__import__ = self._timed_import
+        return self
+
+    def disable(self):
+        if self._original_import is not None:
+            builtins.__import__ = self._original_import
+            self._original_import = None
+        self.enabled = False
+
+    def _timed_import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        original = self._original_import or importlib.__import__
+        if level or name in sys.modules:
+            return original(name, globals, locals, fromlist, level)
+        depth = getattr(self._local, "depth", 0)
+        self._local.depth = depth + 1
+        began = time.perf_counter()
+        try:
+            return original(name, globals, locals, fromlist, level)
+        finally:
+            self._local.depth = depth
+            with self._lock:
+                self.imports.append((name, time.perf_counter() - began, depth,
+                                     threading.current_thread().name))
+
+    @contextmanager
+    def phase(self, name):
+        """Time an initialization step."""
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, began - self.began, time.perf_counter() - began,
+                                    threading.current_thread().name))
+
+    def mark(self, name):
+        """Note a milestone, e.g. "first listen"."""
+        offset = time.perf_counter() - self.began
+        with self._lock:
+            self.marks.append((name, offset))
+        return offset
+
+    def report(self, top=15):
+        """
+        Human readable breakdown.
+
+        Args:
+            top (int): Number of slowest top-level imports to list
+
+        Returns:
+            str: The report
+        """
+        lines = ["Startup profile", "=" * 60]
+        with self._lock:
+            imports = [record for record in self.imports if record[2] == 0]
+            phases = sorted(self.phases, key=lambda p: p[1])
+            marks = list(self.marks)
+        if imports:
+            total = sum(record[1] for record in imports if record[3] == "MainThread")
+            lines.append(f"Imports (top-level, {total * 1000:.0f} ms on the main thread):")
+            for name, seconds, _, thread in sorted(imports, key=lambda r: r[1], reverse=True)[:top]:
+                lines.append(f"  {seconds * 1000:8.1f} ms  {name:<28} [{thread}]")
+        if phases:
+            lines.append("Init steps (start offset, duration):")
+            for name, offset, seconds, thread in phases:
+                lines.append(f"  +{offset * 1000:7.0f} ms {seconds * 1000:8.1f} ms  {name:<22} [{thread}]")
+        for name, offset in marks:
+            lines.append(f"{name}: {offset * 1000:.0f} ms after launch")
+        return "\n".join(lines)
+
+
+profile = StartupProfile()
+
+
+class LazyModule(types.ModuleType):
+    """
+    Stand-in for a module that imports the real one on first attribute access.
+
+    Attribute reads and writes are forwarded, so module globals changed at
+    runtime (e.g. newsLibrary.NEWS_API_KEY) stay shared with the real module.
+    """
+
+    def __init__(self, name):
+        super().__init__(name)
+        object.__setattr__(self, "_lazy_module", None)
+        object.__setattr__(self, "_lazy_lock", threading.Lock())
+
+    def _load(self):
+        module = object.__getattribute__(self, "_lazy_module")
+        if module is None:
+            with object.__getattribute__(self, "_lazy_lock"):
+                module = object.__getattribute__(self, "_lazy_module")
+                if module is None:
+                    name = object.__getattribute__(self, "__name__")
+                    # Through __import__ so the startup profile sees it
+                    __import__(name)
+                    module = sys.modules[name]
+                    object.__setattr__(self, "_lazy_module", module)
+        return module
+
+    def __getattr__(self, attr):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self):
+        return dir(self._load())
+
+    @property
+    def loaded(self):
+        return object.__getattribute__(self, "_lazy_module") is not None
+
+
+def lazy_import(name):
+    """
+    Return the module if it is already imported, otherwise a LazyModule for it.
+
+    Args:
+        name (str): Module name
+
+    Returns:
+        module: The module or its lazy stand-in
+    """
+    module = sys.modules.get(name)
+    if module is not None:
+        return module
+    return LazyModule(name)
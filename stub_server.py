@@ -0,0 +1,208 @@
+"""
+Stub Server for Viola
+A local HTTP server that stands in for DuckDuckGo and NewsAPI, so tests,
+benchmarks and replays never touch the real services.
+
+Usage:
+    with StubServer({"/": duckduckgo_route({"capital of france": "Paris"})}) as server:
+        with http_client.override_endpoint("duckduckgo", server.url):
+            ...
+
+Faults can be injected to exercise timeouts and circuit breakers:
+    server.inject_fault(status=503)             # every request fails
+    server.inject_fault("/", delay=5, rate=0.2) # one in five DuckDuckGo requests hangs
+    server.inject_fault(drop=True, count=3)     # the next three connections are dropped
+    server.clear_faults()
+"""
+
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlsplit, parse_qs
+
+
+class StubServer:
+    """
+    Threaded HTTP server answering GET requests from a route table.
+
+    Args:
+        routes (dict): path -> handler(params) returning (status, body); body is
+            JSON-encoded unless it is bytes. params maps query keys to single values.
+        delay (float): Seconds to wait before every response (simulates latency)
+        seed (int): Seed for the random choice of which requests a fault hits
+    """
+
+    def __init__(self, routes=None, delay=0.0, seed=0):
+        self.routes = dict(routes or {})
+        self.delay = delay
+        self.requests = []
+        self.faults_injected = 0
+        self._faults = {}
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = None
+        self._thread = None
+
+    def start(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"  # keep-alive, like the real services
+
+            def do_GET(self):
+                stub._handle(self, send_body=True)
+
+            def do_HEAD(self):
+                stub._handle(self, send_body=False)
+
+            def log_message(self, format, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, kwargs={"poll_interval": 0.05},
+                                        name="viola-stub-server", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+
+    @property
+    def url(self):
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}/"
+
+    def inject_fault(self, path=None, status=503, delay=0.0, rate=1.0, drop=False, count=None):
+        """
+        Make requests fail or hang.
+
+        Args:
+            path (str): Only requests for this path (default: every path)
+            status (int): Status to answer with (None answers normally, after the delay)
+            delay (float): Extra seconds before answering (longer than the client's timeout = a hang)
+            rate (float): Fraction of requests affected
+            drop (bool): Close the connection without answering (a connection error)
+            count (int): Affect only this many requests, then clear the fault
+        """
+        with self._lock:
+            self._faults[path] = {"status": status, "delay": delay, "rate": rate, "drop": drop, "count": count}
+
+    def clear_faults(self):
+        with self._lock:
+            self._faults.clear()
+
+    def _fault_for(self, path):
+        with self._lock:
+            key = path if path in self._faults else None
+            fault = self._faults.get(key)
+            if fault is None or self._random.random() >= fault["rate"]:
+                return None
+            if fault["count"] is not None:
+                fault["count"] -= 1
+                if fault["count"] <= 0:
+                    del self._faults[key]
+            self.faults_injected += 1
+            return fault
+
+    def _handle(self, request, send_body):
+        parts = urlsplit(request.path)
+        params = {key: values[-1] for key, values in parse_qs(parts.query).items()}
+        with self._lock:
+            self.requests.append((parts.path, params))
+
+        if self.delay:
+            time.sleep(self.delay)
+
+        fault = self._fault_for(parts.path)
+        if fault is not None:
+            if fault["delay"]:
+                time.sleep(fault["delay"])
+            if fault["drop"]:
+                request.close_connection = True
+                return
+
+        handler = self.routes.get(parts.path)
+        if fault is not None and fault["status"] is not None:
+            status, body = fault["status"], {"error": "Injected fault"}
+        elif handler is None:
+            status, body = 404, {"error": f"No stub route for {parts.path}"}
+        else:
+            status, body = handler(params)
+
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode("utf-8")
+        request.send_response(status)
+        request.send_header("Content-Type", "application/json")
+        request.send_header("Content-Length", str(len(payload)))
+        request.end_headers()
+        if send_body:
+            request.wfile.write(payload)
+
+    def request_count(self, path=None):
+        with self._lock:
+            return sum(1 for p, _ in self.requests if path is None or p == path)
+
+
+def duckduckgo_route(answers=None, default="No results found for that query."):
+    """
+    Handler imitating the DuckDuckGo Instant Answer API.
+
+    Args:
+        answers (dict): Query substring -> abstract text
+        default (str): RelatedTopics text used when nothing matches (None for an empty result)
+    """
+    answers = answers or {}
+
+    def handler(params):
+        query = params.get("q", "").lower()
+        for key, text in answers.items():
+            if key in query:
+                return 200, {"Answer": "", "AbstractText": text, "RelatedTopics": []}
+        related = [{"Text": default}] if default else []
+        return 200, {"Answer": "", "AbstractText": "", "RelatedTopics": related}
+
+    return handler
+
+
+def newsapi_route(articles=None, delay=0.0):
+    """
+    Handler imitating NewsAPI's everything / top-headlines endpoints.
+
+    Args:
+        articles (list or callable): (title, source name) pairs, or a function of the
+            query params returning them; defaults to five sample headlines
+        delay (float or callable): Extra seconds this route takes (on top of the server
+            delay), or a function of the query params returning them
+    """
+    if articles is None:
+        articles = [(f"Sample headline number {i}", "Stub News") for i in range(1, 6)]
+    newest = datetime(2026, 1, 1, 12, 0, 0)
+
+    def handler(params):
+        if delay:
+            time.sleep(delay(params) if callable(delay) else delay)
+        selected = articles(params) if callable(articles) else articles
+        page_size = int(params.get("pageSize", 20))
+        return 200, {
+            "status": "ok",
+            "totalResults": len(selected),
+            "articles": [
+                {"title": title, "source": {"name": source},
+                 "publishedAt": (newest - timedelta(minutes=i)).strftime("%Y-%m-%dT%H:%M:%SZ")}
+                for i, (title, source) in enumerate(selected[:page_size])
+            ],
+        }
+
+    return handler
@@ -0,0 +1,136 @@
+"""
+Test script to verify the asyncio listen -> recognize -> act -> speak runtime
+"""
+import sys
+import os
+import asyncio
+import threading
+import time
+
+# Add parent directory to path to import async_runtime
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+import async_runtime
+import recognizers
+import wake_word
+
+
+class FakeSession:
+    """Hands out scripted (audio, during_speech) phrases; the "audio" is the transcript itself."""
+
+    def __init__(self, phrases, gap=0.05):
+        self.phrases = list(phrases)
+        self.gap = gap
+        self.running = True
+
+    def get_phrase(self, timeout=None):
+        time.sleep(self.gap)
+        if not self.phrases:
+            self.running = False
+            raise sr.WaitTimeoutError("Capture session is not running")
+        return self.phrases.pop(0)
+
+
+class FakeWake:
+    """Cloud-style wake stage: the transcript is the audio."""
+
+    def check(self, audio):
+        return wake_word.WakeResult(wake_word.WAKE_WORD in audio.lower(), audio, "fake")
+
+
+class KeywordWake:
+    """Keyword-spotter-style wake stage: detects "viola" but gives no transcript."""
+
+    def check(self, audio):
+        return wake_word.WakeResult(wake_word.WAKE_WORD in audio.lower(), None, "keyword")
+
+
+class Recorder:
+    def __init__(self, command_delay=0.0):
+        self.command_delay = command_delay
+        self.spoken = []
+        self.commands = []
+        self.stops = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def speak(self, text):
+        self.spoken.append(text)
+
+    def stop_speaking(self):
+        self.stops += 1
+
+    def handle_command(self, command):
+        with self._lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.command_delay)
+        with self._lock:
+            self.active -= 1
+            self.commands.append(command)
+
+
+def run(phrases, recorder, wake=None, **kwargs):
+    runtime = async_runtime.VoiceRuntime(
+        FakeSession(phrases), wake or FakeWake(), recognizers.StubBackend(lambda audio: audio),
+        recorder.handle_command, recorder.speak, recorder.stop_speaking, **kwargs)
+    asyncio.run(asyncio.wait_for(runtime.run(), timeout=5))
+    return runtime
+
+
+def test_wake_word_then_command():
+    recorder = Recorder()
+    run([("viola", False), ("what is the time", False)], recorder)
+    assert recorder.spoken[0] == "Yes, how can I help you?"
+    assert recorder.commands == ["what is the time"]
+    print("✓ Wake word is acknowledged and the next phrase runs as a command")
+
+
+def test_inline_command_and_stop_listening():
+    recorder = Recorder()
+    runtime = run([("viola open youtube", False), ("stop listening", False), ("viola play x", False)], recorder)
+    assert recorder.commands == ["open youtube"]
+    assert recorder.spoken[-1] == "Stopping Viola. Goodbye!"
+    assert runtime.stats()["commands"] == 1
+    print("✓ Commands after the wake word run directly and 'stop listening' ends the loop")
+
+
+def test_barge_in_while_speaking():
+    recorder = Recorder()
+    runtime = run([("hello there", True), ("viola stop", True), ("viola", False), ("stop", False)], recorder)
+    # Phrases without the wake word (or not a stop word) during speech are ignored
+    assert recorder.stops == 2
+    assert runtime.stats()["barge_ins"] == 2
+    assert recorder.commands == []
+    print("✓ 'Viola, stop' interrupts speech")
+
+
+def test_keyword_hit_is_not_a_barge_in():
+    recorder = Recorder()
+    runtime = run([("i am viola your assistant", True), ("viola stop", True)], recorder, wake=KeywordWake())
+    # Viola saying her own name is transcribed and ignored; only the stop word cuts her off
+    assert recorder.stops == 1
+    assert runtime.stats()["barge_ins"] == 1
+    assert recorder.spoken == []
+    print("✓ A keyword-only 'Viola' during speech barges in only with a stop word")
+
+
+def test_commands_overlap():
+    recorder = Recorder(command_delay=0.4)
+    began = time.perf_counter()
+    run([("viola open google", False), ("viola open youtube", False)], recorder)
+    elapsed = time.perf_counter() - began
+    assert sorted(recorder.commands) == ["open google", "open youtube"]
+    assert recorder.max_active == 2
+    assert elapsed < 0.8 + 0.3
+    print(f"✓ Two slow commands overlapped ({elapsed:.2f}s)")
+
+
+if __name__ == "__main__":
+    test_wake_word_then_command()
+    test_inline_command_and_stop_listening()
+    test_barge_in_while_speaking()
+    test_keyword_hit_is_not_a_barge_in()
+    test_commands_overlap()
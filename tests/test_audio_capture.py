@@ -0,0 +1,79 @@
+"""
+Test script to verify the persistent audio capture session
+"""
+import sys
+import os
+import math
+import struct
+import tempfile
+import wave
+
+# Add parent directory to path to import audio_capture
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+import audio_capture
+
+SAMPLE_RATE = 16000
+
+
+def write_wav(path, segments):
+    """Write (kind, seconds) segments as 16-bit mono audio: 'tone' or 'silence'"""
+    frames = bytearray()
+    for kind, seconds in segments:
+        for i in range(int(SAMPLE_RATE * seconds)):
+            value = int(8000 * math.sin(2 * math.pi * 440 * i / SAMPLE_RATE)) if kind == "tone" else 0
+            frames += struct.pack("<h", value)
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(bytes(frames))
+
+
+def test_calibrates_once_and_buffers_phrases():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "two_phrases.wav")
+        write_wav(path, [("silence", 1.0), ("tone", 0.6), ("silence", 1.0), ("tone", 0.6), ("silence", 1.0)])
+
+        session = audio_capture.CaptureSession(source_factory=lambda: sr.AudioFile(path))
+        session.start()
+
+        # Both phrases are buffered even though nobody read them while they were spoken
+        first = session.get(timeout=5)
+        second = session.get(timeout=5)
+        stats = session.stats()
+        session.stop()
+
+        assert isinstance(first, sr.AudioData) and isinstance(second, sr.AudioData)
+        assert stats["captured"] >= 2
+        assert stats["calibration_s"] > 0
+        assert stats["listening_s"] > 0
+        print(f"✓ Captured {stats['captured']} phrases after one calibration "
+              f"({stats['calibration_s'] * 1000:.1f} ms calibrating, {stats['listening_s'] * 1000:.1f} ms listening)")
+
+
+def test_echo_guard_discards_own_voice():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "echo.wav")
+        write_wav(path, [("silence", 1.0), ("tone", 0.6), ("silence", 1.0)])
+
+        session = audio_capture.CaptureSession(source_factory=lambda: sr.AudioFile(path),
+                                               echo_guard=lambda since: True)
+        session.start()
+        try:
+            session.get(timeout=2)
+        except sr.WaitTimeoutError:
+            pass
+        else:
+            raise AssertionError("echo phrase should have been discarded")
+        finally:
+            session.stop()
+
+        assert session.stats()["echo_discarded"] >= 1
+        print("✓ Phrases overlapping Viola's own speech are discarded")
+
+
+if __name__ == "__main__":
+    test_calibrates_once_and_buffers_phrases()
+    test_echo_guard_discards_own_voice()
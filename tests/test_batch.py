@@ -0,0 +1,69 @@
+"""
+Test script to verify headless batch mode: ordered sink output, concurrency and the summary
+"""
+import sys
+import os
+import contextlib
+import io
+import json
+import tempfile
+import time
+
+# Add parent directory to path to import main
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import main
+import replay
+
+
+def test_json_sink_keeps_order_while_lookups_overlap():
+    # Distinct questions, so every one waits on the (stub) network
+    commands = [f"what is the population of city number {n}" for n in range(40)]
+    commands[5:5] = ["# a comment", "", "viola open youtube", "what is the time"]
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "commands.txt")
+        with open(path, "w", encoding="utf-8") as f:
+            f.write("\n".join(commands) + "\n")
+        output, summary = io.StringIO(), io.StringIO()
+        with replay.ReplayEnvironment(http_delay=0.05):
+            began = time.perf_counter()
+            with contextlib.redirect_stdout(output), contextlib.redirect_stderr(summary):
+                status = main.main(["--batch", path, "--sink", "json", "--jobs", "10"])
+            elapsed = time.perf_counter() - began
+
+    results = [json.loads(line) for line in output.getvalue().splitlines()]
+    assert status == 0
+    assert [r["command"] for r in results] == [c.replace("viola ", "") for c in commands if c and c[0] != "#"]
+    assert [r["line"] for r in results][:7] == [1, 2, 3, 4, 5, 8, 9]
+    assert results[5]["open"] == ["https://www.youtube.com/@LotusOutlook"]
+    assert results[6]["intent"] == "time"
+    assert all(r["replies"] for r in results)
+    # 40 lookups of at least 50 ms each take over 2 s one after another
+    assert elapsed < 1.9, elapsed
+    assert "question              40" in summary.getvalue()
+    print(f"✓ 42 commands in order in {elapsed:.2f}s with lookups overlapping")
+
+
+def test_stdin_to_stdout_sink():
+    stdin = io.StringIO("who are you\nplay virtual\n")
+    output, summary = io.StringIO(), io.StringIO()
+    with replay.ReplayEnvironment(), contextlib.redirect_stdout(output), contextlib.redirect_stderr(summary):
+        saved, sys.stdin = sys.stdin, stdin
+        try:
+            assert main.main(["--batch", "-"]) == 0
+        finally:
+            sys.stdin = saved
+    assert output.getvalue().splitlines() == [
+        "> who are you",
+        "  I am Viola, your AI assistant",
+        "> play virtual",
+        "  Playing virtual",
+        "  [open] https://youtu.be/oklzVH8FfVQ?si=4l_9BmVeXazgCvO5",
+    ]
+    assert "Batch: 2 commands" in summary.getvalue()
+    print("✓ Commands from stdin are written to the stdout sink")
+
+
+if __name__ == "__main__":
+    test_json_sink_keeps_order_while_lookups_overlap()
+    test_stdin_to_stdout_sink()
@@ -0,0 +1,157 @@
+"""
+Test script to verify circuit breakers and adaptive timeouts against a fault-injecting stub server
+"""
+import sys
+import os
+import time
+
+# Add parent directory to path to import circuit_breaker
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import circuit_breaker
+import duckduckgo_library
+import http_client
+import newsLibrary
+import requests
+import ttl_cache
+from circuit_breaker import CircuitBreaker, CircuitOpenError, AdaptiveTimeout
+from stub_server import StubServer, duckduckgo_route
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_breaker_states():
+    clock = FakeClock()
+    breaker = CircuitBreaker("test", failure_threshold=3, cooldown=10, clock=clock)
+    for _ in range(2):
+        breaker.allow()
+        breaker.failure()
+    breaker.allow()
+    breaker.success()  # a success resets the run of failures
+    for _ in range(3):
+        breaker.allow()
+        breaker.failure()
+    assert breaker.state == circuit_breaker.OPEN and breaker.is_open()
+    try:
+        breaker.allow()
+        assert False, "open breaker let a request through"
+    except CircuitOpenError:
+        pass
+
+    # After the cooldown one probe goes out; the others keep failing fast
+    clock.now = 10
+    assert not breaker.is_open()
+    breaker.allow()
+    assert breaker.state == circuit_breaker.HALF_OPEN
+    try:
+        breaker.allow()
+        assert False, "second request let through while probing"
+    except CircuitOpenError:
+        pass
+    breaker.failure()
+    assert breaker.state == circuit_breaker.OPEN and breaker.stats()["cooldown_s"] == 20
+
+    clock.now = 25
+    assert breaker.is_open()  # the failed probe doubled the cooldown
+    clock.now = 30
+    breaker.allow()
+    breaker.success()
+    stats = breaker.stats()
+    assert stats["state"] == circuit_breaker.CLOSED and stats["cooldown_s"] == 10
+    assert stats["opened"] == 2 and stats["rejected"] == 2 and stats["probes"] == 2
+    print("✓ Breaker opens after repeated failures, probes half-open and closes on success")
+
+
+def test_timeout_follows_p95():
+    timeout = AdaptiveTimeout(maximum=8.0, minimum=1.5, factor=4.0, min_samples=20)
+    for _ in range(19):
+        timeout.record(0.1)
+    assert timeout.value == 8.0  # too few samples to judge
+    timeout.record(0.1)
+    assert timeout.value == 1.5  # 4 x 0.1 s, held at the floor
+    for _ in range(20):
+        timeout.record(0.8)
+    assert abs(timeout.value - 3.2) < 1e-9
+    # A service that got slower pulls the timeout back up through its timeouts
+    for _ in range(40):
+        timeout.record_timeout(timeout.value)
+    assert timeout.value == 8.0
+    assert timeout.stats()["timeouts"] == 40
+    print("✓ Read timeout is 4x the recent p95, between the floor and the configured timeout")
+
+
+def test_fails_fast_with_cached_answer():
+    routes = {"/": duckduckgo_route({"capital of france": "Paris is the capital of France."})}
+    breaker = CircuitBreaker("duckduckgo", failure_threshold=2, cooldown=0.3)
+    original_cache = duckduckgo_library.cache
+    # Everything is stale at once, so answers come from the cache only when DuckDuckGo fails
+    duckduckgo_library.cache = ttl_cache.TTLCache(ttl=-1)
+    try:
+        with StubServer(routes) as server, http_client.override_endpoint("duckduckgo", server.url, breaker=breaker):
+            assert duckduckgo_library.web_search_summary("capital of france") == "Paris is the capital of France."
+
+            server.inject_fault(drop=True)
+            for query in ("first outage query", "second outage query"):
+                assert duckduckgo_library.web_search_summary(query).startswith("Error contacting DuckDuckGo")
+            assert breaker.state == circuit_breaker.OPEN
+            sent = server.request_count()
+
+            began = time.perf_counter()
+            degraded = duckduckgo_library.web_search_summary("third outage query")
+            cached = duckduckgo_library.web_search_summary("capital of france")
+            elapsed = time.perf_counter() - began
+            assert degraded.startswith("DuckDuckGo isn't responding")
+            assert cached == "Paris is the capital of France."
+            assert server.request_count() == sent  # nothing was sent while open
+            assert elapsed < 0.05, elapsed
+
+            # The service recovers: after the cooldown a single probe closes the breaker
+            server.clear_faults()
+            time.sleep(0.35)
+            assert duckduckgo_library.web_search_summary("capital of france") == "Paris is the capital of France."
+            stats = http_client.stats()["duckduckgo"]
+            assert stats["state"] == circuit_breaker.CLOSED and stats["probes"] == 1 and stats["rejected"] == 2
+    finally:
+        duckduckgo_library.cache = original_cache
+    assert http_client.ENDPOINTS["duckduckgo"].breaker is not breaker
+    message = newsLibrary.news_error_message(CircuitOpenError("newsapi is not responding"))
+    assert message.startswith("The news service isn't responding")
+    print(f"✓ Open circuit answered in {elapsed * 1000:.1f} ms from the cache or with a short apology")
+
+
+def test_adaptive_timeout_cuts_hang():
+    with StubServer({"/": duckduckgo_route()}) as server, \
+            http_client.override_endpoint("duckduckgo", server.url) as endpoint:
+        # p95 itself as the timeout, at least 0.3 s: local answers take a few milliseconds
+        endpoint.latency = AdaptiveTimeout(maximum=8.0, minimum=0.3, factor=1.0, min_samples=5)
+        for _ in range(5):
+            http_client.get("duckduckgo", params={"q": "warm"})
+        assert endpoint.current_timeout()[1] == 0.3
+
+        # Read timeouts are not retried, so one hung request costs one timeout
+        server.inject_fault(status=None, delay=2.0, count=2)
+        sent = server.request_count()
+        began = time.perf_counter()
+        try:
+            http_client.get("duckduckgo", params={"q": "hang"})
+            assert False, "hung request did not time out"
+        except requests.exceptions.RequestException:
+            pass
+        elapsed = time.perf_counter() - began
+        assert elapsed < 0.9, elapsed
+        assert server.request_count() == sent + 1
+        assert http_client.stats()["duckduckgo"]["timeouts"] == 1
+    print(f"✓ Hung request cut off after {elapsed:.2f}s instead of the fixed 8s")
+
+
+if __name__ == "__main__":
+    test_breaker_states()
+    test_timeout_follows_p95()
+    test_fails_fast_with_cached_answer()
+    test_adaptive_timeout_cuts_hang()
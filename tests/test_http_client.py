@@ -0,0 +1,74 @@
+"""
+Test script to verify the shared HTTP client against a local stub server
+"""
+import sys
+import os
+
+# Add parent directory to path to import http_client
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client
+import duckduckgo_library
+import newsLibrary
+from stub_server import StubServer, duckduckgo_route, newsapi_route
+
+
+def test_shared_session():
+    assert http_client.get_session() is http_client.get_session()
+    print("✓ One pooled session shared by all libraries")
+
+
+def test_duckduckgo_through_stub():
+    routes = {"/": duckduckgo_route({"capital of france": "Paris is the capital of France."})}
+    with StubServer(routes) as server, http_client.override_endpoint("duckduckgo", server.url):
+        duckduckgo_library.cache.clear()
+        answer = duckduckgo_library.web_search_summary("what is the capital of france")
+        duckduckgo_library.cache.clear()
+    assert answer == "Paris is the capital of France."
+    assert http_client.ENDPOINTS["duckduckgo"].base_url.startswith("https://")
+    print("✓ DuckDuckGo answered by the stub server")
+
+
+def test_news_through_stub():
+    original_key = newsLibrary.NEWS_API_KEY
+    newsLibrary.NEWS_API_KEY = "stub-key-1234567890"
+    try:
+        with StubServer({"/everything": newsapi_route()}) as server, \
+                http_client.override_endpoint("newsapi", server.url):
+            headlines = newsLibrary.get_india_news()
+    finally:
+        newsLibrary.NEWS_API_KEY = original_key
+    assert headlines[0] == "Headline 1: Sample headline number 1 from Stub News"
+    assert len(headlines) == 5
+    print("✓ NewsAPI answered by the stub server")
+
+
+def test_retries_server_errors():
+    attempts = []
+
+    def flaky(params):
+        attempts.append(1)
+        if len(attempts) < 2:
+            return 503, {"error": "busy"}
+        return 200, {"Answer": "42", "AbstractText": "", "RelatedTopics": []}
+
+    with StubServer({"/": flaky}) as server, http_client.override_endpoint("duckduckgo", server.url):
+        response = http_client.get("duckduckgo", params={"q": "answer"})
+    assert response.status_code == 200
+    assert len(attempts) == 2
+    print("✓ 503 retried with backoff")
+
+
+def test_prewarm_opens_connection():
+    with StubServer({"/": duckduckgo_route()}) as server, http_client.override_endpoint("duckduckgo", server.url):
+        http_client.prewarm(["duckduckgo"], wait=True)
+        assert server.request_count() == 1
+    print("✓ Connection pre-warmed")
+
+
+if __name__ == "__main__":
+    test_shared_session()
+    test_duckduckgo_through_stub()
+    test_news_through_stub()
+    test_retries_server_errors()
+    test_prewarm_opens_connection()
@@ -0,0 +1,81 @@
+"""
+Test script to verify command routing through the compiled intent matcher
+"""
+import sys
+import os
+
+# Add parent directory to path to import main
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import intent_router
+import main
+
+
+def test_commands_route_like_before():
+    """Each command from main.py's docstring lands on the intent the old if/elif chain picked"""
+    expected = {
+        "open google": "open_site",
+        "please open youtube now": "open_site",
+        "what is the time": "time",
+        "tell me the time please": "time",
+        "what is your name": "name",
+        "who are you": "name",
+        "play the virtual": "play",
+        "play": "play",
+        "tell me news": "news",
+        "latest headlines": "news",
+        "how far is delhi from mumbai": "distance",
+        "distance between paris and london": "distance",
+        "what is the capital of france": "question",
+        "who is the president of india": "question",
+        "tell me a joke": "fallback",
+    }
+    for command, intent in expected.items():
+        match = main.router.match(command)
+        assert match.intent == intent, f"{command!r} -> {match.intent}, expected {intent}"
+        print(f"✓ '{command}' → {match.intent}")
+
+
+def test_named_groups_are_passed_to_handlers():
+    match = main.router.match("open github")
+    assert match.group("site") == "github"
+
+    match = main.router.match("play the checkpoint")
+    assert match.group("song").strip() == "the checkpoint"
+
+    match = main.router.match("distance between paris and london")
+    assert match.group("origin") == "paris" and match.group("destination") == "london"
+    print("✓ Captured groups reach the handler")
+
+
+def test_registration_order_and_stats():
+    router = intent_router.IntentRouter()
+    handled = []
+    router.register("greeting", r"\bhello\b", lambda m: handled.append(m.intent))
+    router.register("weather", r"weather in (?P<city>\w+)", lambda m: handled.append(m.group("city")))
+    router.set_fallback(lambda m: handled.append("fallback"))
+
+    # Both patterns occur; the first registered intent wins
+    assert router.dispatch("hello what is the weather in paris").intent == "greeting"
+    router.dispatch("weather in tokyo")
+    router.dispatch("something else")
+    assert handled == ["greeting", "tokyo", "fallback"]
+
+    stats = router.stats()
+    assert stats["greeting"]["hits"] == 1
+    assert stats["fallback"]["hits"] == 1
+    assert sum(stats["weather"]["match_us_histogram"].values()) == 1
+
+    try:
+        router.register("greeting", r"hi", lambda m: None)
+    except ValueError:
+        pass
+    else:
+        raise AssertionError("duplicate intent names should be rejected")
+    print("✓ New skills are added by registration")
+
+
+if __name__ == "__main__":
+    test_commands_route_like_before()
+    test_named_groups_are_passed_to_handlers()
+    test_registration_order_and_stats()
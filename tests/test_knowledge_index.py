@@ -0,0 +1,118 @@
+"""
+Test script to verify the offline knowledge index and its place in front of DuckDuckGo
+"""
+import sys
+import os
+import gzip
+import json
+import tempfile
+
+# Add parent directory to path to import knowledge_index
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import knowledge_index
+import main
+import replay
+import sessions
+import tracing
+
+ABSTRACTS = """<feed>
+<doc><title>Wikipedia: France</title><url>https://en.wikipedia.org/wiki/France</url>
+<abstract>France is a country in Western Europe. Its capital and largest city is Paris.</abstract></doc>
+<doc><title>Wikipedia: Mercury</title><url>https://en.wikipedia.org/wiki/Mercury</url>
+<abstract>Mercury may refer to:</abstract></doc>
+<doc><title>Wikipedia: Ada Lovelace</title><url>https://en.wikipedia.org/wiki/Ada_Lovelace</url>
+<abstract>Ada Lovelace was an English mathematician known for her work on the Analytical Engine.</abstract></doc>
+</feed>
+"""
+
+FAQ = """Q: How do I change Viola's voice?
+A: Set DEFAULT_RATE in tts_engine.py, or pick another installed voice.
+
+Q: Where are the caches kept?
+A: In ~/.viola/cache unless VIOLA_CACHE_DIR says otherwise.
+"""
+
+
+def build_index(directory):
+    abstracts = os.path.join(directory, "abstracts.xml.gz")
+    with gzip.open(abstracts, "wt", encoding="utf-8") as f:
+        f.write(ABSTRACTS)
+    faq = os.path.join(directory, "faq.txt")
+    with open(faq, "w", encoding="utf-8") as f:
+        f.write(FAQ)
+    articles = os.path.join(directory, "articles.jsonl")
+    with open(articles, "w", encoding="utf-8") as f:
+        f.write(json.dumps({"title": "Taj Mahal", "text": "The Taj Mahal is a marble mausoleum in Agra."}) + "\n")
+    path = os.path.join(directory, "knowledge.sqlite3")
+    return knowledge_index.build_from_files([abstracts, faq, articles], path), path
+
+
+def test_build_and_answer():
+    with tempfile.TemporaryDirectory() as directory:
+        built, path = build_index(directory)
+        assert built["documents"] == 5 and built["skipped"] == 1  # the disambiguation page
+        index = knowledge_index.KnowledgeIndex(path)
+        try:
+            # The subject is a title
+            found = index.answer("Who was Ada Lovelace?")
+            assert found.exact and found.title == "Ada Lovelace"
+            assert index.answer("what is the taj mahal").text.startswith("The Taj Mahal")
+            assert index.answer("how do i change viola's voice").text.startswith("Set DEFAULT_RATE")
+            # The question names a title and the rest of it is in one sentence, the answer
+            found = index.answer("what is the capital of france")
+            assert not found.exact and found.title == "France"
+            assert found.text == "Its capital and largest city is Paris."
+            assert index.answer("which cities are in France").title == "France"  # stemmed: cities -> city
+            # Misses: unknown subjects, and known titles with a question the document does not answer
+            assert index.answer("what is the population of france") is None
+            assert index.answer("who is the president of france") is None
+            assert index.answer("is france a city in western europe") is None  # words in different sentences
+            assert index.answer("who is the president of brazil") is None
+            assert index.answer("what is mercury") is None
+            assert index.stats()["documents"] == 5 and index.stats()["hits"] == 5
+        finally:
+            index.close()
+    print("✓ Index built from abstracts, FAQ and JSON lines answers titles and named-title questions")
+
+
+def test_rebuild_replaces_atomically():
+    with tempfile.TemporaryDirectory() as directory:
+        _, path = build_index(directory)
+        rebuilt = knowledge_index.build([("Nile", "The Nile is a major river in north-eastern Africa.")], path)
+        assert rebuilt["documents"] == 1 and not os.path.exists(path + ".building")
+        fresh = knowledge_index.KnowledgeIndex(path)
+        assert fresh.answer("what is the nile").title == "Nile"
+        assert fresh.answer("what is the taj mahal") is None
+        fresh.close()
+    print("✓ Rebuilding swaps the index file in one rename")
+
+
+def test_local_answer_before_duckduckgo():
+    with tempfile.TemporaryDirectory() as directory:
+        _, path = build_index(directory)
+        index = knowledge_index.KnowledgeIndex(path)
+        tracing.tracer.enable()
+        tracing.tracer.reset()
+        try:
+            with replay.ReplayEnvironment(knowledge=index) as env:
+                session = sessions.ClientSession("test")
+                _, _, local, _ = main.process_for(session, "what is the capital of france")
+                _, _, remote, _ = main.process_for(session, "how far is delhi from mumbai")
+                requests = env.server.request_count("/")
+            stages = tracing.tracer.summary()
+        finally:
+            tracing.tracer.disable()
+            tracing.tracer.reset()
+            index.close()
+    assert local[0].text == "Its capital and largest city is Paris."
+    assert remote[0].text.startswith("The distance is")
+    assert requests == 1  # only the question the index did not know went to DuckDuckGo
+    assert knowledge_index.get_index() is not index
+    print(f"✓ Local answer in {stages['knowledge']['p50']:.2f} ms; DuckDuckGo asked only on a miss")
+
+
+if __name__ == "__main__":
+    test_build_and_answer()
+    test_rebuild_replaces_atomically()
+    test_local_answer_before_duckduckgo()
@@ -0,0 +1,212 @@
+"""
+Test script to verify the fuzzy music index and catalog loading
+"""
+import sys
+import os
+import csv
+import json
+import sqlite3
+import tempfile
+import itertools
+import threading
+import time
+from itertools import count
+
+# Add parent directory to path to import music_index
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import music_index
+import musicLibrary
+
+SONGS = [
+    ("Checkpoint", "https://example.com/checkpoint"),
+    ("Virtual", "https://example.com/virtual"),
+    ("Bohemian Rhapsody", "https://example.com/bohemian"),
+    ("Hotel California", "https://example.com/hotel"),
+    ("Stairway to Heaven", "https://example.com/stairway"),
+]
+
+_bumps = count(1)
+
+
+def build():
+    index = music_index.MusicIndex()
+    index.update(SONGS)
+    return index
+
+
+def test_exact_and_respaced():
+    index = build()
+    assert index.find("checkpoint").score == 1.0
+    assert index.find("check point").title == "Checkpoint"
+    assert index.find("HOTEL CALIFORNIA!").title == "Hotel California"
+    print("✓ Exact matches ignore case, punctuation and spacing")
+
+
+def test_fuzzy_and_phonetic():
+    index = build()
+    assert index.find("chek point").title == "Checkpoint"
+    assert index.find("vertual").title == "Virtual"
+    assert index.find("bohemian rapsody").title == "Bohemian Rhapsody"
+    assert index.find("stairway to heavan").title == "Stairway to Heaven"
+    assert index.find("hotel").title == "Hotel California"
+    assert index.find("something else entirely") is None
+    print("✓ Misheard titles found by spelling and sound")
+
+
+def test_add_and_remove():
+    index = build()
+    assert index.remove("Virtual")
+    assert not index.remove("Virtual")
+    assert index.find("virtual") is None
+    index.add("Virtual Insanity", "https://example.com/insanity")
+    assert index.find("virtual").title == "Virtual Insanity"
+    index.add("virtual insanity", "https://example.com/new")
+    assert index.get("Virtual Insanity") == "https://example.com/new"
+    assert len(index) == 5
+    print("✓ Songs added, updated and removed without a rebuild")
+
+
+def test_churn_compacts():
+    index = music_index.MusicIndex(compact_ratio=0.25)
+    index.update(SONGS)
+    # A catalog that keeps replacing songs: every round removes one and adds another
+    for i in range(200):
+        index.remove(f"Session Take {i - 1}")
+        index.add(f"Session Take {i}", f"https://example.com/take/{i}")
+    stats = index.stats()
+    assert len(index) == 6 and stats["compactions"] > 0
+    assert len(index._titles) <= 6 / 0.75 + 1
+    assert stats["words"] < 20 and max(len(p) for p in index._postings.values()) <= 2
+    assert index.find("session take 199").title == "Session Take 199"
+    assert index.find("vertual").title == "Virtual"
+    assert index.get("session take 198") is None
+    print(f"✓ {stats['compactions']} rebuilds kept a churning index at {len(index._titles)} entries")
+
+
+def test_lookups_during_updates():
+    # Every sound-alike is compared, however many there are
+    index = music_index.MusicIndex(max_sound_alikes=10 ** 6)
+    index.update(SONGS)
+    index.add("Bin", "https://example.com/bin")
+    errors = []
+    adding = threading.Event()
+
+    def look_up():
+        while not adding.is_set():
+            try:
+                index.similar_words("bin")
+                index.find("bin there")
+            except Exception as e:
+                errors.append(e)
+                return
+
+    reader = threading.Thread(target=look_up)
+    interval = sys.getswitchinterval()
+    sys.setswitchinterval(1e-6)  # switch threads often, so lookups are caught mid-iteration
+    reader.start()
+    try:
+        # Sound-alikes of "bin" all land in the set lookups are iterating
+        for i, (first, vowel) in enumerate(itertools.product("bfpv", ["a", "e", "i", "o", "u", "ai", "ea", "ee", "oo"])):
+            for n in range(60):
+                index.add(f"{first}{vowel}{'n' * (n + 1)} {i} {n}", f"https://example.com/{i}/{n}")
+    finally:
+        adding.set()
+        reader.join()
+        sys.setswitchinterval(interval)
+    assert errors == []
+    assert index.find("bin").title == "Bin"
+    print("✓ Lookups keep working while sound-alike titles are added")
+
+
+def test_catalog_formats():
+    with tempfile.TemporaryDirectory() as tmp:
+        json_path = os.path.join(tmp, "songs.json")
+        with open(json_path, "w", encoding="utf-8") as f:
+            json.dump([{"title": t, "link": l} for t, l in SONGS], f)
+
+        csv_path = os.path.join(tmp, "songs.csv")
+        with open(csv_path, "w", encoding="utf-8", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["title", "link"])
+            writer.writerows(SONGS)
+
+        db_path = os.path.join(tmp, "songs.sqlite3")
+        connection = sqlite3.connect(db_path)
+        connection.execute("CREATE TABLE songs (title TEXT, link TEXT)")
+        connection.executemany("INSERT INTO songs VALUES (?, ?)", SONGS)
+        connection.commit()
+        connection.close()
+
+        for path in (json_path, csv_path, db_path):
+            assert music_index.load_catalog(path) == SONGS, path
+
+        index = musicLibrary.build_index(json_path)
+    assert index.find("hotel california").link == "https://example.com/hotel"
+    # Built-in songs are still there
+    assert index.find("overthinker").title == "overthinker"
+    print("✓ JSON, CSV and SQLite catalogs load")
+
+
+def write_json(path, songs):
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(dict(songs), f)
+    # Make sure the change is visible even on filesystems with coarse timestamps
+    stamp = time.time() + next(_bumps)
+    os.utime(path, (stamp, stamp))
+
+
+def test_catalog_reload_is_incremental():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "songs.json")
+        write_json(path, SONGS)
+        index = music_index.MusicIndex()
+        watcher = music_index.CatalogWatcher(index, path, base={"Virtual": "https://example.com/builtin"})
+        assert watcher.reload() == {"added": 5, "changed": 0, "removed": 0}
+        assert not watcher.check()
+
+        edited = [song for song in SONGS if song[0] not in ("Hotel California", "Virtual")]
+        edited[0] = ("Checkpoint", "https://example.com/checkpoint-v2")
+        edited.append(("Yellow Submarine", "https://example.com/yellow"))
+        write_json(path, edited)
+        assert watcher.check()
+
+    assert index.find("yellow submarine").link == "https://example.com/yellow"
+    assert index.get("checkpoint") == "https://example.com/checkpoint-v2"
+    assert index.find("hotel california") is None
+    # A built-in song dropped from the catalog falls back to the built-in link
+    assert index.get("virtual") == "https://example.com/builtin"
+    assert watcher.stats()["reloads"] == 2
+    print(f"✓ Catalog edits applied incrementally in {watcher.last_reload_ms:.2f} ms")
+
+
+def test_watcher_polls_in_background():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "songs.json")
+        write_json(path, SONGS)
+        index = music_index.MusicIndex()
+        watcher = music_index.CatalogWatcher(index, path, interval=0.02)
+        watcher.reload()
+        watcher.start()
+        try:
+            write_json(path, SONGS + [("Yellow Submarine", "https://example.com/yellow")])
+            deadline = time.time() + 2
+            while "Yellow Submarine" not in index and time.time() < deadline:
+                # Lookups keep working while the watcher reloads
+                assert index.find("checkpoint") is not None
+                time.sleep(0.005)
+        finally:
+            watcher.stop()
+    assert "Yellow Submarine" in index
+    print("✓ Background watcher picked up the new song")
+
+
+if __name__ == "__main__":
+    test_exact_and_respaced()
+    test_fuzzy_and_phonetic()
+    test_add_and_remove()
+    test_churn_compacts()
+    test_lookups_during_updates()
+    test_catalog_formats()
+    test_catalog_reload_is_incremental()
+    test_watcher_polls_in_background()
@@ -0,0 +1,127 @@
+"""
+Test script to verify parallel news aggregation, deduplication and ranking
+"""
+import sys
+import os
+import time
+
+# Add parent directory to path to import news_aggregator
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import http_client
+import newsLibrary
+import news_aggregator
+from stub_server import StubServer, newsapi_route
+
+FEEDS = {
+    "india": [("India wins the cricket series against Australia - NDTV", "NDTV"),
+              ("Monsoon arrives early in Kerala", "The Hindu")],
+    "sports": [("India win cricket series against Australia", "ESPN"),
+               ("Chess olympiad begins in Chennai", "ESPN")],
+    "business": [("Sensex closes at record high", "Mint"),
+                 ("India wins the cricket series against Australia!", "Mint")],
+}
+
+
+def feed_articles(params):
+    return FEEDS[params.get("category", "india")]
+
+
+def make_feeds():
+    return [news_aggregator.NewsFeed("india", "everything", {"q": "India"}),
+            news_aggregator.NewsFeed("sports", "top-headlines", {"country": "in", "category": "sports"}),
+            news_aggregator.NewsFeed("business", "top-headlines", {"country": "in", "category": "business"})]
+
+
+def with_stub(delay=0.0, failing=()):
+    def routes():
+        everything = newsapi_route(feed_articles, delay=delay)
+        headlines = newsapi_route(feed_articles, delay=delay)
+
+        def top_headlines(params):
+            if params.get("category") in failing:
+                return 401, {"status": "error", "message": "Your API key is invalid."}
+            return headlines(params)
+        return {"/everything": everything, "/top-headlines": top_headlines}
+    return routes()
+
+
+def test_minhash_finds_near_duplicates():
+    index = news_aggregator.MinHashIndex(threshold=0.6)
+    first = news_aggregator.normalize_title("India wins the cricket series against Australia - NDTV", "NDTV")
+    index.add("a", first)
+    assert index.query(news_aggregator.normalize_title("India win the cricket series against Australia")) == "a"
+    assert index.query(news_aggregator.normalize_title("Sensex closes at record high")) is None
+    print("✓ Near-identical titles found, unrelated ones not")
+
+
+def test_aggregate_dedups_and_ranks():
+    original_key = newsLibrary.NEWS_API_KEY
+    newsLibrary.NEWS_API_KEY = "stub-key-1234567890"
+    try:
+        with StubServer(with_stub()) as server, http_client.override_endpoint("newsapi", server.url):
+            aggregator = news_aggregator.NewsAggregator(make_feeds())
+            stories = aggregator.stories()
+    finally:
+        newsLibrary.NEWS_API_KEY = original_key
+
+    titles = [story.title for story in stories]
+    assert len(stories) == 4
+    # The story carried by all three feeds ranks first
+    assert stories[0].title.startswith("India wins the cricket series")
+    assert len(stories[0].feeds) == 3
+    assert "Sensex closes at record high" in titles
+    assert aggregator.stats()["duplicates"] == 2
+    print(f"✓ {len(titles)} unique stories from 6 articles")
+
+
+def test_parallel_latency_and_partial_failure():
+    original_key = newsLibrary.NEWS_API_KEY
+    newsLibrary.NEWS_API_KEY = "stub-key-1234567890"
+    try:
+        with StubServer(with_stub(delay=0.3, failing=("business",))) as server, \
+                http_client.override_endpoint("newsapi", server.url):
+            aggregator = news_aggregator.NewsAggregator(make_feeds())
+            began = time.perf_counter()
+            headlines = aggregator.headlines()
+            elapsed = time.perf_counter() - began
+    finally:
+        newsLibrary.NEWS_API_KEY = original_key
+
+    # Three 0.3s feeds fetched one after another would take 0.9s
+    assert elapsed < 0.6
+    assert headlines[0].startswith("Headline 1: India wins the cricket series")
+    assert aggregator.stats()["failures"] == 1
+    print(f"✓ Feeds fetched in parallel ({elapsed:.2f}s), a failing feed is skipped")
+
+
+def test_undated_stories_rank_last():
+    merger = news_aggregator.StoryMerger()
+    merger.add("india", [("Undated story about the budget", "Mint", ""),
+                         ("Election results announced today", "NDTV", "2024-06-04T10:00:00Z"),
+                         ("Monsoon arrives early in Kerala", "The Hindu", "2024-06-01T08:00:00Z")])
+    assert [story.published_at for story in merger.ranked()] == ["2024-06-04T10:00:00Z", "2024-06-01T08:00:00Z", ""]
+    print("✓ Stories without a publish time rank after dated ones")
+
+
+def test_default_feeds_cost_one_request():
+    original = os.environ.pop("VIOLA_NEWS_CATEGORIES", None)
+    try:
+        assert [feed.name for feed in news_aggregator.default_feeds()] == ["india"]
+        os.environ["VIOLA_NEWS_CATEGORIES"] = "business, technology"
+        feeds = news_aggregator.default_feeds()
+    finally:
+        os.environ.pop("VIOLA_NEWS_CATEGORIES", None)
+        if original is not None:
+            os.environ["VIOLA_NEWS_CATEGORIES"] = original
+    assert [(feed.path, feed.params["q"]) for feed in feeds[1:]] == [("everything", "India business"),
+                                                                    ("everything", "India technology")]
+    print("✓ Category feeds are opt-in and searched with the everything endpoint")
+
+
+if __name__ == "__main__":
+    test_minhash_finds_near_duplicates()
+    test_aggregate_dedups_and_ranks()
+    test_parallel_latency_and_partial_failure()
+    test_default_feeds_cost_one_request()
+    test_undated_stories_rank_last()
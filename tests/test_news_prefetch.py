@@ -0,0 +1,108 @@
+"""
+Test script to verify the background news prefetcher and its on-disk cache
+"""
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path to import news_prefetch
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import newsLibrary
+import news_prefetch
+
+
+class FakeNewsAPI:
+    def __init__(self):
+        self.calls = 0
+        self.online = True
+
+    def __call__(self):
+        self.calls += 1
+        if not self.online:
+            raise requests.exceptions.ConnectionError("offline")
+        return [f"Headline 1: Batch {self.calls} from Stub News"]
+
+
+def with_api_key(test):
+    def run():
+        original = newsLibrary.NEWS_API_KEY
+        newsLibrary.NEWS_API_KEY = "stub-key-1234567890"
+        try:
+            with tempfile.TemporaryDirectory() as tmp:
+                test(os.path.join(tmp, "news.json"))
+        finally:
+            newsLibrary.NEWS_API_KEY = original
+    run.__name__ = test.__name__
+    return run
+
+
+@with_api_key
+def test_cached_headlines_served_immediately(cache_file):
+    api = FakeNewsAPI()
+    prefetcher = news_prefetch.NewsPrefetcher(fetch=api, cache_file=cache_file, min_interval=0)
+    assert prefetcher.get_headlines() == ["Headline 1: Batch 1 from Stub News"]
+    assert prefetcher.get_headlines() == ["Headline 1: Batch 1 from Stub News"]
+    assert api.calls == 1
+
+    # A restart reads the batch back from disk without calling NewsAPI
+    restarted = news_prefetch.NewsPrefetcher(fetch=api, cache_file=cache_file, min_interval=0)
+    assert restarted.get_headlines() == ["Headline 1: Batch 1 from Stub News"]
+    assert api.calls == 1
+    print("✓ Headlines served from cache, including after a restart")
+
+
+@with_api_key
+def test_last_good_batch_when_offline(cache_file):
+    api = FakeNewsAPI()
+    prefetcher = news_prefetch.NewsPrefetcher(fetch=api, cache_file=cache_file, min_interval=0)
+    prefetcher.refresh()
+    api.online = False
+
+    assert prefetcher.refresh() is False
+    assert prefetcher.get_headlines() == ["Headline 1: Batch 1 from Stub News"]
+    assert prefetcher.stats()["failures"] >= 1
+    print("✓ Last good batch served while NewsAPI is unreachable")
+
+
+@with_api_key
+def test_quota_is_respected(cache_file):
+    api = FakeNewsAPI()
+    prefetcher = news_prefetch.NewsPrefetcher(fetch=api, cache_file=cache_file, daily_quota=2, min_interval=0)
+    assert prefetcher.refresh()
+    assert prefetcher.refresh()
+    assert not prefetcher.refresh(force=True)
+    assert api.calls == 2
+    assert prefetcher.requests_left() == 0
+    print("✓ Daily NewsAPI quota respected")
+
+
+@with_api_key
+def test_background_refresh(cache_file):
+    api = FakeNewsAPI()
+    prefetcher = news_prefetch.NewsPrefetcher(fetch=api, cache_file=cache_file, refresh_interval=0.05,
+                                              min_interval=0.05)
+    prefetcher.start()
+    deadline = time.time() + 2
+    while api.calls < 2 and time.time() < deadline:
+        time.sleep(0.01)
+    prefetcher.stop()
+    assert api.calls >= 2
+    print(f"✓ Background thread refreshed {api.calls} times")
+
+
+def test_without_api_key():
+    prefetcher = news_prefetch.NewsPrefetcher(fetch=FakeNewsAPI(), cache_file=os.devnull)
+    if not newsLibrary.api_key_configured():
+        assert "configure your NewsAPI key" in prefetcher.get_headlines()[0]
+        print("✓ Missing API key reported")
+
+
+if __name__ == "__main__":
+    test_cached_headlines_served_immediately()
+    test_last_good_batch_when_offline()
+    test_quota_is_respected()
+    test_background_refresh()
+    test_without_api_key()
@@ -0,0 +1,58 @@
+"""
+Test script to verify the pre-rendered phrase cache
+"""
+import sys
+import os
+import tempfile
+
+# Add parent directory to path to import phrase_cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import phrase_cache
+import tts_engine
+from tests.test_tts_engine import FakeEngine, FakePlayer
+
+
+def make_cache(cache_dir, max_bytes=phrase_cache.DEFAULT_MAX_BYTES):
+    fake = FakeEngine()
+    player = FakePlayer()
+    engine = tts_engine.SpeechEngine(engine_factory=lambda: fake, player=player)
+    return phrase_cache.PhraseCache(engine, cache_dir=cache_dir, max_bytes=max_bytes), fake, player
+
+
+def test_warm_then_play_from_cache():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        cache, fake, player = make_cache(cache_dir)
+        cache.warm(["Yes, how can I help you?", "Initializing Viola..."]).join(2)
+        cache.engine.shutdown()
+
+        # A fresh cache over the same directory sees the rendered files
+        cache, fake, player = make_cache(cache_dir)
+        cache.engine.start()
+        cache.speak("Yes, how can I help you?")
+        cache.speak("Something not cached")
+        cache.engine.shutdown()
+
+        assert player.played == [cache.path_for("Yes, how can I help you?")]
+        assert fake.spoken == ["Something not cached"]
+        assert cache.stats()["hits"] == 1
+        print("✓ Cached phrase played from disk, uncached phrase synthesized live")
+
+
+def test_lru_eviction():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        # Each fake WAV is a few dozen bytes; allow room for two
+        cache, fake, player = make_cache(cache_dir, max_bytes=60)
+        for text in ["Opening google...", "Opening github...", "Opening youtube..."]:
+            assert cache.render(text, timeout=2)
+        cache.engine.shutdown()
+
+        assert cache.get("Opening google...") is None
+        assert cache.get("Opening youtube...") is not None
+        assert cache.stats()["bytes"] <= 60
+        print("✓ Least recently used phrase evicted")
+
+
+if __name__ == "__main__":
+    test_warm_then_play_from_cache()
+    test_lru_eviction()
@@ -0,0 +1,80 @@
+"""
+Test script to verify the speech recognition backends and the racing recognizer
+"""
+import sys
+import os
+import time
+
+# Add parent directory to path to import recognizers
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+import recognizers
+
+AUDIO = sr.AudioData(b"\x00\x00" * 1600, 16000, 2)
+
+
+def test_stub_backend():
+    backend = recognizers.StubBackend(["viola", None])
+    assert backend.transcribe(AUDIO) == "viola"
+    try:
+        backend.transcribe(AUDIO)
+    except sr.UnknownValueError:
+        pass
+    else:
+        raise AssertionError("None should mean 'could not understand'")
+    assert backend.stats()["calls"] == 2
+    print("✓ Stub backend returns scripted transcripts")
+
+
+def test_fastest_confident_backend_wins():
+    slow = recognizers.StubBackend(lambda a: "what is the time", delay=0.5, name="slow")
+    fast = recognizers.StubBackend(lambda a: "what is the time", delay=0.01, name="fast")
+    race = recognizers.RacingRecognizer([slow, fast])
+
+    began = time.perf_counter()
+    result = race.recognize(AUDIO)
+    elapsed = time.perf_counter() - began
+
+    assert result.backend == "fast"
+    assert elapsed < 0.4
+    assert race.stats()["fast"]["wins"] == 1
+    print(f"✓ Fast backend won in {elapsed * 1000:.0f} ms")
+
+
+def test_unconfident_result_waits_for_better():
+    guess = recognizers.StubBackend(lambda a: "play check point", confidence=0.3, name="guess")
+    sure = recognizers.StubBackend(lambda a: "play checkpoint", confidence=0.9, delay=0.05, name="sure")
+    result = recognizers.RacingRecognizer([guess, sure], min_confidence=0.6).recognize(AUDIO)
+    assert result.text == "play checkpoint"
+    print("✓ Low-confidence answer did not win the race")
+
+
+def test_slow_backend_timeout():
+    stalled = recognizers.StubBackend(lambda a: "too late", delay=1.0, timeout=0.1, name="stalled")
+    ok = recognizers.StubBackend(lambda a: "hello", confidence=0.3, delay=0.02, name="ok")
+    race = recognizers.RacingRecognizer([stalled, ok])
+
+    began = time.perf_counter()
+    result = race.recognize(AUDIO)
+    elapsed = time.perf_counter() - began
+
+    assert result.text == "hello"
+    assert elapsed < 0.5
+    assert race.stats()["stalled"]["timeouts"] == 1
+
+    alone = recognizers.RacingRecognizer([recognizers.StubBackend(lambda a: "x", delay=1.0, timeout=0.1)])
+    try:
+        alone.recognize(AUDIO)
+    except sr.RequestError:
+        pass
+    else:
+        raise AssertionError("timed out backend should raise RequestError")
+    print("✓ Slow backend timed out without stalling recognition")
+
+
+if __name__ == "__main__":
+    test_stub_backend()
+    test_fastest_confident_backend_wins()
+    test_unconfident_result_waits_for_better()
+    test_slow_backend_timeout()
@@ -0,0 +1,67 @@
+"""
+Test script to verify the offline replay harness drives the real main loop
+"""
+import sys
+import os
+import tempfile
+import wave
+
+# Add parent directory to path to import replay
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay
+
+SCRIPT = """
+# wake word, then the command on its own
+viola
+what is the time
+viola open youtube
+viola what is the capital of france
+viola tell me the news
+~ viola stop
+"""
+
+
+def test_loop_replay():
+    report = replay.replay(replay.parse_script(SCRIPT))
+    assert report["mode"] == "loop"
+    assert report["intents"] == {"time": 1, "open_site": 1, "question": 1, "news": 1}
+    assert report["opened"] == ["https://www.youtube.com/@LotusOutlook"]
+    assert "Yes, how can I help you?" in report["spoken"]
+    assert "Paris is the capital and most populous city of France." in report["spoken"]
+    assert "Headline 1: Sample headline number 1 from Stub News" in report["spoken"]
+    assert report["barge_ins"] == 1
+    assert report["commands_per_sec"] > 0
+    for stage in ("capture", "wake", "stt", "intent", "skill:question", "tts"):
+        assert report["stages"][stage]["count"] >= 1, stage
+    # The question was looked up from its partial transcript, off the command's critical path
+    assert report["speculation"]["hits"] == 1
+    assert "http:duckduckgo" not in report["stages"]
+    print(f"✓ Loop replay: {report['commands_per_sec']:.1f} commands/sec")
+
+
+def test_direct_replay_from_wav():
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "who_are_you.wav")
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(16000)
+            f.writeframes(replay.synthetic_audio("who are you").frame_data)
+        with open(os.path.join(directory, "script.txt"), "w", encoding="utf-8") as f:
+            f.write("viola what is the time\nwho_are_you.wav | viola who are you\nviola stop listening\nviola open google\n")
+        phrases = replay.load_script(os.path.join(directory, "script.txt"))
+        from_directory = replay.load_script(directory)
+
+    assert [phrase.transcript for phrase in from_directory] == ["who are you"]
+    assert round(phrases[1].seconds, 1) == 1.1
+    report = replay.replay(phrases, direct=True, repeat=2)
+    # Nothing after "stop listening" runs
+    assert report["intents"] == {"time": 2, "name": 2}
+    assert report["spoken"].count("I am Viola, your AI assistant") == 2
+    print("✓ Direct replay of a script with a WAV recording")
+
+
+if __name__ == "__main__":
+    test_loop_replay()
+    test_direct_replay_from_wav()
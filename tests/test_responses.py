@@ -0,0 +1,100 @@
+"""
+Test script to verify response templates and replies stitched from cached clips
+"""
+import sys
+import os
+import math
+import struct
+import tempfile
+import wave
+from datetime import time
+
+# Add parent directory to path to import responses
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import music_index
+import phrase_cache
+import responses
+import tts_engine
+from tests.test_tts_engine import FakeEngine, FakePlayer
+
+RATE = 16000
+
+
+class WavEngine(FakeEngine):
+    """Renders every phrase as 0.2 s of tone with 0.3 s of silence either side, like a real voice"""
+
+    def save_to_file(self, text, path):
+        self.rendered.append(text)
+        silence = b"\0\0" * int(RATE * 0.3)
+        tone = b"".join(struct.pack("<h", int(5000 * math.sin(2 * math.pi * 200 * i / RATE)))
+                        for i in range(int(RATE * 0.2)))
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(RATE)
+            f.writeframes(silence + tone + silence)
+
+
+def test_time_template():
+    assert responses.clock(time(0, 5)).clips == ("twelve", "oh five", "AM")
+    assert responses.clock(time(23, 47)).clips == ("eleven", "forty seven", "PM")
+    text, clips = responses.TIME.render(time=responses.clock(time(13, 0)))
+    assert text == "The time is 01:00 PM"
+    assert clips == ["The time is", "one", "o'clock", "PM"]
+    # Every time of day is covered by 72 clips ("ten" to "twelve" serve as hours and minutes)
+    clip_texts = responses.clip_texts()
+    assert len(clip_texts) == 72
+    for hour in range(24):
+        for minute in range(60):
+            assert set(responses.TIME.render(time=responses.clock(time(hour, minute)))[1]) <= set(clip_texts)
+    print("✓ The time template splits every time of day into 72 reusable clips")
+
+
+def test_reply_rebuilt_only_on_change():
+    index = music_index.MusicIndex()
+    index.update([("virtual", "v"), ("ping", "p")])
+    reply = responses.Reply(lambda: ", ".join(index.titles(5)), lambda: index.version)
+    assert reply.get() == "virtual, ping"
+    assert reply.get() == "virtual, ping"
+    assert reply.builds == 1
+    index.add("ping", "p")  # no change
+    reply.get()
+    assert reply.builds == 1
+    index.add("checkpoint", "c")
+    assert reply.get() == "virtual, ping, checkpoint"
+    assert reply.builds == 2
+    print("✓ Replies listing the catalog are rebuilt only when it changes")
+
+
+def test_time_stitched_from_cached_clips():
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fake = WavEngine()
+        player = FakePlayer()
+        engine = tts_engine.SpeechEngine(engine_factory=lambda: fake, player=player)
+        cache = phrase_cache.PhraseCache(engine, cache_dir=cache_dir)
+        text, clips = responses.TIME.render(time=responses.clock(time(15, 22)))
+
+        # Before the clips are rendered the reply is synthesized live
+        cache.speak(text, clips)
+        assert fake.spoken == [text]
+
+        cache.warm(responses.clip_texts()).join(10)
+        cache.speak(text, clips)
+        cache.speak(text, clips)
+        engine.shutdown()
+
+        assert fake.spoken == [text]
+        assert len(player.played) == 2 and player.played[0] == player.played[1]
+        assert cache.stats()["stitched"] == 1
+        with wave.open(player.played[0], "rb") as f:
+            seconds = f.getnframes() / f.getframerate()
+        # Four 0.8 s clips, with the silence between them cut to a short pad
+        assert 1.4 < seconds < 2.0, seconds
+        print(f"✓ The time is played from {len(clips)} cached clips stitched into {seconds:.2f} s of audio")
+
+
+if __name__ == "__main__":
+    test_time_template()
+    test_reply_rebuilt_only_on_change()
+    test_time_stitched_from_cached_clips()
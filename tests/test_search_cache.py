@@ -0,0 +1,132 @@
+"""
+Test script to verify the DuckDuckGo response cache
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import ttl_cache
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import requests
+import ttl_cache
+import duckduckgo_library
+
+
+def test_normalized_hits_and_ttl():
+    cache = ttl_cache.TTLCache(ttl=0.2)
+    calls = []
+
+    def fetch():
+        calls.append(1)
+        return "Paris"
+
+    assert cache.get_or_fetch("What is the capital of France?", fetch) == "Paris"
+    assert cache.get_or_fetch("what is the  capital of france", fetch) == "Paris"
+    assert len(calls) == 1
+
+    time.sleep(0.25)
+    cache.get_or_fetch("what is the capital of france", fetch)
+    assert len(calls) == 2
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+    print(f"✓ Normalized query cached, hit rate {stats['hit_rate']:.0%}")
+
+
+def test_lru_eviction():
+    cache = ttl_cache.TTLCache(max_entries=2)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert cache.get("a") == 1 and cache.get("c") == 3
+    print("✓ Least recently used entry evicted")
+
+
+def test_concurrent_lookups_coalesce():
+    cache = ttl_cache.TTLCache()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.2)
+        return "answer"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("who is viola", slow_fetch)))
+               for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert results == ["answer"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+    print("✓ Five identical lookups sent one request")
+
+
+def test_stale_served_on_network_error():
+    cache = ttl_cache.TTLCache(ttl=0.05, stale_ttl=60)
+    cache.get_or_fetch("weather", lambda: "sunny")
+    time.sleep(0.1)
+
+    def offline():
+        raise requests.exceptions.ConnectionError("offline")
+
+    assert cache.get_or_fetch("weather", offline) == "sunny"
+    assert cache.stats()["stale_served"] == 1
+    try:
+        cache.get_or_fetch("never cached", offline)
+    except requests.exceptions.ConnectionError:
+        pass
+    else:
+        raise AssertionError("errors without a stale entry must propagate")
+    print("✓ Stale answer served while offline")
+
+
+def test_sqlite_persistence():
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, "search.sqlite3")
+        cache = ttl_cache.TTLCache(db_path=db_path)
+        cache.set("What is Python?", "A programming language")
+        cache.close()
+
+        reopened = ttl_cache.TTLCache(db_path=db_path)
+        assert reopened.get("what is python") == "A programming language"
+        reopened.close()
+    print("✓ Entries survive a restart")
+
+
+def test_web_search_summary_uses_cache():
+    original = duckduckgo_library.fetch_summary
+    calls = []
+
+    def fake_fetch(query):
+        calls.append(query)
+        return "Paris is the capital of France."
+
+    duckduckgo_library.fetch_summary = fake_fetch
+    duckduckgo_library.cache.clear()
+    try:
+        first = duckduckgo_library.web_search_summary("what is the capital of France")
+        second = duckduckgo_library.web_search_summary("What is the capital of France?")
+    finally:
+        duckduckgo_library.fetch_summary = original
+        duckduckgo_library.cache.clear()
+
+    assert first == second == "Paris is the capital of France."
+    assert len(calls) == 1
+    print("✓ Repeated DuckDuckGo query answered from cache")
+
+
+if __name__ == "__main__":
+    test_normalized_hits_and_ttl()
+    test_lru_eviction()
+    test_concurrent_lookups_coalesce()
+    test_stale_served_on_network_error()
+    test_sqlite_persistence()
+    test_web_search_summary_uses_cache()
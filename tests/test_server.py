@@ -0,0 +1,97 @@
+"""
+Test script to verify the multi-session server keeps sessions apart and shares caches
+"""
+import sys
+import os
+import json
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+# Add parent directory to path to import server
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import recognizers
+import replay
+import server
+import sessions
+from benchmarks import server_load
+
+
+def post(url, session_id, text):
+    request = urllib.request.Request(f"{url}sessions/{session_id}/command", method="POST",
+                                     data=json.dumps({"text": text}).encode("utf-8"))
+    with urllib.request.urlopen(request) as response:
+        return json.loads(response.read())
+
+
+def test_sessions_get_their_own_replies():
+    with replay.ReplayEnvironment(http_delay=0.05), server.ViolaServer(port=0) as viola:
+        questions = {
+            f"room-{n}": text for n, text in enumerate(
+                ["what is the capital of france", "open youtube", "who are you", "play virtual"] * 10)
+        }
+        with ThreadPoolExecutor(max_workers=40) as pool:
+            results = dict(zip(questions, pool.map(lambda item: post(viola.url, *item), questions.items())))
+        stats = viola.stats()
+
+    for session_id, reply in results.items():
+        assert reply["session"] == session_id
+        assert reply["command"] == questions[session_id]
+        if reply["intent"] == "question":
+            assert reply["replies"] == ["Paris is the capital and most populous city of France."]
+            assert reply["open"] == []
+        elif reply["intent"] == "open_site":
+            assert reply["replies"] == ["Opening youtube..."]
+            assert reply["open"] == ["https://www.youtube.com/@LotusOutlook"]
+        elif reply["intent"] == "name":
+            assert reply["replies"] == ["I am Viola, your AI assistant"]
+        else:
+            assert reply["replies"] == ["Playing virtual"]
+            assert len(reply["open"]) == 1
+    assert stats["sessions"]["active"] == 40
+    # Ten sessions asked the same question at once: one lookup, shared through the cache
+    assert stats["search_cache"]["misses"] == 1
+    assert sessions.current() is None
+    print("✓ 40 concurrent sessions each got their own replies, sharing one lookup")
+
+
+def test_errors_and_session_lifecycle():
+    with replay.ReplayEnvironment(), server.ViolaServer(port=0) as viola:
+        assert post(viola.url, "kitchen", "Viola, what is the time")["command"] == "what is the time"
+        try:
+            post(viola.url, "kitchen", "")
+            raise AssertionError("an empty command was accepted")
+        except urllib.error.HTTPError as e:
+            assert e.code == 400
+        request = urllib.request.Request(f"{viola.url}sessions/kitchen", method="DELETE")
+        with urllib.request.urlopen(request) as response:
+            assert json.loads(response.read())["removed"] is True
+        assert viola.stats()["sessions"]["active"] == 0
+    print("✓ Bad requests are rejected and sessions can be closed")
+
+
+def test_recorded_command():
+    phrase = replay.Phrase("viola who are you")
+    stt = recognizers.StubBackend(lambda audio: "viola who are you", name="stub")
+    with replay.ReplayEnvironment(), server.ViolaServer(port=0, stt=stt) as viola:
+        wav = phrase.audio.get_wav_data()
+        request = urllib.request.Request(f"{viola.url}sessions/hall/command", method="POST", data=wav,
+                                         headers={"Content-Type": "audio/wav"})
+        with urllib.request.urlopen(request) as response:
+            reply = json.loads(response.read())
+    assert reply["intent"] == "name"
+    assert reply["replies"] == ["I am Viola, your AI assistant"]
+    print("✓ Recorded commands are recognized and answered")
+
+
+def test_load_generator():
+    assert server_load.main(["--sessions", "100", "--commands", "3", "--http-delay", "0.01"]) == 0
+    print("✓ The load generator ran 100 sessions without errors")
+
+
+if __name__ == "__main__":
+    test_sessions_get_their_own_replies()
+    test_errors_and_session_lifecycle()
+    test_recorded_command()
+    test_load_generator()
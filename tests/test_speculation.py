@@ -0,0 +1,171 @@
+"""
+Test script to verify speculative lookups from partial transcripts
+"""
+import sys
+import os
+import tempfile
+import threading
+import time
+
+# Add parent directory to path to import speculation
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+import audio_capture
+import main
+import speculation
+import vad
+from tests.test_audio_capture import write_wav
+
+
+def question(text):
+    return text if text.startswith("what is the ") and len(text.split()) > 3 else None
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def speak(speculator, clock, words, pauses=None, frame=0.02, word_seconds=0.35, end_silence=0.3):
+    """Feed partials the way a streaming recognizer does: one per 20 ms frame, a word at a time."""
+    pauses = pauses or {}
+    for i in range(1, len(words) + 1):
+        partial = " ".join(words[:i])
+        held = word_seconds + pauses.get(i, 0.0) if i < len(words) else end_silence
+        for _ in range(round(held / frame)):
+            speculator.observe(partial)
+            clock.now += frame
+    return speculator.end_utterance()
+
+
+def test_settled_partial_is_fetched_and_hit():
+    fetched = []
+    clock = FakeClock()
+    # Production defaults: only the clock is replaced
+    speculator = speculation.Speculator(main.speculative_query, lambda q: fetched.append(q) or q.upper(),
+                                        clock=clock)
+    assert speak(speculator, clock, "viola what is the capital of france".split()) == "what is the capital of france"
+    time.sleep(0.05)
+
+    # Each word's prefix was held for a full word, yet none of them was looked up
+    assert fetched == ["what is the capital of france"]
+    assert speculator.resolve("what is the capital of france")
+    assert not speculator.resolve("what is the time in paris")
+    stats = speculator.stats()
+    assert (stats["launched"], stats["hits"], stats["misses"], stats["wasted"]) == (1, 1, 1, 0)
+    assert stats["hit_rate"] == 0.5
+    print("✓ A question is fetched once, at the end of the phrase, and counted as a hit")
+
+
+def test_lookups_per_utterance_are_capped():
+    fetched = []
+    clock = FakeClock()
+    speculator = speculation.Speculator(main.speculative_query, lambda q: fetched.append(q) or q, clock=clock)
+    # Long pauses after "capital" and "of france": both prefixes look settled
+    words = "what is the capital of france in europe".split()
+    speak(speculator, clock, words, pauses={4: 0.6, 6: 0.6})
+    time.sleep(0.05)
+
+    assert fetched == ["what is the capital", "what is the capital of france in europe"]
+    stats = speculator.stats()
+    assert stats["launched"] == 2 and stats["wasted"] == 1
+    assert speculator.resolve("what is the capital of france in europe")
+
+    # A phrase dropped as noise starts nothing
+    speculator.observe("what is the capital of spain")
+    assert speculator.end_utterance(heard=False) is None
+    print("✓ At most one mid-phrase guess per utterance, plus the phrase's last guess")
+
+
+def test_talking_past_a_guess_cancels_it():
+    release = threading.Event()
+    started = []
+
+    def fetch(query):
+        started.append(query)
+        release.wait(2)
+        return query
+
+    # One worker: the first guess occupies it, so the second is still queued when replaced
+    clock = FakeClock()
+    speculator = speculation.Speculator(question, fetch, max_per_utterance=4, max_workers=1, clock=clock)
+    for partial in ["what is the capital", "what is the capital of", "what is the capital of spain"]:
+        for _ in range(2):
+            speculator.observe(partial)
+            clock.now += 0.5
+    release.set()
+    speculator.end_utterance()
+    time.sleep(0.05)
+
+    stats = speculator.stats()
+    assert stats["launched"] == 3
+    assert stats["wasted"] == 2
+    assert stats["cancelled"] == 1
+    assert "what is the capital of" not in started
+    assert speculator.resolve("what is the capital of spain")
+    print("✓ Guesses the user talked past are cancelled and counted as wasted")
+
+
+class WordStream:
+    """Streaming recognizer stand-in: one more word of the question per 0.2 s of audio."""
+
+    words = "what is the capital of france".split()
+
+    def __init__(self):
+        self.bytes = 0
+
+    def feed(self, data):
+        self.bytes += len(data)
+        count = min(len(self.words), 1 + self.bytes // (16000 * 2 // 5))
+        return " ".join(self.words[:count])
+
+
+class WordBackend:
+    name = "words"
+
+    def start_stream(self, sample_rate):
+        return WordStream()
+
+
+def test_partials_from_captured_audio():
+    speculator = speculation.Speculator(question, lambda q: q)
+    transcriber = speculation.StreamingTranscriber(WordBackend(), speculator)
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "question.wav")
+        write_wav(path, [("silence", 1.0), ("tone", 1.4), ("silence", 1.0)])
+        listener = vad.VADListener(classifier=vad.EnergyClassifier(), on_audio=transcriber)
+        session = audio_capture.CaptureSession(source_factory=lambda: sr.AudioFile(path), vad=listener)
+        session.start()
+        session.get(timeout=5)
+        session.stop()
+    transcriber.close()
+
+    assert transcriber.partials > 50
+    assert speculator.stats()["launched"] == 1
+    assert speculator.resolve("what is the capital of france")
+    print("✓ Partial transcripts of captured audio start the lookup before the final transcript")
+
+
+def test_main_predicts_search_queries():
+    hits = main.router.stats().get("question", {}).get("hits", 0)
+    assert main.speculative_query("viola what is the capital of france") == "what is the capital of france"
+    assert main.speculative_query("how far is delhi from mumbai") == "distance from delhi to mumbai"
+    assert main.speculative_query("viola open youtube") is None
+    assert main.speculative_query("viola what is") is None
+    assert main.speculative_query("viola what is the") is None
+    assert main.speculative_query("how far is delhi from") is None
+    # Guessing is not counted as a routed command
+    assert main.router.stats().get("question", {}).get("hits", 0) == hits
+    print("✓ main maps partial transcripts to the query its handlers will search")
+
+
+if __name__ == "__main__":
+    test_settled_partial_is_fetched_and_hit()
+    test_lookups_per_utterance_are_capped()
+    test_talking_past_a_guess_cancels_it()
+    test_partials_from_captured_audio()
+    test_main_predicts_search_queries()
@@ -0,0 +1,153 @@
+"""
+Test script to verify pipelined speech: the next part is synthesized while the current one plays
+"""
+import sys
+import os
+import math
+import struct
+import subprocess
+import threading
+import time
+import wave
+
+# Add parent directory to path to import speech_pipeline
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import replay
+import speech_pipeline
+import tts_engine
+from tests.test_tts_engine import FakeEngine, FakePlayer
+
+RATE = 16000
+RENDER_SECONDS = 0.15
+
+
+class SlowWavEngine(FakeEngine):
+    """Takes RENDER_SECONDS per phrase and renders 0.1 s of tone per word, padded with 0.3 s of silence"""
+
+    def save_to_file(self, text, path):
+        time.sleep(RENDER_SECONDS)
+        self.rendered.append(text)
+        silence = b"\0\0" * int(RATE * 0.3)
+        tone = b"".join(struct.pack("<h", int(5000 * math.sin(2 * math.pi * 200 * i / RATE)))
+                        for i in range(int(RATE * 0.1 * len(text.split()))))
+        with wave.open(path, "wb") as f:
+            f.setnchannels(1)
+            f.setsampwidth(2)
+            f.setframerate(RATE)
+            f.writeframes(silence + tone + silence)
+
+
+class FakeOutput:
+    """Stands in for PCMOutput: 'plays' each buffer by sleeping for its length, until stopped"""
+
+    available = True
+
+    def __init__(self):
+        self.written = []
+        self.closed = False
+        self.stopped = threading.Event()
+
+    def supports(self, params):
+        return True
+
+    def write(self, frames, params):
+        self.written.append(len(frames))
+        self.stopped.wait(len(frames) / (params.sampwidth * params.framerate))
+
+    def close(self):
+        self.closed = True
+
+    def stop(self):
+        self.stopped.set()
+
+
+HEADLINES = ["One.", "Two words.", "Now three words.", "And now four words."]
+
+
+def test_parts_overlap_playback():
+    fake = SlowWavEngine()
+    engine = tts_engine.SpeechEngine(engine_factory=lambda: fake, player=FakePlayer())
+    output = FakeOutput()
+    began = time.perf_counter()
+    stream = speech_pipeline.PipelinedSpeech(engine, iter(HEADLINES), output=output)
+    assert stream.wait(10)
+    elapsed = time.perf_counter() - began
+    engine.shutdown()
+    stats = stream.stats()
+
+    assert fake.rendered == HEADLINES
+    assert stats["chunks"] == 4 and stats["streamed"] and output.closed
+    # Parts went out in order (each has one more word of tone), with the 0.3 s silences trimmed
+    assert output.written == sorted(output.written)
+    played = sum(output.written) / (2 * RATE)
+    assert 1.0 < played < 1.6, played
+    # Only the first render is waited for; the rest were synthesized while earlier parts played
+    sequential = played + RENDER_SECONDS * len(HEADLINES)
+    assert elapsed < sequential - 2 * RENDER_SECONDS, (elapsed, sequential)
+    assert stats["max_gap_ms"] < 50, stats
+    assert stats["first_audio_ms"] < RENDER_SECONDS * 1000 + 100, stats
+    print(f"✓ {stats['chunks']} parts played in {elapsed:.2f}s (sequential {sequential:.2f}s), "
+          f"longest gap {stats['max_gap_ms']:.1f} ms")
+
+
+def test_cancel_stops_output():
+    fake = SlowWavEngine()
+    engine = tts_engine.SpeechEngine(engine_factory=lambda: fake, player=FakePlayer())
+    output = FakeOutput()
+    stream = speech_pipeline.PipelinedSpeech(engine, HEADLINES * 3, output=output)
+    deadline = time.time() + 5
+    while not output.written and time.time() < deadline:
+        time.sleep(0.01)
+    assert engine.active_since(time.perf_counter())  # audio is playing outside the engine's worker
+    stream.cancel()
+    assert stream.wait(2)
+    engine.shutdown()
+
+    assert stream.stats()["cancelled"] and output.stopped.is_set() and output.closed
+    assert stream.stats()["chunks"] < 3
+    assert len(fake.rendered) < len(HEADLINES * 3)
+    assert not engine.active_since(time.perf_counter() + 1)
+    print(f"✓ Cancelling stopped the output after {stream.stats()['chunks']} part(s)")
+
+
+def test_stopped_player_is_reaped():
+    # A player that reads its input, then keeps "playing" the buffered audio for a while
+    player = [sys.executable, "-c", "import sys, time; sys.stdin.buffer.read(); time.sleep(5)"]
+    output = speech_pipeline.PCMOutput()
+    process = output._process = subprocess.Popen(player, stdin=subprocess.PIPE)
+    output._params = (1, 2, RATE)
+    output.write(b"\0\0" * RATE, output._params)
+    output.stop()
+    output.close()
+    assert process.returncode is not None and output._process is None
+
+    # stop() still reaches the player while close() waits for the last buffer to drain
+    process = output._process = subprocess.Popen(player, stdin=subprocess.PIPE)
+    threading.Timer(0.2, output.stop).start()
+    began = time.perf_counter()
+    output.close()
+    assert process.returncode is not None and time.perf_counter() - began < 2
+    print("✓ A stopped player process is waited for, not left behind")
+
+
+def test_files_played_in_order_without_output():
+    spoken = []
+    engine = tts_engine.SpeechEngine(engine_factory=lambda: replay.ScriptedSpeechDriver(spoken),
+                                     player=replay.ScriptedPlayer(spoken))
+    assert speech_pipeline.available(engine)
+    stream = speech_pipeline.PipelinedSpeech(engine, ["First headline. Second headline.", "Third headline."])
+    assert stream.wait(10)
+    engine.shutdown()
+
+    # No streaming output for a non-default player: the rendered files go to it one by one
+    assert not stream.stats()["streamed"]
+    assert spoken == ["First headline.", "Second headline.", "Third headline."]
+    print("✓ Without a streaming output the rendered parts play through the engine's player in order")
+
+
+if __name__ == "__main__":
+    test_parts_overlap_playback()
+    test_cancel_stops_output()
+    test_stopped_player_is_reaped()
+    test_files_played_in_order_without_output()
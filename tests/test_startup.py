@@ -0,0 +1,79 @@
+"""
+Test script to verify lazy imports and the startup profile
+"""
+import sys
+import os
+import subprocess
+
+# Add parent directory to path to import startup
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import startup
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_lazy_module_loads_on_first_use():
+    name = "viola_lazy_probe"
+    sys.modules.pop(name, None)
+
+    class Finder:
+        loads = 0
+
+        def find_spec(self, fullname, path=None, target=None):
+            if fullname != name:
+                return None
+            import importlib.machinery
+
+            class Loader:
+                def create_module(self, spec):
+                    return None
+
+                def exec_module(self, module):
+                    Finder.loads += 1
+                    module.VALUE = 1
+
+            return importlib.machinery.ModuleSpec(name, Loader())
+
+    finder = Finder()
+    sys.meta_path.insert(0, finder)
+    try:
+        lazy = startup.lazy_import(name)
+        assert not lazy.loaded and Finder.loads == 0
+        assert lazy.VALUE == 1
+        assert Finder.loads == 1
+        # Writes go through to the real module
+        lazy.VALUE = 2
+        assert sys.modules[name].VALUE == 2
+        assert startup.lazy_import(name) is sys.modules[name]
+    finally:
+        sys.meta_path.remove(finder)
+        sys.modules.pop(name, None)
+    print("✓ Lazy module imported on first attribute access")
+
+
+def test_profile_records_phases_and_marks():
+    profile = startup.StartupProfile()
+    with profile.phase("microphone"):
+        pass
+    profile.mark("first listen")
+    report = profile.report()
+    assert "microphone" in report
+    assert "first listen:" in report
+    print("✓ Startup profile reports init steps and milestones")
+
+
+def test_main_import_is_light():
+    """Importing main must not pull in the speech and network stacks"""
+    code = ("import sys, main; "
+            "print(' '.join(m for m in ('requests', 'speech_recognition', 'dotenv', 'asyncio') if m in sys.modules))")
+    result = subprocess.run([sys.executable, "-c", code], cwd=ROOT, capture_output=True, text=True, timeout=60)
+    assert result.returncode == 0, result.stderr
+    assert result.stdout.strip() == "", result.stdout
+    print("✓ main imports without speech_recognition, requests, dotenv or asyncio")
+
+
+if __name__ == "__main__":
+    test_lazy_module_loads_on_first_use()
+    test_profile_records_phases_and_marks()
+    test_main_import_is_light()
@@ -0,0 +1,81 @@
+"""
+Test script to verify latency tracing: spans, JSON lines records and percentiles
+"""
+import sys
+import os
+import json
+import tempfile
+
+# Add parent directory to path to import tracing
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tracing
+from intent_router import IntentRouter
+from tests.test_async_runtime import Recorder, run
+
+
+def test_disabled_is_a_no_op():
+    tracer = tracing.tracer
+    assert not tracer.enabled
+    assert tracer.interaction("command") is None
+    with tracing.span("stt") as span:
+        span.set(backend="google")
+    assert span is tracing._NULL_SPAN
+    assert tracer.summary() == {}
+    print("✓ Tracing is off by default and spans are no-ops")
+
+
+def test_records_and_percentiles():
+    router = IntentRouter()
+    router.register("time", r"\btime\b", lambda match: None)
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "trace.jsonl")
+        tracer = tracing.tracer.enable(path)
+        try:
+            for i in range(20):
+                interaction = tracer.interaction("command", command="what time is it")
+                with tracing.activate(interaction):
+                    tracing.record("capture", 0.5 + i / 100)
+                    router.dispatch("what time is it")
+                interaction.finish()
+            summary = tracer.summary()
+        finally:
+            tracer.disable()
+            tracer._samples.clear()
+        with open(path, encoding="utf-8") as f:
+            records = [json.loads(line) for line in f]
+
+    assert len(records) == 20
+    names = [span["name"] for span in records[0]["spans"]]
+    assert names == ["capture", "intent", "skill:time"]
+    assert records[0]["spans"][1]["intent"] == "time"
+    assert summary["capture"]["count"] == 20
+    assert round(summary["capture"]["p50"]) == 590
+    assert round(summary["capture"]["p95"]) == 680
+    assert summary["total:command"]["count"] == 20
+    print("✓ Interactions are written as JSON lines with nearest-rank percentiles")
+
+
+def test_runtime_traces_commands():
+    finished = []
+    tracer = tracing.tracer.enable(None, on_finish=finished.append)
+    try:
+        recorder = Recorder()
+        run([("viola", False), ("what is the time", False), ("viola open youtube", False)], recorder)
+    finally:
+        tracer.disable()
+        tracer._samples.clear()
+    kinds = [record["kind"] for record in finished]
+    assert kinds.count("wake") == 1
+    commands = [record for record in finished if record["kind"] == "command"]
+    assert sorted(record["command"] for record in commands) == ["open youtube", "what is the time"]
+    spans = {record["command"]: [span["name"] for span in record["spans"]] for record in commands}
+    assert spans["what is the time"] == ["stt"]
+    assert spans["open youtube"] == ["wake"]
+    print("✓ The runtime traces each command from recognition to completion")
+
+
+if __name__ == "__main__":
+    test_disabled_is_a_no_op()
+    test_records_and_percentiles()
+    test_runtime_traces_commands()
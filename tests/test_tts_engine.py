@@ -0,0 +1,258 @@
+"""
+Test script to verify the persistent speech engine worker
+"""
+import sys
+import os
+import threading
+import time
+
+# Add parent directory to path to import tts_engine
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import tts_engine
+
+
+class FakeVoice:
+    def __init__(self, voice_id):
+        self.id = voice_id
+
+
+class FakePlayer:
+    """Records played files instead of using the audio device"""
+
+    available = True
+
+    def __init__(self):
+        self.played = []
+
+    def play(self, path):
+        self.played.append(path)
+
+    def stop(self):
+        pass
+
+
+class FakeEngine:
+    """Minimal stand-in for a pyttsx3 engine that records what it was asked to say"""
+
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.properties = {"voices": [FakeVoice("male"), FakeVoice("female")]}
+        self.callbacks = {}
+        self.spoken = []
+        self.pending = []
+        self.rendered = []
+        self.stopped = threading.Event()
+
+    def setProperty(self, name, value):
+        self.properties[name] = value
+
+    def getProperty(self, name):
+        return self.properties.get(name)
+
+    def connect(self, topic, callback):
+        self.callbacks[topic] = callback
+
+    def say(self, text):
+        self.pending.append(text)
+
+    def save_to_file(self, text, path):
+        self.pending.append((text, path))
+
+    def runAndWait(self):
+        self.stopped.clear()
+        for text in self.pending:
+            if isinstance(text, tuple):
+                text, path = text
+                with open(path, "wb") as f:
+                    f.write(b"RIFF" + text.encode("utf-8"))
+                self.rendered.append(text)
+                continue
+            self.callbacks["started-utterance"]("utt")
+            if self.stopped.wait(self.delay):
+                break
+            self.spoken.append(text)
+        self.pending = []
+
+    def stop(self):
+        self.stopped.set()
+
+
+def test_engine_created_once():
+    """Several speak() calls must reuse a single engine"""
+    created = []
+
+    def factory():
+        created.append(FakeEngine())
+        return created[-1]
+
+    engine = tts_engine.SpeechEngine(engine_factory=factory)
+    for text in ["Initializing Viola...", "Yes, how can I help you?", "Headline 1"]:
+        engine.speak(text)
+    engine.shutdown()
+
+    assert len(created) == 1
+    assert created[0].spoken == ["Initializing Viola...", "Yes, how can I help you?", "Headline 1"]
+    assert created[0].properties["rate"] == 150
+    assert created[0].properties["voice"] == "female"
+    print("✓ Engine initialized once and reused")
+
+
+def test_speak_async_and_metrics():
+    fake = FakeEngine()
+    engine = tts_engine.SpeechEngine(engine_factory=lambda: fake)
+    handles = [engine.speak_async(f"line {i}") for i in range(3)]
+    for handle in handles:
+        assert handle.wait(2)
+        assert handle.time_to_first_audio is not None
+
+    stats = engine.stats()
+    engine.shutdown()
+    assert stats["spoken"] == 3
+    assert stats["ttfa_avg_ms"] is not None
+    print(f"✓ Time to first audio: {stats['ttfa_avg_ms']:.2f} ms average")
+
+
+def test_interrupt_flushes_queue():
+    fake = FakeEngine(delay=0.5)
+    engine = tts_engine.SpeechEngine(engine_factory=lambda: fake)
+    first = engine.speak_async("a long sentence")
+    rest = [engine.speak_async(f"queued {i}") for i in range(3)]
+
+    # Wait for the first utterance to start before interrupting
+    deadline = time.time() + 2
+    while first.started_at is None and time.time() < deadline:
+        time.sleep(0.01)
+
+    cancelled = engine.interrupt()
+    assert first.wait(2)
+    engine.shutdown()
+
+    assert cancelled == 4
+    assert first.cancelled
+    assert all(handle.cancelled and handle.done() for handle in rest)
+    assert fake.spoken == []
+    print("✓ Interrupt cancelled current and queued speech")
+
+
+class StoppablePlayer:
+    """Plays each file for a while unless stopped, like aplay"""
+
+    available = True
+
+    def __init__(self, seconds=0.5):
+        self.seconds = seconds
+        self.played = []
+        self.stopped = threading.Event()
+
+    def play(self, path):
+        if not self.stopped.wait(self.seconds):
+            self.played.append(path)
+
+    def stop(self):
+        self.stopped.set()
+
+
+class RacingUtterance(tts_engine.Utterance):
+    """Gets cancelled from another thread while the worker is picking it up"""
+
+    def __init__(self, engine, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.engine = engine
+        self.raced = False
+
+    def done(self):
+        done = super().done()
+        if not self.raced and threading.current_thread().name == "viola-tts":
+            self.raced = True
+            threading.Thread(target=self.engine.cancel, args=([self],)).start()
+            time.sleep(0.05)  # let the cancel run before the worker makes this utterance current
+        return done
+
+
+def test_cancel_while_picked_up():
+    player = StoppablePlayer()
+    engine = tts_engine.SpeechEngine(engine_factory=FakeEngine, player=player)
+    engine.start()
+    utterance = RacingUtterance(engine, "Racing", audio_file="racing.wav")
+    engine._queue.put(utterance)
+    assert utterance.wait(2)
+    engine.shutdown()
+
+    assert utterance.raced and utterance.cancelled
+    assert player.played == []
+    print("✓ Cancel that lands while the worker picks an utterance up still stops it")
+
+
+def test_failed_init_reports_error():
+    def factory():
+        raise OSError("no audio driver")
+
+    engine = tts_engine.SpeechEngine(engine_factory=factory)
+    try:
+        engine.speak("hello")
+    except RuntimeError as e:
+        assert "no audio driver" in str(e)
+        print("✓ Engine start failure is reported")
+    else:
+        raise AssertionError("expected RuntimeError")
+
+
+def test_split_sentences():
+    text = "Paris is the capital of France. Dr. Smith moved to the U.S. last year! Why? Nobody knows."
+    sentences = list(tts_engine.split_sentences(text))
+    assert sentences == [
+        "Paris is the capital of France.",
+        "Dr. Smith moved to the U.S. last year!",
+        "Why?",
+        "Nobody knows.",
+    ]
+    long_clause = ", ".join(["word"] * 100)
+    assert all(len(chunk) <= 60 for chunk in tts_engine.split_sentences(long_clause, max_chars=60))
+    print("✓ Answers split into sentences")
+
+
+def test_stream_plays_first_sentence_early():
+    fake = FakeEngine(delay=0.05)
+    engine = tts_engine.SpeechEngine(engine_factory=lambda: fake)
+    stream = engine.speak_stream("One. Two. Three. Four.")
+    assert stream.wait(5)
+    stats = stream.stats()
+    engine.shutdown()
+
+    assert fake.spoken == ["One.", "Two.", "Three.", "Four."]
+    assert stats["chunks"] == 4
+    assert stats["first_audio_ms"] < stats["whole_text_ms"] / 2
+    print(f"✓ First audio after {stats['first_audio_ms']:.1f} ms, whole text {stats['whole_text_ms']:.1f} ms")
+
+
+def test_stream_barge_in():
+    fake = FakeEngine(delay=0.3)
+    engine = tts_engine.SpeechEngine(engine_factory=lambda: fake)
+    stream = engine.speak_stream(f"Headline {i}." for i in range(5))
+    other = engine.speak_async("Unrelated reply")
+
+    deadline = time.time() + 2
+    while not stream.utterances or stream.utterances[0].started_at is None:
+        assert time.time() < deadline
+        time.sleep(0.01)
+
+    stream.cancel()
+    assert stream.wait(2)
+    assert other.wait(2)
+    engine.shutdown()
+
+    assert fake.spoken == ["Unrelated reply"]
+    assert stream.stats()["cancelled"]
+    print("✓ Barge-in cancelled only the streamed answer")
+
+
+if __name__ == "__main__":
+    test_engine_created_once()
+    test_speak_async_and_metrics()
+    test_interrupt_flushes_queue()
+    test_cancel_while_picked_up()
+    test_failed_init_reports_error()
+    test_split_sentences()
+    test_stream_plays_first_sentence_early()
+    test_stream_barge_in()
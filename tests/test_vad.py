@@ -0,0 +1,94 @@
+"""
+Test script to verify voice activity detection trims and gates captured phrases
+"""
+import sys
+import os
+import tempfile
+import time
+
+# Add parent directory to path to import vad
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import speech_recognition as sr
+import audio_capture
+import vad
+import wake_word
+from tests.test_audio_capture import SAMPLE_RATE, write_wav
+
+SEGMENTS = [("silence", 1.0), ("tone", 0.6), ("silence", 0.8), ("tone", 0.08),
+            ("silence", 0.8), ("tone", 0.6), ("silence", 1.0)]
+
+
+def capture_all(path, listener=None):
+    session = audio_capture.CaptureSession(source_factory=lambda: sr.AudioFile(path), vad=listener)
+    session.start()
+    phrases = []
+    try:
+        while True:
+            phrases.append(session.get(timeout=5))
+    except sr.WaitTimeoutError:
+        pass
+    stats = session.stats()
+    session.stop()
+    return phrases, stats
+
+
+def test_energy_classifier_follows_noise_floor():
+    classifier = vad.EnergyClassifier(min_rms=100, ratio=2.0, adapt=0.5)
+    quiet = (b"\x00\x01" * 160)   # 256 on the 16-bit scale
+    loud = (b"\x00\x10" * 160)    # 4096
+    assert not classifier.is_speech(quiet, SAMPLE_RATE)
+    assert classifier.is_speech(loud, SAMPLE_RATE)
+    assert classifier.threshold == 512
+    print("✓ Energy classifier separates speech from the noise floor")
+
+
+def test_trims_silence_and_drops_noise():
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "speech.wav")
+        write_wav(path, SEGMENTS)
+        listener = vad.VADListener(classifier=vad.EnergyClassifier())
+        trimmed, stats = capture_all(path, listener)
+        untrimmed, _ = capture_all(path)
+
+    # Two phrases, each the tone plus 0.1 s padding on either side; the 80 ms burst is dropped
+    assert len(trimmed) == 2
+    for audio in trimmed:
+        assert 0.75 <= wake_word.audio_seconds(audio) <= 0.85
+    assert sum(len(a.frame_data) for a in trimmed) < sum(len(a.frame_data) for a in untrimmed)
+
+    vad_stats = stats["vad"]
+    assert vad_stats["classifier"] == "energy"
+    assert vad_stats["phrases"] == 2
+    assert vad_stats["segments_dropped"] == 1
+    assert vad_stats["bytes_saved"] > 0
+    assert 300 <= vad_stats["end_of_speech_p50_ms"] <= vad_stats["end_of_speech_p95_ms"] < vad_stats["pause_threshold_ms"]
+    print(f"✓ VAD kept {vad_stats['bytes_sent']} bytes, saved {vad_stats['saved_ratio']:.0%}, "
+          f"end of speech after {vad_stats['end_of_speech_p50_ms']:.0f} ms")
+
+
+def test_end_of_speech_includes_hand_off():
+    slow_end = []
+
+    def on_audio(event, data, rate):
+        if event == "end" and data is not None:
+            # A partial recognizer finishing its transcript holds the phrase back
+            slow_end.append(0.1 * len(slow_end))
+            time.sleep(slow_end[-1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "speech.wav")
+        write_wav(path, [("silence", 0.5), ("tone", 0.6), ("silence", 0.8), ("tone", 0.6), ("silence", 0.15)])
+        listener = vad.VADListener(classifier=vad.EnergyClassifier(), on_audio=on_audio)
+        capture_all(path, listener)
+
+    first, second = listener.end_of_speech
+    assert 0.3 <= first < 0.35  # end_silence, handed off at once
+    assert 0.1 + 0.1 <= second < 0.3  # the audio ran out after ~0.1 s of silence, then a slow hand-off
+    print(f"✓ End of speech measured to hand-off: {first * 1000:.0f} ms and {second * 1000:.0f} ms")
+
+
+if __name__ == "__main__":
+    test_energy_classifier_follows_noise_floor()
+    test_trims_silence_and_drops_noise()
+    test_end_of_speech_includes_hand_off()
@@ -0,0 +1,108 @@
+"""
+Test script to verify the local wake word stage
+"""
+import sys
+import os
+
+# Add parent directory to path to import wake_word
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import math
+import struct
+
+import speech_recognition as sr
+import wake_word
+
+SAMPLE_RATE = 16000
+
+
+def make_audio(segments):
+    """Build AudioData from (kind, seconds) segments: 'tone' or 'silence'"""
+    frames = bytearray()
+    for kind, seconds in segments:
+        for i in range(int(SAMPLE_RATE * seconds)):
+            value = int(8000 * math.sin(2 * math.pi * 440 * i / SAMPLE_RATE)) if kind == "tone" else 0
+            frames += struct.pack("<h", value)
+    return sr.AudioData(bytes(frames), SAMPLE_RATE, 2)
+
+
+class ScriptedDetector(wake_word.WakeWordDetector):
+    name = "scripted"
+
+    def __init__(self, answers):
+        self.answers = list(answers)
+        self.calls = 0
+
+    def detect(self, audio):
+        self.calls += 1
+        return self.answers.pop(0), None
+
+
+def test_energy_gate():
+    gate = wake_word.EnergyGate(min_rms=300, min_voiced_seconds=0.2)
+    assert not gate.passes(make_audio([("silence", 1.0)]))
+    assert not gate.passes(make_audio([("silence", 0.5), ("tone", 0.05), ("silence", 0.5)]))
+    assert gate.passes(make_audio([("silence", 0.2), ("tone", 0.5), ("silence", 0.2)]))
+    print("✓ Energy gate drops silence and clicks, passes speech-length sound")
+
+
+def test_stage_only_runs_detector_after_gate():
+    detector = ScriptedDetector([True, False])
+    stage = wake_word.WakeWordStage(detector, gate=wake_word.EnergyGate())
+
+    assert not stage.check(make_audio([("silence", 1.0)]))
+    assert stage.check(make_audio([("tone", 0.5)]))
+    assert not stage.check(make_audio([("tone", 0.5)]))
+
+    stats = stage.stats()
+    assert detector.calls == 2
+    assert stats["gated_out"] == 1 and stats["detected"] == 1 and stats["rejected"] == 1
+    assert stats["cpu_per_audio_second"] >= 0
+    print("✓ Silence never reaches the detector")
+
+
+def test_cloud_fallback_matches_whole_word():
+    transcripts = iter(["hey viola", "violation of rules"])
+    detector = wake_word.CloudWakeWord(lambda audio: next(transcripts))
+    audio = make_audio([("tone", 0.5)])
+    assert detector.detect(audio) == (True, "hey viola")
+    assert detector.detect(audio) == (False, "violation of rules")
+
+    def unintelligible(audio):
+        raise sr.UnknownValueError()
+
+    assert wake_word.CloudWakeWord(unintelligible).detect(audio) == (False, None)
+    print("✓ Cloud fallback only accepts 'viola' as a whole word")
+
+
+class FakeSphinx:
+    """Stands in for recognize_sphinx keyword search: returns the keywords it "spotted"."""
+
+    def __init__(self, heard):
+        self.heard = list(heard)
+        self.entries = None
+
+    def recognize_sphinx(self, audio, keyword_entries=None):
+        self.entries = keyword_entries
+        heard = self.heard.pop(0)
+        if heard is None:
+            raise sr.UnknownValueError()
+        return heard
+
+
+def test_sphinx_spots_control_phrases():
+    recognizer = FakeSphinx(["viola ", "stop listening ", None])
+    detector = wake_word.SphinxKeywordDetector(recognizer=recognizer)
+    audio = make_audio([("tone", 0.3)])
+    assert detector.detect(audio) == (True, None)
+    assert [phrase for phrase, _ in recognizer.entries] == ["viola", "stop listening"]
+    assert detector.detect(audio) == (False, "stop listening")
+    assert detector.detect(audio) == (False, None)
+    print("✓ Keyword search spots 'stop listening' without the wake word")
+
+
+if __name__ == "__main__":
+    test_energy_gate()
+    test_stage_only_runs_detector_after_gate()
+    test_cloud_fallback_matches_whole_word()
+    test_sphinx_spots_control_phrases()
@@ -0,0 +1,279 @@
+"""
+Latency Tracing for Viola
+Spans for each pipeline stage (capture, wake word, STT, intent matching,
+skills, HTTP, TTS), grouped into one record per interaction.
+
+Records are appended to a JSON lines file and summarized as rolling
+p50/p95/p99 per span name. Tracing is off unless enabled (`python main.py
+--trace`); when off, span() returns a shared no-op object, so instrumented
+code pays for a function call and a flag check.
+
+Usage:
+    interaction = tracing.tracer.interaction("command")
+    with tracing.activate(interaction):
+        with tracing.span("stt", backend="google"):
+            ...
+    interaction.finish()
+
+The current interaction lives in a context variable, so it follows asyncio
+tasks; pass work to threads through contextvars.copy_context().run.
+"""
+
+import contextvars
+import itertools
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+DEFAULT_TRACE_FILE = os.path.join(
+    os.getenv("VIOLA_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".viola", "cache")),
+    "trace.jsonl",
+)
+PERCENTILES = (50, 95, 99)
+
+_current = contextvars.ContextVar("viola_interaction", default=None)
+_ids = itertools.count(1)
+
+
+class Interaction:
+    """
+    Everything timed while handling one phrase or command.
+
+    Args:
+        tracer (Tracer): Tracer the finished record goes to
+        kind (str): What kind of interaction this is ("command", "wake", ...)
+    """
+
+    def __init__(self, tracer, kind, **attrs):
+        self.tracer = tracer
+        self.kind = kind
+        self.id = next(_ids)
+        self.timestamp = time.time()
+        self.began = time.perf_counter()
+        self.attrs = attrs
+        self.spans = []
+        self.finished = False
+        self._lock = threading.Lock()
+
+    def add(self, name, began, seconds, **attrs):
+        """Record a span that started at perf_counter() time `began`."""
+        with self._lock:
+            self.spans.append((name, began - self.began, seconds, attrs))
+
+    def annotate(self, **attrs):
+        self.attrs.update(attrs)
+
+    def finish(self, **attrs):
+        """Close the interaction and hand its record to the tracer (once)."""
+        if self.finished:
+            return None
+        self.finished = True
+        self.attrs.update(attrs)
+        self.total = time.perf_counter() - self.began
+        return self.tracer._finish(self)
+
+    def record(self):
+        """The interaction as a JSON-serializable dict."""
+        with self._lock:
+            spans = sorted(self.spans, key=lambda span: span[1])
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "ts": round(self.timestamp, 3),
+            "total_ms": round(self.total * 1000, 2),
+            **self.attrs,
+            "spans": [{"name": name, "start_ms": round(start * 1000, 2), "ms": round(seconds * 1000, 2), **attrs}
+                      for name, start, seconds, attrs in spans],
+        }
+
+
+class _Span:
+    __slots__ = ("interaction", "name", "attrs", "began")
+
+    def __init__(self, interaction, name, attrs):
+        self.interaction = interaction
+        self.name = name
+        self.attrs = attrs
+
+    def set(self, **attrs):
+        self.attrs.update(attrs)
+
+    def __enter__(self):
+        self.began = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None:
+            self.attrs["error"] = exc_type.__name__
+        self.interaction.add(self.name, self.began, time.perf_counter() - self.began, **self.attrs)
+        return False
+
+
+class _NullSpan:
+    """What span() returns when nothing is being traced."""
+
+    __slots__ = ()
+
+    def set(self, **attrs):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """
+    Collects finished interactions: JSON lines on disk and rolling percentiles in memory.
+
+    Args:
+        window (int): Recent samples per span name kept for the percentiles
+    """
+
+    def __init__(self, window=500):
+        self.enabled = False
+        self.path = None
+        self.window = window
+        self.interactions = 0
+        self.on_finish = None
+        self._samples = {}
+        self._file = None
+        self._lock = threading.Lock()
+
+    def enable(self, path=DEFAULT_TRACE_FILE, on_finish=None):
+        """
+        Start tracing.
+
+        Args:
+            path (str): JSON lines file records are appended to (None keeps them in memory only)
+            on_finish (callable): Called with each finished record (e.g. to print it)
+        """
+        with self._lock:
+            if path:
+                directory = os.path.dirname(path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                self._file = open(path, "a", encoding="utf-8")
+            self.path = path
+            self.on_finish = on_finish
+            self.enabled = True
+        return self
+
+    def disable(self):
+        with self._lock:
+            self.enabled = False
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def reset(self):
+        """Forget the collected samples (e.g. between benchmark runs)."""
+        with self._lock:
+            self._samples.clear()
+            self.interactions = 0
+
+    def interaction(self, kind, **attrs):
+        """Begin an interaction, or return None when tracing is off."""
+        if not self.enabled:
+            return None
+        return Interaction(self, kind, **attrs)
+
+    def _finish(self, interaction):
+        record = interaction.record()
+        with self._lock:
+            self.interactions += 1
+            self._sample("total:" + interaction.kind, interaction.total)
+            for name, _, seconds, _ in interaction.spans:
+                self._sample(name, seconds)
+            if self._file is not None:
+                self._file.write(json.dumps(record) + "\n")
+                self._file.flush()
+        if self.on_finish is not None:
+            self.on_finish(record)
+        return record
+
+    def _sample(self, name, seconds):
+        samples = self._samples.get(name)
+        if samples is None:
+            samples = self._samples[name] = deque(maxlen=self.window)
+        samples.append(seconds * 1000)
+
+    def summary(self):
+        """
+        Rolling latency percentiles over the last `window` samples of each span.
+
+        Returns:
+            dict: span name -> {"count": n, "p50": ms, "p95": ms, "p99": ms}
+        """
+        with self._lock:
+            snapshot = {name: sorted(samples) for name, samples in self._samples.items()}
+        result = {}
+        for name, samples in snapshot.items():
+            stats = {"count": len(samples)}
+            for p in PERCENTILES:
+                # Nearest-rank percentile
+                stats[f"p{p}"] = samples[max(0, -(-len(samples) * p // 100) - 1)]
+            result[name] = stats
+        return result
+
+    def report(self):
+        """The summary as a printable table."""
+        summary = self.summary()
+        lines = [f"{'span':<24} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+        for name in sorted(summary):
+            stats = summary[name]
+            lines.append(f"{name:<24} {stats['count']:>6} {stats['p50']:>9.1f} {stats['p95']:>9.1f} {stats['p99']:>9.1f}")
+        return "\n".join(lines)
+
+
+tracer = Tracer()
+
+
+def current():
+    """The interaction being traced in this context, or None."""
+    return _current.get()
+
+
+@contextmanager
+def activate(interaction):
+    """Make `interaction` current for the enclosed code (a no-op for None)."""
+    if interaction is None:
+        yield None
+        return
+    token = _current.set(interaction)
+    try:
+        yield interaction
+    finally:
+        _current.reset(token)
+
+
+def span(name, **attrs):
+    """
+    Time the enclosed block as part of the current interaction.
+
+    Returns:
+        A context manager; its set(**attrs) adds details to the span
+    """
+    if not tracer.enabled:
+        return _NULL_SPAN
+    interaction = _current.get()
+    if interaction is None:
+        return _NULL_SPAN
+    return _Span(interaction, name, attrs)
+
+
+def record(name, seconds, **attrs):
+    """Add a span of known length that ended just now (e.g. captured audio)."""
+    if not tracer.enabled:
+        return
+    interaction = _current.get()
+    if interaction is not None:
+        interaction.add(name, time.perf_counter() - seconds, seconds, **attrs)
@@ -0,0 +1,221 @@
+"""
+TTL Cache for Viola
+Small thread-safe response cache with time-to-live, LRU eviction, optional
+SQLite persistence, request coalescing and stale-on-error fallback.
+"""
+
+import json
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_query(query):
+    """
+    Normalize a spoken query so equivalent phrasings share a cache entry.
+
+    "What is the capital of France?" and "what is the  capital of france"
+    both become "what is the capital of france".
+    """
+    query = _PUNCTUATION.sub(" ", query.lower())
+    return _WHITESPACE.sub(" ", query).strip()
+
+
+class _Flight:
+    """A fetch in progress that other callers can wait on."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+
+
+class TTLCache:
+    """
+    Cache of fetched values keyed by normalized query.
+
+    Args:
+        ttl (float): Seconds an entry is served as fresh
+        max_entries (int): Entries kept before the least recently used is evicted
+        stale_ttl (float): Seconds an expired entry may still be served when fetching fails
+        db_path (str): SQLite file to persist entries across restarts (None keeps them in memory)
+        normalize (callable): Turns a key into its cache key
+    """
+
+    def __init__(self, ttl=6 * 3600, max_entries=256, stale_ttl=7 * 24 * 3600, db_path=None,
+                 normalize=normalize_query):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.stale_ttl = stale_ttl
+        self.normalize = normalize
+        self._entries = OrderedDict()  # key -> (stored_at, value), least recently used first
+        self._inflight = {}
+        self._lock = threading.Lock()
+        self._db = None
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.stale_served = 0
+        self.errors = 0
+        if db_path:
+            self._open_db(db_path)
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+    def _open_db(self, db_path):
+        self._db = sqlite3.connect(db_path, check_same_thread=False)
+        self._db.execute("CREATE TABLE IF NOT EXISTS cache (key TEXT PRIMARY KEY, stored_at REAL, value TEXT)")
+        cutoff = time.time() - self.ttl - self.stale_ttl
+        self._db.execute("DELETE FROM cache WHERE stored_at < ?", (cutoff,))
+        self._db.commit()
+        rows = self._db.execute(
+            "SELECT key, stored_at, value FROM cache ORDER BY stored_at DESC LIMIT ?", (self.max_entries,)
+        ).fetchall()
+        for key, stored_at, value in reversed(rows):
+            self._entries[key] = (stored_at, json.loads(value))
+
+    def _persist(self, key, stored_at, value):
+        if self._db is None:
+            return
+        try:
+            self._db.execute("INSERT OR REPLACE INTO cache (key, stored_at, value) VALUES (?, ?, ?)",
+                             (key, stored_at, json.dumps(value)))
+            self._db.commit()
+        except (sqlite3.Error, TypeError) as e:
+            print(f"Error persisting cache entry: {e}")
+
+    def _forget(self, key):
+        if self._db is not None:
+            self._db.execute("DELETE FROM cache WHERE key = ?", (key,))
+            self._db.commit()
+
+    def close(self):
+        if self._db is not None:
+            self._db.close()
+            self._db = None
+
+    # ------------------------------------------------------------------
+    # Cache operations
+    # ------------------------------------------------------------------
+    def get(self, key, allow_stale=False):
+        """
+        Return the cached value for key, or None.
+
+        Args:
+            key (str): The (unnormalized) query
+            allow_stale (bool): Also return entries past their TTL but within stale_ttl
+        """
+        key = self.normalize(key)
+        with self._lock:
+            return self._lookup(key, allow_stale)
+
+    def _lookup(self, key, allow_stale=False):
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        stored_at, value = entry
+        age = time.time() - stored_at
+        if age <= self.ttl or (allow_stale and age <= self.ttl + self.stale_ttl):
+            self._entries.move_to_end(key)
+            return value
+        return None
+
+    def set(self, key, value):
+        key = self.normalize(key)
+        stored_at = time.time()
+        with self._lock:
+            self._entries[key] = (stored_at, value)
+            self._entries.move_to_end(key)
+            evicted = []
+            while len(self._entries) > self.max_entries:
+                evicted.append(self._entries.popitem(last=False)[0])
+            self._persist(key, stored_at, value)
+            for old in evicted:
+                self._forget(old)
+
+    def get_or_fetch(self, key, fetch):
+        """
+        Return a fresh cached value, or call fetch() once to get it.
+
+        Concurrent callers asking for the same key wait for the one fetch in
+        flight instead of sending their own request. If fetch() raises and a
+        stale entry exists, the stale value is served instead.
+
+        Args:
+            key (str): The (unnormalized) query
+            fetch (callable): Returns the value; may raise on network errors
+
+        Returns:
+            The cached or freshly fetched value
+        """
+        norm = self.normalize(key)
+        with self._lock:
+            value = self._lookup(norm)
+            if value is not None:
+                self.hits += 1
+                return value
+            flight = self._inflight.get(norm)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[norm] = _Flight()
+                self.misses += 1
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            flight.done.wait()
+            if flight.error is not None:
+                raise flight.error
+            return flight.value
+
+        try:
+            flight.value = fetch()
+            self.set(key, flight.value)
+            return flight.value
+        except Exception as e:
+            with self._lock:
+                self.errors += 1
+                stale = self._lookup(norm, allow_stale=True)
+                if stale is not None:
+                    self.stale_served += 1
+            if stale is None:
+                flight.error = e
+                raise
+            flight.value = stale
+            return stale
+        finally:
+            with self._lock:
+                self._inflight.pop(norm, None)
+            flight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            if self._db is not None:
+                self._db.execute("DELETE FROM cache")
+                self._db.commit()
+
+    def stats(self):
+        """
+        Cache counters.
+
+        Returns:
+            dict: hits, misses, coalesced, stale_served, errors, entries and hit_rate
+        """
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "coalesced": self.coalesced,
+                "stale_served": self.stale_served,
+                "errors": self.errors,
+                "entries": len(self._entries),
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+            }
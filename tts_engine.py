@@ -0,0 +1,581 @@
+"""
+Speech engine for Viola
+Owns one long-lived pyttsx3 engine on a dedicated thread and feeds it from a queue,
+so the driver is set up once instead of on every spoken sentence.
+"""
+
+import os
+import queue
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import deque
+
+DEFAULT_RATE = 150
+DEFAULT_VOICE_INDEX = 1  # Female voice on most installs
+
+_STOP = object()
+
+# Abbreviations that end with a period but do not end a sentence
+_ABBREVIATIONS = {"mr", "mrs", "ms", "dr", "prof", "st", "vs", "etc", "inc", "ltd", "jr", "sr", "no", "approx"}
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+_CLAUSE_BREAK = re.compile(r"(?<=[,;:])\s+")
+
+
+def _default_engine_factory():
+    import pyttsx3
+    return pyttsx3.init()
+
+
+class WavPlayer:
+    """
+    Plays pre-rendered WAV files on the local audio device.
+
+    Uses winsound on Windows and the first available command line player
+    (aplay, paplay, afplay) elsewhere.
+    """
+
+    COMMANDS = ["aplay", "paplay", "afplay"]
+
+    def __init__(self):
+        self._process = None
+        self._command = None
+        if sys.platform != "win32":
+            self._command = next((c for c in self.COMMANDS if shutil.which(c)), None)
+
+    @property
+    def available(self):
+        return sys.platform == "win32" or self._command is not None
+
+    def play(self, path):
+        """Play a WAV file and block until it finishes."""
+        if sys.platform == "win32":
+            import winsound
+            winsound.PlaySound(path, winsound.SND_FILENAME)
+            return
+        if self._command is None:
+            raise RuntimeError("No audio player available for cached speech")
+        args = [self._command, "-q", path] if self._command == "aplay" else [self._command, path]
+        self._process = subprocess.Popen(args, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            self._process.wait()
+        finally:
+            self._process = None
+
+    def stop(self):
+        """Stop the file that is currently playing."""
+        if sys.platform == "win32":
+            import winsound
+            winsound.PlaySound(None, winsound.SND_PURGE)
+            return
+        process = self._process
+        if process is not None:
+            process.terminate()
+
+
+def split_sentences(text, max_chars=200):
+    """
+    Split text into sentences for chunked speech.
+
+    Sentences longer than max_chars are broken further at commas or
+    semicolons so the first chunk stays short.
+
+    Args:
+        text (str): Text to split
+        max_chars (int): Soft limit on the length of a chunk
+
+    Yields:
+        str: One sentence (or clause) at a time
+    """
+    pending = ""
+    for part in _SENTENCE_END.split(text.strip()):
+        if not part:
+            continue
+        pending = f"{pending} {part}" if pending else part
+        last_word = pending.rstrip(".!?").rsplit(" ", 1)[-1].lower()
+        if last_word in _ABBREVIATIONS or re.fullmatch(r"(?:[a-z]\.)*[a-z]", last_word):
+            # "Dr." or "U.S." - keep going
+            continue
+        yield from _split_long(pending, max_chars)
+        pending = ""
+    if pending:
+        yield from _split_long(pending, max_chars)
+
+
+def _split_long(sentence, max_chars):
+    if len(sentence) <= max_chars:
+        yield sentence
+        return
+    chunk = ""
+    for clause in _CLAUSE_BREAK.split(sentence):
+        if chunk and len(chunk) + len(clause) + 1 > max_chars:
+            yield chunk
+            chunk = clause
+        else:
+            chunk = f"{chunk} {clause}" if chunk else clause
+    if chunk:
+        yield chunk
+
+
+class Utterance:
+    """
+    A piece of text queued for speaking.
+
+    Records when it was queued, when audio started and when it finished,
+    so callers can measure time-to-first-audio.
+    """
+
+    def __init__(self, text, audio_file=None, render_to=None):
+        self.text = text
+        self.audio_file = audio_file
+        self.render_to = render_to
+        self.enqueued_at = time.perf_counter()
+        self.started_at = None
+        self.finished_at = None
+        self.cancelled = False
+        self.error = None
+        self._done = threading.Event()
+
+    @property
+    def time_to_first_audio(self):
+        """Seconds from queueing to the start of audio, or None if it never started."""
+        if self.started_at is None:
+            return None
+        return self.started_at - self.enqueued_at
+
+    def done(self):
+        return self._done.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the utterance was spoken or cancelled. Returns False on timeout."""
+        return self._done.wait(timeout)
+
+    def _finish(self):
+        self.finished_at = time.perf_counter()
+        self._done.set()
+
+
+class SpeechStream:
+    """
+    A multi-sentence answer being spoken chunk by chunk.
+
+    Chunks are queued on the engine as soon as the source produces them, so
+    the first sentence plays while the rest are still being prepared.
+    """
+
+    def __init__(self, engine, chunks):
+        self.engine = engine
+        self.utterances = []
+        self.created_at = time.perf_counter()
+        self.cancelled = False
+        self._lock = threading.Lock()
+        self._fed = threading.Event()
+        self._feeder = threading.Thread(target=self._feed, args=(chunks,), name="viola-tts-stream", daemon=True)
+        self._feeder.start()
+
+    def _feed(self, chunks):
+        try:
+            for chunk in chunks:
+                for sentence in split_sentences(chunk):
+                    with self._lock:
+                        if self.cancelled:
+                            return
+                        self.utterances.append(self.engine.speak_async(sentence))
+        except Exception as e:
+            print(f"Error preparing speech: {e}")
+        finally:
+            self._fed.set()
+
+    def cancel(self):
+        """Barge-in: drop the remaining sentences and stop the one playing."""
+        with self._lock:
+            self.cancelled = True
+            utterances = list(self.utterances)
+        return self.engine.cancel(utterances)
+
+    def wait(self, timeout=None):
+        """Block until every chunk has been spoken or the stream was cancelled."""
+        deadline = None if timeout is None else time.perf_counter() + timeout
+        if not self._fed.wait(timeout):
+            return False
+        for utterance in list(self.utterances):
+            remaining = None if deadline is None else max(0, deadline - time.perf_counter())
+            if not utterance.wait(remaining):
+                return False
+        return True
+
+    def done(self):
+        return self._fed.is_set() and all(u.done() for u in list(self.utterances))
+
+    def stats(self):
+        """
+        Latency of this answer.
+
+        Returns:
+            dict: Chunk count, first-audio latency and whole-text latency in milliseconds
+        """
+        utterances = list(self.utterances)
+        started = [u.started_at for u in utterances if u.started_at is not None]
+        finished = [u.finished_at for u in utterances if u.finished_at is not None]
+        return {
+            "chunks": len(utterances),
+            "cancelled": self.cancelled,
+            "first_audio_ms": (min(started) - self.created_at) * 1000 if started else None,
+            "whole_text_ms": (max(finished) - self.created_at) * 1000 if finished and self.done() else None,
+        }
+
+
+class SpeechEngine:
+    """
+    Long-lived text-to-speech worker.
+
+    A single engine is created on the worker thread (pyttsx3 drivers are not
+    thread-safe) and every request goes through its queue.
+
+    Args:
+        rate (int): Speech rate in words per minute
+        voice_index (int): Index into the installed voices, used when available
+        engine_factory (callable): Returns a pyttsx3-compatible engine (default: pyttsx3.init)
+        player (WavPlayer): Plays pre-rendered audio files (default: WavPlayer())
+        history (int): Number of recent utterances kept for latency metrics
+    """
+
+    def __init__(self, rate=DEFAULT_RATE, voice_index=DEFAULT_VOICE_INDEX,
+                 engine_factory=None, player=None, history=100):
+        self.rate = rate
+        self.voice_index = voice_index
+        self.voice_id = None
+        self.player = player or WavPlayer()
+        self._engine_factory = engine_factory or _default_engine_factory
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+        self._ready = threading.Event()
+        self._init_error = None
+        self._engine = None
+        self._current = None
+        self._latencies = deque(maxlen=history)
+        self.spoken_count = 0
+        self.cancelled_count = 0
+        self._last_audio_at = 0.0
+        self._playing_elsewhere = False
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+    def start(self):
+        """Start the worker thread and create the engine (no-op if already running)."""
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._ready.clear()
+            self._init_error = None
+            self._thread = threading.Thread(target=self._run, name="viola-tts", daemon=True)
+            self._thread.start()
+        self._ready.wait()
+        if self._init_error is not None:
+            raise RuntimeError(f"Speech engine failed to start: {self._init_error}")
+        return self
+
+    def shutdown(self, timeout=5):
+        """Drop queued speech, stop the worker and release the engine."""
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            return
+        self.interrupt()
+        self._queue.put(_STOP)
+        thread.join(timeout)
+
+    @property
+    def running(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    # ------------------------------------------------------------------
+    # Public API
+    # ------------------------------------------------------------------
+    def speak_async(self, text):
+        """
+        Queue text for speaking and return immediately.
+
+        Args:
+            text (str): The text to be spoken
+
+        Returns:
+            Utterance: Handle that can be waited on
+        """
+        self.start()
+        utterance = Utterance(text)
+        self._queue.put(utterance)
+        return utterance
+
+    def speak(self, text, timeout=None):
+        """
+        Speak text and block until it has been played (or interrupted).
+
+        Returns:
+            Utterance: The finished utterance
+        """
+        utterance = self.speak_async(text)
+        utterance.wait(timeout)
+        if utterance.error is not None:
+            raise utterance.error
+        return utterance
+
+    def speak_stream(self, chunks):
+        """
+        Speak an answer sentence by sentence as it becomes available.
+
+        Args:
+            chunks (iterable): Strings (or a generator of strings) to speak in order
+
+        Returns:
+            SpeechStream: Handle for waiting on or cancelling the answer
+        """
+        self.start()
+        if isinstance(chunks, str):
+            chunks = [chunks]
+        return SpeechStream(self, chunks)
+
+    def play_file_async(self, path, text=""):
+        """
+        Queue a pre-rendered audio file; it plays in order with live speech.
+
+        Args:
+            path (str): WAV file to play
+            text (str): The text the file contains (for logging and metrics)
+
+        Returns:
+            Utterance: Handle that can be waited on
+        """
+        self.start()
+        utterance = Utterance(text, audio_file=path)
+        self._queue.put(utterance)
+        return utterance
+
+    def play_file(self, path, text="", timeout=None):
+        """Play a pre-rendered audio file and block until it finishes."""
+        utterance = self.play_file_async(path, text)
+        utterance.wait(timeout)
+        if utterance.error is not None:
+            raise utterance.error
+        return utterance
+
+    def render_async(self, text, path):
+        """
+        Queue synthesis of text into an audio file instead of the speakers.
+
+        Returns:
+            Utterance: Handle that completes once the file is written
+        """
+        self.start()
+        utterance = Utterance(text, render_to=path)
+        self._queue.put(utterance)
+        return utterance
+
+    def interrupt(self):
+        """
+        Cancel everything still queued and stop the current utterance.
+
+        Returns:
+            int: Number of utterances that were cancelled
+        """
+        flushed = 0
+        while True:
+            try:
+                item = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if item is _STOP:
+                # Keep the shutdown request in place
+                self._queue.put(item)
+                break
+            item.cancelled = True
+            item._finish()
+            flushed += 1
+
+        with self._lock:
+            current = self._current
+            if current is not None and not current.done():
+                current.cancelled = True
+                flushed += 1
+                self._stop_current(current)
+
+        self.cancelled_count += flushed
+        return flushed
+
+    def cancel(self, utterances):
+        """
+        Cancel specific utterances, leaving the rest of the queue alone.
+
+        Returns:
+            int: Number of utterances that were cancelled
+        """
+        cancelled = 0
+        # Under the worker's lock, so an utterance is either still to be skipped or already current
+        with self._lock:
+            current = self._current
+            for utterance in utterances:
+                if utterance.done():
+                    continue
+                utterance.cancelled = True
+                cancelled += 1
+                if utterance is current:
+                    self._stop_current(utterance)
+                else:
+                    # The worker skips items that are already finished
+                    utterance._finish()
+        self.cancelled_count += cancelled
+        return cancelled
+
+    def _stop_current(self, current):
+        try:
+            if current.audio_file:
+                self.player.stop()
+            else:
+                self._engine.stop()
+        except Exception as e:
+            print(f"Error stopping speech: {e}")
+
+    def active_since(self, since):
+        """
+        Whether audio was playing at any point since a given time.
+
+        Args:
+            since (float): A time.perf_counter() timestamp
+
+        Returns:
+            bool: True if something is playing now or finished playing after `since`
+        """
+        current = self._current
+        if self._playing_elsewhere or (current is not None and not current.render_to):
+            return True
+        return self._last_audio_at >= since
+
+    def note_audio(self, playing):
+        """
+        Report audio played outside the worker thread (see speech_pipeline), so
+        active_since() and the echo guard see it too.
+
+        Args:
+            playing (bool): Whether that audio is playing now
+        """
+        self._playing_elsewhere = playing
+        self._last_audio_at = time.perf_counter()
+
+    def pending(self):
+        """Number of utterances waiting in the queue."""
+        return self._queue.qsize()
+
+    def stats(self):
+        """
+        Latency metrics for recent utterances.
+
+        Returns:
+            dict: Counters plus last/average/max time-to-first-audio in milliseconds
+        """
+        latencies = list(self._latencies)
+        result = {
+            "spoken": self.spoken_count,
+            "cancelled": self.cancelled_count,
+            "queued": self.pending(),
+            "ttfa_last_ms": None,
+            "ttfa_avg_ms": None,
+            "ttfa_max_ms": None,
+        }
+        if latencies:
+            result["ttfa_last_ms"] = latencies[-1] * 1000
+            result["ttfa_avg_ms"] = sum(latencies) / len(latencies) * 1000
+            result["ttfa_max_ms"] = max(latencies) * 1000
+        return result
+
+    # ------------------------------------------------------------------
+    # Worker thread
+    # ------------------------------------------------------------------
+    def _setup_engine(self):
+        engine = self._engine_factory()
+        engine.setProperty('rate', self.rate)
+        voices = engine.getProperty('voices') or []
+        if len(voices) > self.voice_index:
+            self.voice_id = voices[self.voice_index].id
+            engine.setProperty('voice', self.voice_id)
+        engine.connect('started-utterance', self._on_started)
+        return engine
+
+    def _on_started(self, name=None):
+        current = self._current
+        if current is not None and current.started_at is None:
+            current.started_at = time.perf_counter()
+
+    def _run(self):
+        try:
+            self._engine = self._setup_engine()
+        except Exception as e:
+            self._init_error = e
+            self._ready.set()
+            return
+        self._ready.set()
+
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                break
+            with self._lock:
+                if item.done():
+                    continue
+                self._current = item
+            try:
+                self._speak_now(item)
+            except Exception as e:
+                item.error = e
+            finally:
+                self._current = None
+                item._finish()
+
+        try:
+            self._engine.stop()
+        except Exception:
+            pass
+        self._engine = None
+
+    def _speak_now(self, item):
+        if item.cancelled:
+            return  # cancelled just after the worker picked it up, before anything played
+        if item.render_to:
+            item.started_at = time.perf_counter()
+            directory = os.path.dirname(item.render_to)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            self._engine.save_to_file(item.text, item.render_to)
+            self._engine.runAndWait()
+            return
+
+        began = time.perf_counter()
+        if item.audio_file:
+            item.started_at = began
+            self.player.play(item.audio_file)
+        else:
+            self._engine.say(item.text)
+            self._engine.runAndWait()
+        self._last_audio_at = time.perf_counter()
+        if item.started_at is None:
+            # Driver did not report 'started-utterance'; fall back to the call time
+            item.started_at = began
+        if not item.cancelled:
+            self.spoken_count += 1
+            self._latencies.append(item.time_to_first_audio)
+
+
+_default_engine = None
+_default_lock = threading.Lock()
+
+
+def get_engine():
+    """Return the shared SpeechEngine, starting it on first use."""
+    global _default_engine
+    with _default_lock:
+        if _default_engine is None:
+            _default_engine = SpeechEngine()
+    return _default_engine.start()
@@ -0,0 +1,340 @@
+"""
+Voice Activity Detection for Viola
+Classifies short audio frames as speech or not while the microphone is read,
+so captured phrases start and end on speech instead of on raw energy.
+
+  - noise bursts too short to be a word are dropped instead of uploaded
+  - leading and trailing silence is trimmed to a short pad
+  - a phrase ends after `end_silence` (0.3 s) of non-speech rather than the
+    recognizer's fixed pause_threshold (0.5 s), so STT starts sooner
+
+Classifiers:
+  1. WebRTCClassifier - the WebRTC VAD (`pip install webrtcvad`), when installed and the
+                        sample rate is one it supports (8, 16, 32 or 48 kHz)
+  2. EnergyClassifier - fallback: frame energy against an adaptive noise floor
+
+Settings (.env):
+    VIOLA_VAD=0                  - turn it off and use the recognizer's energy threshold
+    VIOLA_VAD_END_SILENCE=0.3    - seconds of non-speech that end a phrase
+
+Usage:
+    session = audio_capture.CaptureSession(vad=vad.VADListener())
+"""
+
+import array
+import math
+import os
+import sys
+import time
+from collections import deque
+
+import speech_recognition as sr
+
+WEBRTC_SAMPLE_RATES = (8000, 16000, 32000, 48000)
+
+
+def frame_energy(frame):
+    """RMS energy of a frame of 16-bit little-endian mono audio."""
+    samples = array.array("h")
+    samples.frombytes(frame[:len(frame) - len(frame) % 2])
+    if not samples:
+        return 0.0
+    if sys.byteorder == "big":
+        samples.byteswap()
+    return math.sqrt(sum(s * s for s in samples) / len(samples))
+
+
+class EnergyClassifier:
+    """
+    Speech if a frame is clearly louder than the room.
+
+    The noise floor follows the energy of non-speech frames, so a fan or
+    traffic that starts mid-session raises the bar instead of reading as speech.
+
+    Args:
+        min_rms (float): Frames quieter than this are never speech (16-bit scale)
+        ratio (float): How far above the noise floor speech must be
+        adapt (float): Weight of each non-speech frame in the noise floor average
+    """
+
+    name = "energy"
+
+    def __init__(self, min_rms=300, ratio=2.0, adapt=0.05):
+        self.min_rms = min_rms
+        self.ratio = ratio
+        self.adapt = adapt
+        self.noise_floor = None
+
+    def calibrate(self, energy_threshold):
+        """Seed the noise floor from the recognizer's ambient noise calibration."""
+        self.noise_floor = energy_threshold / self.ratio
+
+    @property
+    def threshold(self):
+        if self.noise_floor is None:
+            return self.min_rms
+        return max(self.min_rms, self.noise_floor * self.ratio)
+
+    def is_speech(self, frame, sample_rate):
+        energy = frame_energy(frame)
+        if self.noise_floor is None:
+            self.noise_floor = energy
+        speech = energy >= self.threshold
+        if not speech:
+            self.noise_floor += self.adapt * (energy - self.noise_floor)
+        return speech
+
+
+class WebRTCClassifier:
+    """
+    The WebRTC voice activity detector.
+
+    Args:
+        aggressiveness (int): 0 (keeps the most audio) to 3 (drops the most non-speech)
+    """
+
+    name = "webrtc"
+
+    def __init__(self, aggressiveness=2):
+        import webrtcvad
+        self.aggressiveness = aggressiveness
+        self._vad = webrtcvad.Vad(aggressiveness)
+
+    @staticmethod
+    def available():
+        try:
+            import webrtcvad  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def calibrate(self, energy_threshold):
+        pass
+
+    def is_speech(self, frame, sample_rate):
+        return self._vad.is_speech(frame, sample_rate)
+
+
+def default_classifier(sample_rate):
+    """
+    Best available classifier for audio at `sample_rate`.
+
+    Returns:
+        WebRTCClassifier or EnergyClassifier
+    """
+    if sample_rate in WEBRTC_SAMPLE_RATES and WebRTCClassifier.available():
+        return WebRTCClassifier()
+    return EnergyClassifier()
+
+
+def _percentile(values, p):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[max(0, -(-len(values) * p // 100) - 1)]
+
+
+class VADListener:
+    """
+    Drop-in for sr.Recognizer.listen that cuts phrases on voice activity.
+
+    Audio is read in `frame_seconds` frames. A phrase starts once most of the
+    last `start_seconds` of frames are speech, and ends after `end_silence`
+    seconds without speech. Only the speech plus `padding` on either side is
+    returned. Segments with less than `min_speech` seconds of speech are
+    dropped as noise.
+
+    Args:
+        classifier: Object with is_speech(frame, sample_rate) (default: chosen per sample rate)
+        frame_seconds (float): Frame length; 0.01, 0.02 or 0.03 for the WebRTC VAD
+        start_seconds (float): Window looked at to decide speech has started
+        end_silence (float): Non-speech that ends a phrase
+        padding (float): Audio kept before the first and after the last speech frame
+        min_speech (float): Shortest amount of speech worth recognizing
+        pause_threshold (float): The recognizer setting this replaces, for the latency comparison
+        history (int): Recent phrases kept for the end-of-speech statistics
+        on_audio (callable): Called as on_audio(event, data, sample_rate) while a phrase is
+            captured: "start" with the audio before speech began, "audio" with each later
+            frame, "end" with the trimmed phrase (None if it was dropped). Used to stream
+            audio to a partial recognizer (see speculation.StreamingTranscriber)
+    """
+
+    def __init__(self, classifier=None, frame_seconds=0.02, start_seconds=0.1, end_silence=0.3,
+                 padding=0.1, min_speech=0.15, pause_threshold=0.5, history=200, on_audio=None):
+        self.classifier = classifier
+        self.on_audio = on_audio
+        self.frame_seconds = frame_seconds
+        self.start_seconds = start_seconds
+        self.end_silence = end_silence
+        self.padding = padding
+        self.min_speech = min_speech
+        self.pause_threshold = pause_threshold
+        self._energy_threshold = None
+        self._pending = b""
+        self._preroll = None
+
+        # Counters
+        self.phrases = 0
+        self.segments_dropped = 0
+        self.bytes_read = 0
+        self.bytes_sent = 0
+        self.bytes_trimmed = 0
+        self.bytes_dropped = 0
+        self.end_of_speech = deque(maxlen=history)   # seconds from the last speech frame to hand-off
+
+    def calibrate(self, energy_threshold):
+        """Use the recognizer's ambient noise calibration (see CaptureSession.start)."""
+        self._energy_threshold = energy_threshold
+        if self.classifier is not None:
+            self.classifier.calibrate(energy_threshold)
+
+    def _setup(self, source):
+        if self.classifier is None:
+            self.classifier = default_classifier(source.SAMPLE_RATE)
+            if self._energy_threshold is not None:
+                self.classifier.calibrate(self._energy_threshold)
+        if self._preroll is None:
+            frames = max(1, round(self.start_seconds / self.frame_seconds))
+            self._preroll = deque(maxlen=frames + max(0, round(self.padding / self.frame_seconds)))
+
+    def _frames(self, source, frame_bytes):
+        """Yield fixed-size frames from the source; a short final frame means it ran dry."""
+        while True:
+            while len(self._pending) < frame_bytes:
+                chunk = source.stream.read(source.CHUNK)
+                if not chunk:
+                    frame, self._pending = self._pending, b""
+                    yield frame
+                    return
+                self._pending += chunk
+            frame, self._pending = self._pending[:frame_bytes], self._pending[frame_bytes:]
+            yield frame
+
+    def listen(self, source, timeout=None, phrase_time_limit=None):
+        """
+        Wait for a phrase and return just its speech.
+
+        Args:
+            source (sr.AudioSource): Opened 16-bit audio source
+            timeout (float): Seconds of audio to wait for speech to start (None waits forever)
+            phrase_time_limit (float): Longest phrase returned
+
+        Returns:
+            sr.AudioData: The trimmed phrase (empty when the source ran dry)
+
+        Raises:
+            sr.WaitTimeoutError: If no speech started within timeout
+        """
+        self._setup(source)
+        rate, width = source.SAMPLE_RATE, source.SAMPLE_WIDTH
+        frame_bytes = int(rate * self.frame_seconds) * width
+        start_frames = self._preroll.maxlen - round(self.padding / self.frame_seconds)
+        pad_frames = round(self.padding / self.frame_seconds)
+        end_frames = max(1, round(self.end_silence / self.frame_seconds))
+        limit_frames = None if phrase_time_limit is None else round(phrase_time_limit / self.frame_seconds)
+        classify = self.classifier.is_speech
+        read_before = self.bytes_read
+
+        def timed_out():
+            return timeout is not None and (self.bytes_read - read_before) / (rate * width) >= timeout
+
+        frames = self._frames(source, frame_bytes)
+        while True:
+            # Waiting for speech to start
+            phrase = None
+            for frame in frames:
+                if len(frame) < frame_bytes:
+                    self.bytes_read += len(frame)
+                    return sr.AudioData(b"", rate, width)
+                self.bytes_read += frame_bytes
+                self._preroll.append((frame, classify(frame, rate)))
+                recent = list(self._preroll)[-start_frames:]
+                if len(recent) == start_frames and sum(voiced for _, voiced in recent) * 2 > start_frames:
+                    phrase = list(self._preroll)
+                    self._preroll.clear()
+                    break
+                if timed_out():
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+            if phrase is None:
+                return sr.AudioData(b"", rate, width)
+
+            # In a phrase: read until end_silence of non-speech or the time limit
+            on_audio = self.on_audio
+            if on_audio is not None:
+                on_audio("start", b"".join(frame for frame, _ in phrase), rate)
+            silent = 0
+            for frame in frames:
+                if len(frame) < frame_bytes:
+                    self.bytes_read += len(frame)
+                    break
+                self.bytes_read += frame_bytes
+                voiced = classify(frame, rate)
+                phrase.append((frame, voiced))
+                if on_audio is not None:
+                    on_audio("audio", frame, rate)
+                silent = 0 if voiced else silent + 1
+                if silent >= end_frames or (limit_frames is not None and len(phrase) >= limit_frames):
+                    break
+            ended_at = time.perf_counter()
+            audio = self._trim(phrase, pad_frames, frame_bytes, rate, width)
+            if on_audio is not None:
+                on_audio("end", audio.frame_data if audio is not None else None, rate)
+            if audio is not None:
+                # The silence after the last speech frame (read in real time from a microphone,
+                # shorter when the time limit or the source ended the phrase) plus the time spent
+                # trimming and finishing the partial transcript before the phrase is returned
+                self.end_of_speech.append(silent * self.frame_seconds + time.perf_counter() - ended_at)
+                return audio
+            # Too little speech to be a word; keep listening (the timeout keeps counting)
+            if timed_out():
+                raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+
+    def _trim(self, phrase, pad_frames, frame_bytes, rate, width):
+        voiced = [i for i, (_, is_speech) in enumerate(phrase) if is_speech]
+        total = len(phrase) * frame_bytes
+        if len(voiced) * self.frame_seconds < self.min_speech:
+            self.segments_dropped += 1
+            self.bytes_dropped += total
+            return None
+        first = max(0, voiced[0] - pad_frames)
+        last = min(len(phrase), voiced[-1] + 1 + pad_frames)
+        data = b"".join(frame for frame, _ in phrase[first:last])
+        self.phrases += 1
+        self.bytes_sent += len(data)
+        self.bytes_trimmed += total - len(data)
+        return sr.AudioData(data, rate, width)
+
+    def stats(self):
+        """
+        Bytes kept from the STT upload and how fast phrase ends are detected.
+
+        Returns:
+            dict: Classifier, phrase and segment counts, bytes read / sent / saved,
+                and end-of-speech latency percentiles in ms next to pause_threshold
+        """
+        end_of_speech = list(self.end_of_speech)
+        saved = self.bytes_trimmed + self.bytes_dropped
+        return {
+            "classifier": getattr(self.classifier, "name", None),
+            "phrases": self.phrases,
+            "segments_dropped": self.segments_dropped,
+            "bytes_read": self.bytes_read,
+            "bytes_sent": self.bytes_sent,
+            "bytes_saved": saved,
+            "saved_ratio": saved / (saved + self.bytes_sent) if saved + self.bytes_sent else 0.0,
+            "end_of_speech_p50_ms": None if not end_of_speech else _percentile(end_of_speech, 50) * 1000,
+            "end_of_speech_p95_ms": None if not end_of_speech else _percentile(end_of_speech, 95) * 1000,
+            "pause_threshold_ms": self.pause_threshold * 1000,
+        }
+
+
+def from_env():
+    """
+    VADListener configured from the environment.
+
+    Returns:
+        VADListener: The listener, or None when VIOLA_VAD=0
+    """
+    if os.getenv("VIOLA_VAD", "1").strip().lower() in ("0", "false", "no", "off"):
+        return None
+    return VADListener(end_silence=float(os.getenv("VIOLA_VAD_END_SILENCE", 0.3)))
@@ -0,0 +1,262 @@
+"""
+Wake Word detection for Viola
+Decides on-device whether a captured phrase contains "Viola" before anything
+is sent to the cloud recognizer.
+
+Stages:
+  1. EnergyGate            - drops silence and short noises without any recognition
+  2. SphinxKeywordDetector - PocketSphinx keyword search for "viola" (offline)
+  3. CloudWakeWord         - fallback when PocketSphinx is not installed: Google STT + regex
+"""
+
+import array
+import math
+import re
+import sys
+import time
+
+import speech_recognition as sr
+
+WAKE_WORD = "viola"
+CONTROL_PHRASES = ("stop listening",)  # act without the wake word
+
+
+def frame_rms(audio, frame_seconds=0.02):
+    """
+    RMS energy of consecutive frames of an AudioData.
+
+    Args:
+        audio (sr.AudioData): Captured audio
+        frame_seconds (float): Frame length in seconds
+
+    Returns:
+        list: One RMS value per frame
+    """
+    raw = audio.get_raw_data(convert_width=2)
+    samples = array.array("h")
+    samples.frombytes(raw[:len(raw) - len(raw) % 2])
+    if sys.byteorder == "big":
+        samples.byteswap()
+    frame_length = max(1, int(audio.sample_rate * frame_seconds))
+    energies = []
+    for start in range(0, len(samples), frame_length):
+        frame = samples[start:start + frame_length]
+        energies.append(math.sqrt(sum(s * s for s in frame) / len(frame)))
+    return energies
+
+
+def audio_seconds(audio):
+    """Duration of an AudioData in seconds."""
+    return len(audio.frame_data) / float(audio.sample_rate * audio.sample_width)
+
+
+class EnergyGate:
+    """
+    Cheap voice-activity gate in front of the keyword spotter.
+
+    A phrase passes only if it has enough frames above the energy threshold
+    to plausibly contain a spoken word.
+
+    Args:
+        min_rms (float): Frame energy treated as voiced (16-bit scale)
+        min_voiced_seconds (float): Minimum voiced audio for a phrase to pass
+        max_voiced_seconds (float): Phrases longer than this are chatter, not a wake word
+        recognizer (sr.Recognizer): If given, its adaptive energy threshold is used
+            whenever it is higher than min_rms
+    """
+
+    def __init__(self, min_rms=300, min_voiced_seconds=0.2, max_voiced_seconds=None,
+                 frame_seconds=0.02, recognizer=None):
+        self.min_rms = min_rms
+        self.min_voiced_seconds = min_voiced_seconds
+        self.max_voiced_seconds = max_voiced_seconds
+        self.frame_seconds = frame_seconds
+        self.recognizer = recognizer
+
+    @property
+    def threshold(self):
+        if self.recognizer is None:
+            return self.min_rms
+        return max(self.min_rms, self.recognizer.energy_threshold)
+
+    def passes(self, audio):
+        threshold = self.threshold
+        voiced = sum(1 for e in frame_rms(audio, self.frame_seconds) if e >= threshold)
+        voiced_seconds = voiced * self.frame_seconds
+        if voiced_seconds < self.min_voiced_seconds:
+            return False
+        if self.max_voiced_seconds is not None and voiced_seconds > self.max_voiced_seconds:
+            return False
+        return True
+
+
+class WakeWordDetector:
+    """Base class for wake word detectors."""
+
+    name = "base"
+    local = True
+
+    def detect(self, audio):
+        """
+        Check a phrase for the wake word.
+
+        Returns:
+            tuple: (detected, transcript) - keyword spotters return no transcript, only
+                a control phrase they spotted
+        """
+        raise NotImplementedError
+
+
+class SphinxKeywordDetector(WakeWordDetector):
+    """
+    PocketSphinx keyword search, fully offline.
+
+    Besides the wake word it spots control phrases that work without it
+    ("stop listening"); a spotted control phrase is returned as the transcript.
+
+    Args:
+        keyword (str): The wake word
+        sensitivity (float): Keyword threshold; larger values trigger more easily
+        control_phrases (tuple): Phrases spotted on their own
+    """
+
+    name = "sphinx"
+
+    def __init__(self, keyword=WAKE_WORD, sensitivity=1e-20, recognizer=None,
+                 control_phrases=CONTROL_PHRASES):
+        self.keyword = keyword
+        self.sensitivity = sensitivity
+        self.control_phrases = control_phrases
+        self.recognizer = recognizer or sr.Recognizer()
+
+    @staticmethod
+    def available():
+        try:
+            import pocketsphinx  # noqa: F401
+            return True
+        except ImportError:
+            return False
+
+    def detect(self, audio):
+        entries = [(phrase, self.sensitivity) for phrase in (self.keyword,) + tuple(self.control_phrases)]
+        try:
+            heard = self.recognizer.recognize_sphinx(audio, keyword_entries=entries).lower()
+        except sr.UnknownValueError:
+            return False, None
+        control = next((phrase for phrase in self.control_phrases if phrase in heard), None)
+        return self.keyword in heard, control
+
+
+class CloudWakeWord(WakeWordDetector):
+    """
+    Fallback detector: transcribe with a cloud recognizer and look for the word.
+
+    Args:
+        recognize (callable): Takes AudioData, returns the transcript or raises sr.UnknownValueError
+    """
+
+    name = "cloud"
+    local = False
+
+    def __init__(self, recognize, keyword=WAKE_WORD):
+        self.recognize = recognize
+        self.pattern = re.compile(rf"\b{re.escape(keyword)}\b")
+
+    def detect(self, audio):
+        try:
+            transcript = self.recognize(audio)
+        except sr.UnknownValueError:
+            return False, None
+        return bool(self.pattern.search(transcript.lower())), transcript
+
+
+class WakeResult:
+    """Outcome of running a phrase through the wake word stage."""
+
+    def __init__(self, detected, transcript=None, stage=None):
+        self.detected = detected
+        self.transcript = transcript
+        self.stage = stage  # which stage made the decision
+
+    def __bool__(self):
+        return self.detected
+
+
+class WakeWordStage:
+    """
+    Energy gate followed by a wake word detector.
+
+    Args:
+        detector (WakeWordDetector): Keyword spotter (or cloud fallback)
+        gate (EnergyGate): Pre-filter, or None to send everything to the detector
+    """
+
+    def __init__(self, detector, gate=None):
+        self.detector = detector
+        self.gate = gate
+        self.phrases = 0
+        self.gated_out = 0
+        self.rejected = 0
+        self.detected = 0
+        self.cpu_seconds = 0.0
+        self.audio_seconds = 0.0
+
+    def check(self, audio):
+        """
+        Run one captured phrase through the stage.
+
+        Returns:
+            WakeResult: Whether the wake word was heard (and the transcript, for cloud detection)
+        """
+        began = time.process_time()
+        self.phrases += 1
+        self.audio_seconds += audio_seconds(audio)
+        try:
+            if self.gate is not None and not self.gate.passes(audio):
+                self.gated_out += 1
+                return WakeResult(False, stage="gate")
+            detected, transcript = self.detector.detect(audio)
+            if detected:
+                self.detected += 1
+            else:
+                self.rejected += 1
+            return WakeResult(detected, transcript, stage=self.detector.name)
+        finally:
+            self.cpu_seconds += time.process_time() - began
+
+    def stats(self):
+        """
+        Counters for the stage.
+
+        Returns:
+            dict: Phrase counts per outcome and CPU seconds per second of audio
+        """
+        return {
+            "detector": self.detector.name,
+            "phrases": self.phrases,
+            "gated_out": self.gated_out,
+            "rejected": self.rejected,
+            "detected": self.detected,
+            "cpu_per_audio_second": self.cpu_seconds / self.audio_seconds if self.audio_seconds else 0.0,
+        }
+
+
+def default_stage(recognize, recognizer=None):
+    """
+    Best available wake word stage for this machine.
+
+    Uses PocketSphinx keyword search when it is installed, otherwise falls back
+    to the cloud recognizer. The energy gate runs in front either way.
+
+    Args:
+        recognize (callable): Cloud recognizer used for the fallback
+        recognizer (sr.Recognizer): Capture recognizer whose energy threshold the gate follows
+
+    Returns:
+        WakeWordStage: The configured stage
+    """
+    if SphinxKeywordDetector.available():
+        detector = SphinxKeywordDetector()
+    else:
+        detector = CloudWakeWord(recognize)
+    return WakeWordStage(detector, gate=EnergyGate(recognizer=recognizer))